@@ -0,0 +1,54 @@
+"""Benchmark the achievement tracker against re-checking every rule.
+
+Builds registries with hundreds of rules and times one answer's worth of
+metric changes, where only ``points`` and ``problems_solved`` move.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_achievements
+"""
+import time
+
+from datadetectives.achievements import METRICS, Achievement, AchievementTracker
+
+RULE_COUNTS = [10, 100, 1_000]
+ANSWERS = 20_000
+
+
+def make_rules(n):
+    return [Achievement(f"rule-{i}", "🏅", f"Rule {i}", "", METRICS[i % len(METRICS)], (i // len(METRICS) + 1) * 7, None)
+            for i in range(n)]
+
+
+def naive(rules, state):
+    """What the tab used to do: test every rule against the current state"""
+    return [rule for rule in rules if state[rule.metric] >= rule.threshold]
+
+
+def main():
+    print(f"{'rules':>7} {'re-check all (us)':>18} {'tracker (us)':>13}")
+    for n in RULE_COUNTS:
+        rules = make_rules(n)
+        state = {'points': 0, 'problems_solved': 0, 'current_level': 1, 'correct_streak': 0}
+
+        start = time.perf_counter()
+        for i in range(ANSWERS):
+            state['points'] = i * 3
+            state['problems_solved'] = i
+            naive(rules, state)
+        naive_us = (time.perf_counter() - start) / ANSWERS * 1e6
+
+        tracker = AchievementTracker(rules)
+        state = {'points': 0, 'problems_solved': 0, 'current_level': 1, 'correct_streak': 0}
+        start = time.perf_counter()
+        for i in range(ANSWERS):
+            state['points'] = i * 3
+            state['problems_solved'] = i
+            tracker.update_many(state)
+        tracker_us = (time.perf_counter() - start) / ANSWERS * 1e6
+
+        print(f"{n:>7,} {naive_us:>18.2f} {tracker_us:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
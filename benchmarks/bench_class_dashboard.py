@@ -0,0 +1,84 @@
+"""Time the Teacher View against a naive pandas version at 1k, 100k and 10M attempts.
+
+The naive path builds a DataFrame of every attempt, groups it and plots the
+per-minute accuracy series in full. ClassAnalytics aggregates with bincount
+and LTTB-downsamples the series, so its figure payload stays flat. Also
+timed: folding in 1k new attempts (a refresh above the high-water mark) and
+a warm figure-cache hit. Run from the repository root:
+
+    python -m benchmarks.bench_class_dashboard
+"""
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from datadetectives.charts import cached_class_figures, class_figures
+from datadetectives.classroom import ClassAnalytics
+from datadetectives.engine import OPERATIONS
+
+SIZES = [1_000, 100_000, 10_000_000]
+TERM_MS = 90 * 86_400_000
+START_MS = 1_700_000_000_000
+
+
+def synthetic(n, rng):
+    return {
+        'operation': rng.integers(0, len(OPERATIONS), n).astype(np.int8),
+        'level': rng.integers(1, 30, n).astype(np.int16),
+        'correct': rng.random(n) < 0.8,
+        'timestamp_ms': START_MS + np.sort(rng.integers(0, TERM_MS, n)),
+    }
+
+
+def naive_figures(cols):
+    df = pd.DataFrame(cols)
+    df['operation'] = np.array(OPERATIONS)[df['operation']]
+    errors = (1 - df.groupby(['operation', 'level'])['correct'].mean()).unstack() * 100
+    heatmap = px.imshow(errors, title="Error Rate by Operation and Level (%)")
+    df['minute'] = pd.to_datetime(df['timestamp_ms'] // 60_000 * 60_000, unit='ms')
+    over_time = df.groupby('minute')['correct'].mean().reset_index()
+    timeline = px.line(over_time, x='minute', y='correct', title="Class Accuracy Over Time")
+    levels = df['level'].value_counts().sort_index()
+    distribution = px.bar(x=levels.index, y=levels.values, title="Cases Attempted per Detective Level")
+    return heatmap, timeline, distribution
+
+
+def payload_kb(figures):
+    return sum(len(fig.to_json()) for fig in figures) / 1e3
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    rng = np.random.default_rng(0)
+    warm_up = synthetic(100, rng)
+    naive_figures(warm_up)  # plotly's first figure pays for lazy imports
+    print(f"{'attempts':>11} {'naive ms':>9} {'naive KB':>9} {'aggregate ms':>13} {'figures ms':>11} "
+          f"{'KB':>6} {'+1k ms':>7} {'warm ms':>8}")
+    for n in SIZES:
+        cols = synthetic(n, rng)
+        naive, naive_ms = timed(lambda: naive_figures(cols))
+
+        analytics = ClassAnalytics()
+        _, aggregate_ms = timed(lambda: analytics.update(cols['operation'], cols['level'], cols['correct'],
+                                                         cols['timestamp_ms']))
+        figures, figures_ms = timed(lambda: class_figures(analytics))
+
+        more = synthetic(1_000, rng)
+        _, refresh_ms = timed(lambda: analytics.update(more['operation'], more['level'], more['correct'],
+                                                       more['timestamp_ms']))
+        cache = {}
+        cached_class_figures(analytics, cache)
+        _, warm_ms = timed(lambda: cached_class_figures(analytics, cache))
+        print(f"{n:>11,} {naive_ms:>9.0f} {payload_kb(naive):>9,.0f} {aggregate_ms:>13.1f} {figures_ms:>11.1f} "
+              f"{payload_kb(figures):>6,.0f} {refresh_ms:>7.2f} {warm_ms:>8.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Time Progress Dashboard data preparation and figure building.
+
+Compares the old per-rerun path (list of dicts, generator sum, DataFrame and
+groupby) with DashboardAggregates, both right after an answer (cold cache)
+and on an unrelated rerun such as "Get Hint" (warm cache).
+
+Run from the repository root:
+
+    python -m benchmarks.bench_dashboard
+"""
+import time
+from datetime import datetime
+
+import pandas as pd
+import plotly.express as px
+
+from datadetectives.aggregates import DashboardAggregates
+from datadetectives.charts import cached_dashboard_figures
+
+SIZES = [10, 10_000, 1_000_000]
+REPEATS = 5
+
+
+def old_dashboard(problem_history):
+    total_problems = len(problem_history)
+    correct_problems = sum(1 for p in problem_history if p['correct'])
+    accuracy = (correct_problems / total_problems * 100) if total_problems > 0 else 0
+
+    df = pd.DataFrame(problem_history[-10:])
+    df['Case_Number'] = range(1, len(df) + 1)
+    df['Success'] = df['correct'].astype(int)
+    fig = px.line(df, x='Case_Number', y='Success')
+    df['Cumulative_Points'] = df['points'].cumsum()
+    fig2 = px.bar(df, x='Case_Number', y='points', color='points')
+    level_stats = df.groupby('level').agg({'correct': ['count', 'sum', 'mean']}).round(2)
+    level_stats.columns = ['Total_Cases', 'Solved_Cases', 'Success_Rate']
+    level_stats = level_stats.reset_index()
+    fig3 = px.bar(level_stats, x='level', y='Success_Rate', color='Success_Rate')
+    return accuracy, fig, fig2, fig3
+
+
+def new_dashboard(stats, cache):
+    return stats.accuracy, cached_dashboard_figures(stats, cache)
+
+
+def best_of(fn):
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    print(f"{'attempts':>10} {'old (ms)':>10} {'new cold (ms)':>14} {'new warm (ms)':>14}")
+    for n in SIZES:
+        history = [{
+            'problem': "3 + 4",
+            'correct': i % 3 != 0,
+            'level': 1 + (i // 5) % 50,
+            'points': 10 if i % 3 else 0,
+            'timestamp': datetime.now()
+        } for i in range(n)]
+        stats = DashboardAggregates()
+        for record in history:
+            stats.record(record['level'], record['correct'], record['points'])
+
+        old_ms = best_of(lambda: old_dashboard(history))
+
+        def cold():
+            stats.version += 1
+            new_dashboard(stats, cache)
+
+        cache = {}
+        cold_ms = best_of(cold)
+        warm_ms = best_of(lambda: new_dashboard(stats, cache))
+        print(f"{n:>10,} {old_ms:>10.2f} {cold_ms:>14.2f} {warm_ms:>14.4f}")
+
+
+if __name__ == "__main__":
+    main()
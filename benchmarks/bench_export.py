@@ -0,0 +1,139 @@
+"""Export a term of attempts and read one student back through the memory map.
+
+Builds a detective database with --attempts rows (default 50M) spread over
+--students, then exports it to each format in a fresh process and reports
+time and peak RSS, which should stay flat as --attempts grows. Finally the
+Parquet export is converted to Arrow, as ``--convert`` does, then
+memory-mapped and one student's history is loaded.
+Run from the repository root:
+
+    python -m benchmarks.bench_export --attempts 5000000
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from datadetectives.store import SCHEMA, connect
+
+# The Arrow export gets its own name so the importer converts the Parquet one
+OUTPUTS = ("term.parquet", "term-ipc.arrow", "term.csv")
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+def resident_mb():
+    """Current anonymous and file-backed resident memory in MB (Linux only)"""
+    try:
+        with open("/proc/self/status") as f:
+            fields = dict(line.split(":", 1) for line in f)
+    except OSError:
+        return None, None
+    return int(fields['RssAnon'].split()[0]) / 1e3, int(fields['RssFile'].split()[0]) / 1e3
+
+
+def build_database(path, attempts, students, chunk=500_000):
+    """Fill ``path`` with synthetic attempts, students interleaved as in a real term"""
+    rng = np.random.default_rng(0)
+    names = [f"detective-{i:05d}" for i in range(students)]
+    conn = connect(path)
+    conn.executescript(SCHEMA)
+    start_ms = 1_700_000_000_000
+    for offset in range(0, attempts, chunk):
+        n = min(chunk, attempts - offset)
+        student = rng.integers(0, students, n)
+        correct = rng.random(n) < 0.8
+        rows = zip(
+            (names[s] for s in student.tolist()),
+            rng.integers(0, 4, n).tolist(),
+            rng.integers(1, 100, n).tolist(),
+            rng.integers(1, 100, n).tolist(),
+            rng.integers(1, 20, n).tolist(),
+            correct.tolist(),
+            np.where(correct, 30, 0).tolist(),
+            (start_ms + offset + np.arange(n)).tolist(),
+            rng.integers(1_000, 60_000, n).tolist(),
+            (0 for _ in range(n)),
+        )
+        with conn:
+            conn.executemany("INSERT INTO attempts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.close()
+
+
+def run_export(db_path, out_path):
+    """Runs in a fresh process; returns (rows, seconds, baseline MB, peak MB)"""
+    from datadetectives.export import export_attempts
+
+    import pyarrow
+
+    pyarrow.array([0])  # count pyarrow's lazy start-up in the baseline rather than the export
+
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    rows = export_attempts(out_path, db_path)
+    return rows, time.perf_counter() - start, baseline, peak_rss_mb()
+
+
+def run_import(path, student):
+    """Runs in a fresh process; returns (rows, convert seconds, open seconds, query seconds, student rows, peak MB,
+    resident MB)"""
+    from datadetectives.export import convert_export, open_attempts
+
+    start = time.perf_counter()
+    convert_export(path)
+    converted = time.perf_counter() - start
+    start = time.perf_counter()
+    archive = open_attempts(path)
+    opened = time.perf_counter() - start
+    archive.history(student)  # pyarrow initialises lazily on first use
+    start = time.perf_counter()
+    history = archive.history(student)
+    queried = time.perf_counter() - start
+    return len(archive), converted, opened, queried, len(history), peak_rss_mb(), resident_mb()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--attempts", type=int, default=50_000_000)
+    parser.add_argument("--students", type=int, default=10_000)
+    parser.add_argument("--db", help="reuse an existing detective database instead of building one")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="detectives-export-")
+    db_path = args.db
+    if db_path is None:
+        db_path = os.path.join(workdir, "detectives.db")
+        start = time.perf_counter()
+        build_database(db_path, args.attempts, args.students)
+        print(f"built {args.attempts:,} attempts in {time.perf_counter() - start:.1f}s "
+              f"({os.path.getsize(db_path) / 1e6:,.0f} MB)")
+
+    ctx = multiprocessing.get_context("spawn")
+    for name in OUTPUTS:
+        out_path = os.path.join(workdir, name)
+        with ctx.Pool(1) as pool:
+            rows, seconds, baseline, peak = pool.apply(run_export, (db_path, out_path))
+        print(f"{name:>14}: {rows:,} rows in {seconds:.1f}s ({rows / seconds:,.0f} rows/s), "
+              f"{os.path.getsize(out_path) / 1e6:,.0f} MB, peak RSS {peak:,.0f} MB "
+              f"({peak - baseline:+,.0f} MB over {baseline:,.0f} MB at start)")
+
+    with ctx.Pool(1) as pool:
+        rows, converted, opened, queried, student_rows, peak, (anon, mapped) = pool.apply(
+            run_import, (os.path.join(workdir, "term.parquet"), "detective-00042"))
+    print(f"import: converted {rows:,} rows in {converted:.1f}s, mapped in {opened * 1000:.0f} ms; one student's "
+          f"{student_rows:,} attempts in {queried * 1000:.1f} ms; peak RSS {peak:,.0f} MB")
+    if anon is not None:
+        print(f"  resident after import: {anon:,.0f} MB heap, {mapped:,.0f} MB file-backed (page cache of the map)")
+    print(f"files left in {workdir}")
+
+
+if __name__ == "__main__":
+    main()
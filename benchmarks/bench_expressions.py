@@ -0,0 +1,83 @@
+"""Throughput of the multi-step problem generators and the answer checker.
+
+Generates batches of distinct, valid two-step problems at every
+multi-step level band with ``generate_expression_problems`` and reports
+problems per second against the 100k/s target for pool pre-generation.
+Levels 4 and 5 have fewer distinct problems than a batch asks for. Their
+batches come back short and are marked exhausted. Their rate includes
+the passes spent finding nothing new, so the target applies to the other
+levels. A sample of each batch is rebuilt as trees and re-evaluated exactly
+with ``Fraction`` to check the vectorised arithmetic, and its text is
+checked for duplicates. Also timed: the scalar generator used when the pool
+runs dry, a pooled multi-step problem and ``answers_match``. Run from the
+repository root:
+
+    python -m benchmarks.bench_expressions
+"""
+import random
+import sys
+import time
+from fractions import Fraction
+
+from datadetectives.expressions import (answers_match, evaluate, generate_expression_problem,
+                                        generate_expression_problems)
+from datadetectives.pool import ProblemPool
+
+LEVELS = [4, 5, 6, 8, 10]
+N = 200_000
+SAMPLE = 20_000
+TARGET = 100_000
+
+
+def per_call_us(fn, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main():
+    generate_expression_problems(8, 1_000, seed=0)  # warm up NumPy
+    slowest = float('inf')
+    print(f"{'level':>5} {'problems':>9} {'seconds':>8} {'problems/s':>11} {'checked':>8} {'mismatches':>10} "
+          f"{'duplicates':>10}")
+    for level in LEVELS:
+        start = time.perf_counter()
+        batch = generate_expression_problems(level, N, seed=level)
+        seconds = time.perf_counter() - start
+        rate = len(batch) / seconds
+        exhausted = len(batch) < N
+        if not exhausted:
+            slowest = min(slowest, rate)
+
+        sample = range(0, len(batch), max(1, len(batch) // SAMPLE))
+        mismatches = sum(evaluate(batch.tree(i)) != batch.answer(i) for i in sample)
+        texts = [batch.expression(i) for i in sample]
+        duplicates = len(texts) - len(set(texts))
+        print(f"{level:>5} {len(batch):>9,} {seconds:>8.2f} {rate:>11,.0f} {len(texts):>8,} {mismatches:>10} "
+              f"{duplicates:>10}{'  exhausted' if exhausted else ''}")
+        if mismatches or duplicates:
+            sys.exit("vectorised generator disagrees with the exact evaluator")
+
+    rng = random.Random(0)
+    scalar_us = per_call_us(lambda: generate_expression_problem(8, rng=rng), 5_000)
+    pool = ProblemPool(seed=0)
+    pool.wait_full(timeout=10)
+    pops = pool.size - pool.low_water
+    pooled_us = per_call_us(lambda: pool.pop_multistep(8), pops)
+    pool.close()
+    thirds = {'answer': Fraction(1, 3), 'tolerance': Fraction(1, 200)}
+    whole = {'answer': 42, 'tolerance': 0}
+    print(f"generate_expression_problem  {scalar_us:8.1f} us")
+    print(f"ProblemPool.pop_multistep    {pooled_us:8.1f} us")
+    print(f"answers_match int            {per_call_us(lambda: answers_match(42, whole), 200_000):8.2f} us")
+    print(f"answers_match '0.33' vs 1/3  {per_call_us(lambda: answers_match('0.33', thirds), 200_000):8.2f} us")
+    print(f"answers_match '2 1/3'        {per_call_us(lambda: answers_match('2 1/3', thirds), 200_000):8.2f} us")
+    print(f"slowest level with {N:,} problems to spare: {slowest:,.0f} distinct valid problems/s "
+          f"(target {TARGET:,})")
+    if slowest < TARGET:
+        sys.exit("multi-step generation is below target")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Benchmark the vectorized batch generator against the scalar path.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_generate_problems
+"""
+import time
+
+from datadetectives.engine import generate_problem, generate_problems
+
+SIZES = [1_000, 100_000, 1_000_000]
+LEVEL = 4
+
+
+def time_scalar(n):
+    start = time.perf_counter()
+    for _ in range(n):
+        generate_problem(LEVEL)
+    return time.perf_counter() - start
+
+
+def time_batch(n):
+    start = time.perf_counter()
+    generate_problems(LEVEL, n, seed=0)
+    return time.perf_counter() - start
+
+
+def main():
+    generate_problems(LEVEL, 10, seed=0)  # warm up NumPy
+    print(f"{'n':>10} {'scalar (s)':>12} {'batch (s)':>12} {'speedup':>9}")
+    for n in SIZES:
+        scalar = time_scalar(n)
+        batch = time_batch(n)
+        print(f"{n:>10,} {scalar:>12.4f} {batch:>12.4f} {scalar / batch:>8.1f}x")
+
+    first = generate_problems(LEVEL, 1_000, seed=42)
+    second = generate_problems(LEVEL, 1_000, seed=42)
+    assert (first.a == second.a).all() and (first.b == second.b).all(), "seeded batches differ"
+    print("seeded batches are reproducible")
+
+
+if __name__ == "__main__":
+    main()
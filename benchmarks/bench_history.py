@@ -0,0 +1,57 @@
+"""Compare the columnar ProblemHistory with the old list of dicts.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_history
+"""
+import sys
+import time
+from datetime import datetime
+
+from datadetectives.engine import generate_problems
+from datadetectives.history import ProblemHistory
+
+SIZES = [1_000, 100_000, 1_000_000]
+
+
+def dict_history_bytes(records):
+    """Deep size of a list of history dicts, counting every key and value once per dict"""
+    total = sys.getsizeof(records)
+    for record in records:
+        total += sys.getsizeof(record)
+        total += sum(sys.getsizeof(value) for value in record.values())
+    return total
+
+
+def main():
+    print(f"{'n':>10} {'dicts (MB)':>11} {'columns (MB)':>13} {'ratio':>7} {'append (us)':>12} {'accuracy (us)':>14}")
+    for n in SIZES:
+        batch = generate_problems(4, n, seed=0)
+        problems = [batch[i] for i in range(n)]
+
+        records = [{
+            'problem': p['expression'],
+            'correct': i % 3 != 0,
+            'level': p['level'],
+            'points': 40,
+            'timestamp': datetime.now()
+        } for i, p in enumerate(problems)]
+
+        history = ProblemHistory()
+        start = time.perf_counter()
+        for i, p in enumerate(problems):
+            history.append(p, i % 3 != 0, 40)
+        append_us = (time.perf_counter() - start) / n * 1e6
+
+        start = time.perf_counter()
+        for _ in range(1_000):
+            history.accuracy
+        accuracy_us = (time.perf_counter() - start) / 1_000 * 1e6
+
+        dict_mb = dict_history_bytes(records) / 1e6
+        column_mb = history.nbytes / 1e6
+        print(f"{n:>10,} {dict_mb:>11.2f} {column_mb:>13.2f} {dict_mb / column_mb:>6.1f}x {append_us:>12.2f} {accuracy_us:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
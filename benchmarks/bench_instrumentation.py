@@ -0,0 +1,130 @@
+"""Overhead of the latency instrumentation relative to a Streamlit rerun.
+
+Measures the cost of one observation through each hook (Registry.observe,
+Timer, the generate_problem wrapper). Then it runs the app itself
+(``data.detectives.py``) through Streamlit's AppTest, signed in on Math
+Missions and answering a problem every rerun, with the registry enabled
+and disabled. The sidebar's Performance panel runs on every rerun too,
+with its histogram list switched off as it is by default. The
+instrumentation budget is 1% of rerun time; the run fails if the measured
+difference between the two exceeds it. The app's databases go to a
+temporary directory. Run from the repository root:
+
+    python -m benchmarks.bench_instrumentation
+"""
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from datadetectives.engine import generate_problem
+from datadetectives.metrics import REGISTRY
+from datadetectives.routing import TAB_LABELS, TabTimings
+
+N = 200_000
+RERUNS = 200
+BUDGET = 0.01
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "data.detectives.py")
+
+
+def per_call_ns(fn, n=N):
+    start = time.perf_counter_ns()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter_ns() - start) / n
+
+
+def sign_in(app):
+    """Sign a detective in and open Math Missions"""
+    app.run()
+    app.sidebar.text_input[0].input("Benchmark")
+    app.sidebar.button[0].click()
+    app.run()
+    app.radio(key="active_tab").set_value(TAB_LABELS[1])
+    app.run()
+
+
+def answer(app):
+    """Type the current problem's answer into the answer box on screen and submit it.
+
+    The box on screen was drawn for the problem before a submit, so when
+    the kind of answer changes the guess is simply wrong.
+    """
+    problem = app.session_state['current_problem']
+    if any(widget.key == "answer_input" for widget in app.number_input):
+        app.number_input(key="answer_input").set_value(problem['answer'] if isinstance(problem['answer'], int) else 0)
+    else:
+        app.text_input(key="answer_text_input").input(problem.get('answer_text', str(problem['answer'])))
+    next(button for button in app.button if button.label.startswith("🔍")).click()
+
+
+def rerun_ms():
+    """Median rerun time with the registry on and off, and the median paired difference.
+
+    The app answers a problem every rerun. On and off alternate rerun by
+    rerun, in on-off, off-on pairs, so drift as the session grows affects
+    both sides alike.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(APP, default_timeout=60)
+    sign_in(app)
+    samples = {True: [], False: []}
+    for i in range(RERUNS):
+        for enabled in ((True, False) if i % 2 else (False, True)):
+            REGISTRY.enabled = enabled
+            answer(app)
+            start = time.perf_counter()
+            app.run()
+            samples[enabled].append((time.perf_counter() - start) * 1000)
+            if app.exception:
+                sys.exit(f"the app raised: {app.exception[0].message}")
+    REGISTRY.enabled = True
+    difference = statistics.median(on - off for on, off in zip(samples[True], samples[False]))
+    return statistics.median(samples[True]), statistics.median(samples[False]), difference
+
+
+def main():
+    REGISTRY.enabled = True
+    timings = TabTimings()
+    histogram = REGISTRY.histogram('bench_seconds')
+    observe_ns = per_call_ns(lambda: histogram.observe(0.003))
+    lookup_ns = per_call_ns(lambda: REGISTRY.observe('bench_seconds', 0.003))
+
+    def timer():
+        with REGISTRY.timer('bench_seconds'):
+            pass
+    timer_ns = per_call_ns(timer)
+    tab_ns = per_call_ns(lambda: timings.run("tab", int))
+
+    wrapped_ns = per_call_ns(lambda: generate_problem(5), 50_000)
+    REGISTRY.enabled = False
+    unwrapped_ns = per_call_ns(lambda: generate_problem(5), 50_000)
+    REGISTRY.enabled = True
+    raw_ns = per_call_ns(lambda: generate_problem.__wrapped__(5), 50_000)
+
+    print(f"Histogram.observe      {observe_ns:8.0f} ns")
+    print(f"Registry.observe       {lookup_ns:8.0f} ns (name lookup + observe)")
+    print(f"Registry.timer block   {timer_ns:8.0f} ns")
+    print(f"TabTimings.run         {tab_ns:8.0f} ns")
+    print(f"generate_problem       {wrapped_ns:8.0f} ns timed, {unwrapped_ns:.0f} ns disabled, {raw_ns:.0f} ns unwrapped")
+
+    tmp = tempfile.mkdtemp(prefix="instrumentation-")
+    os.environ['DETECTIVES_DB'] = os.path.join(tmp, "detectives.db")
+    os.environ['DETECTIVES_SESSION_DB'] = os.path.join(tmp, "sessions.db")
+    try:
+        on_ms, off_ms, difference_ms = rerun_ms()
+    finally:
+        shutil.rmtree(tmp)
+    share = difference_ms / off_ms
+    print(f"app rerun answering a problem (AppTest, median of {RERUNS} each): "
+          f"{on_ms:.2f} ms instrumented, {off_ms:.2f} ms disabled")
+    print(f"instrumentation: {difference_ms * 1000:+.0f} us per rerun (median paired difference) = "
+          f"{share:+.2%} of rerun time (budget {BUDGET:.0%})")
+    if share > BUDGET:
+        sys.exit("instrumentation overhead is over budget")
+
+if __name__ == "__main__":
+    main()
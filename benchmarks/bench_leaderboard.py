@@ -0,0 +1,46 @@
+"""Benchmark leaderboard updates, rank lookups and top-K queries.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_leaderboard
+"""
+import random
+import time
+
+from datadetectives.leaderboard import Leaderboard
+
+STUDENTS = 100_000
+OPERATIONS = 100_000
+
+
+def per_op_us(fn, args):
+    start = time.perf_counter()
+    for arg in args:
+        fn(arg)
+    return (time.perf_counter() - start) / len(args) * 1e6
+
+
+def main():
+    rng = random.Random(0)
+    names = [f"detective-{i}" for i in range(STUDENTS)]
+    board = Leaderboard()
+
+    start = time.perf_counter()
+    for name in names:
+        board.update(name, rng.randint(0, 5_000), rng.randint(1, 10))
+    print(f"loaded {STUDENTS:,} students in {time.perf_counter() - start:.2f}s")
+
+    sample = [rng.choice(names) for _ in range(OPERATIONS)]
+    update_us = per_op_us(lambda name: board.add(name, rng.choice((10, 20, 30))), sample)
+    rank_us = per_op_us(board.rank, sample)
+    top_us = per_op_us(board.top, [10] * 10_000)
+
+    print(f"{'operation':>12} {'us/op':>8}")
+    print(f"{'add points':>12} {update_us:>8.2f}")
+    print(f"{'rank':>12} {rank_us:>8.2f}")
+    print(f"{'top 10':>12} {top_us:>8.2f}")
+    assert rank_us < 1000, "rank lookup is not sub-millisecond"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Benchmark ProblemPool pops against synchronous generation.
+
+Also replays a steady stream of "New Mission Assignment" clicks across many
+sessions and levels and reports pool hit rate and refill latency, first
+with unscaled ranges and then through the adaptive engine, whose range
+scales move with every answer. Every problem not served from the pool
+counts as a miss.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_pool
+"""
+import random
+import time
+
+from datadetectives.adaptive import TARGET_ACCURACY, AdaptiveModel, next_adaptive_problem
+from datadetectives.engine import generate_problem
+from datadetectives.pool import ProblemPool
+
+POPS = 20_000
+SESSIONS = 500
+RATE = 2_000  # pops per second in the sustained run
+
+
+def main():
+    pool = ProblemPool(seed=0)
+    pool.wait_full(timeout=10)
+
+    start = time.perf_counter()
+    for _ in range(POPS):
+        generate_problem(5)
+    generate_us = (time.perf_counter() - start) / POPS * 1e6
+
+    pops = 0
+    elapsed = 0.0
+    while pops < POPS:
+        pool.wait_full(timeout=10)
+        burst = min(pool.size - pool.low_water, POPS - pops)
+        start = time.perf_counter()
+        for _ in range(burst):
+            pool.pop(5)
+        elapsed += time.perf_counter() - start
+        pops += burst
+    pop_us = elapsed / POPS * 1e6
+    print(f"generate_problem: {generate_us:.2f} us   pool.pop: {pop_us:.2f} us")
+
+    pool.close()
+    pool = ProblemPool(seed=1)
+    pool.wait_full(timeout=10)
+    rng = random.Random(0)
+    seen = [set() for _ in range(SESSIONS)]
+    interval = 1 / RATE
+    start = time.perf_counter()
+    for i in range(POPS):
+        session = rng.randrange(SESSIONS)
+        pool.pop(rng.randint(2, 12), seen[session])
+        time.sleep(max(start + (i + 1) * interval - time.perf_counter(), 0))
+    stats = pool.stats()
+    pool.close()
+    print(f"sustained {RATE:,} pops/s over {SESSIONS} sessions: hit rate {stats['hit_rate']:.1%}, "
+          f"refills {stats['refills']}, mean refill {stats['mean_refill_ms']:.2f} ms, "
+          f"max refill {stats['max_refill_ms']:.2f} ms")
+
+    # Students answering at the target accuracy keep their staircases moving
+    pool = ProblemPool(seed=2)
+    pool.wait_full(timeout=10)
+    rng = random.Random(0)
+    sessions = [(AdaptiveModel(), rng.randint(2, 12), set()) for _ in range(SESSIONS)]
+    start = time.perf_counter()
+    for i in range(POPS):
+        model, level, seen = sessions[rng.randrange(SESSIONS)]
+        problem = next_adaptive_problem(model, pool, level, seen, rng)
+        model.update(problem['operation'], level, rng.random() < TARGET_ACCURACY, rng.uniform(5, 30))
+        time.sleep(max(start + (i + 1) * interval - time.perf_counter(), 0))
+    stats = pool.stats()
+    pool.close()
+    print(f"adaptive sessions at {RATE:,} pops/s: hit rate {stats['hit_rate']:.1%}, "
+          f"refills {stats['refills']}, mean refill {stats['mean_refill_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
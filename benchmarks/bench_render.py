@@ -0,0 +1,108 @@
+"""Time full app reruns and count the Markdown bytes they send, before and after pre-rendering.
+
+Runs the app (``data.detectives.py``) through Streamlit's AppTest, signed
+in, on the tabs that use ``datadetectives.render``: Detective HQ (profile
+cards), Math Missions (answering a problem every rerun) and Achievements
+(badges). "Before" swaps the render module back to what the script did
+before pre-rendering: the raw, unminified source of each static block, and
+``str.format`` on the template source each time a card is filled. Before
+and after alternate rerun by rerun in on-off, off-on pairs, so drift as
+the session grows affects both alike. The medians and the median paired
+difference are reported per tab, along with the serialized bytes of every
+Markdown element on the page. The app's databases go to a temporary
+directory. Run from the repository root:
+
+    python -m benchmarks.bench_render
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_instrumentation import APP, answer, sign_in
+from datadetectives import render
+from datadetectives.routing import TAB_LABELS
+
+RERUNS = 100
+TABS = (TAB_LABELS[0], TAB_LABELS[1], TAB_LABELS[3])
+
+
+class FormatTemplate:
+    """A card as the script filled it before: ``str.format`` on the raw source every time"""
+
+    __slots__ = ('source',)
+
+    def __init__(self, source):
+        self.source = source
+
+    def render(self, **slots):
+        return self.source.format(**slots)
+
+
+def render_modes():
+    """``{'before': attributes, 'after': attributes}`` to set on the render module"""
+    after = {name: value for name, value in vars(render).items()
+             if isinstance(value, render.HtmlTemplate) or (isinstance(value, str) and value in render.SOURCES)}
+    before = {name: FormatTemplate(value.source) if isinstance(value, render.HtmlTemplate) else render.SOURCES[value]
+              for name, value in after.items()}
+    return {'before': before, 'after': after}
+
+
+def sent_bytes(app):
+    """Serialized size of every Markdown element on the page"""
+    return sum(len(element.proto.SerializeToString()) for element in app.markdown)
+
+
+def rerun_tab(app, tab, modes, reruns):
+    """``{mode: [(ms, bytes), ...]}`` for ``reruns`` before/after pairs on ``tab``"""
+    app.radio(key="active_tab").set_value(tab)
+    app.run()
+    samples = {mode: [] for mode in modes}
+    for i in range(reruns):
+        for mode in (('before', 'after') if i % 2 else ('after', 'before')):
+            for name, value in modes[mode].items():
+                setattr(render, name, value)
+            if tab == TAB_LABELS[1]:
+                answer(app)
+            start = time.perf_counter()
+            app.run()
+            samples[mode].append(((time.perf_counter() - start) * 1000, sent_bytes(app)))
+            if app.exception:
+                sys.exit(f"the app raised: {app.exception[0].message}")
+    for name, value in modes['after'].items():
+        setattr(render, name, value)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reruns", type=int, default=RERUNS, help="before/after pairs per tab")
+    args = parser.parse_args()
+
+    from streamlit.testing.v1 import AppTest
+
+    tmp = tempfile.mkdtemp(prefix="render-")
+    os.environ['DETECTIVES_DB'] = os.path.join(tmp, "detectives.db")
+    os.environ['DETECTIVES_SESSION_DB'] = os.path.join(tmp, "sessions.db")
+    try:
+        modes = render_modes()
+        app = AppTest.from_file(APP, default_timeout=60)
+        sign_in(app)
+        print(f"{'tab':<24} {'before ms':>9} {'after ms':>9} {'paired diff':>11} {'before B':>9} {'after B':>8}")
+        for tab in TABS:
+            samples = rerun_tab(app, tab, modes, args.reruns)
+            before = statistics.median(ms for ms, _ in samples['before'])
+            after = statistics.median(ms for ms, _ in samples['after'])
+            difference = statistics.median(b[0] - a[0] for b, a in zip(samples['before'], samples['after']))
+            before_bytes = statistics.median(sent for _, sent in samples['before'])
+            after_bytes = statistics.median(sent for _, sent in samples['after'])
+            print(f"{tab:<24} {before:>9.2f} {after:>9.2f} {difference:>+10.2f}  {before_bytes:>9,.0f} {after_bytes:>8,.0f}")
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Replay a logged session and check it rebuilds the live state.
+
+Plays one seeded session through the real engine (problems from the
+session's PCG64 stream, ``check_answer``, hints) while logging every event,
+then times ``replay`` on the log against the 1M events/s target (held for
+logs of 50k events or more) and compares the rebuilt state with the live
+one. A prefix of the log is also regenerated from the seed with ``verify``,
+and a second run with the same seed is checked to log the same events. The simulated detective is
+promoted every five correct answers, so logs much past 400k events would
+outgrow the int16 level column; the default of 200k events is about 95k
+answers over 15k levels. Run from the repository root:
+
+    python -m benchmarks.bench_replay
+"""
+import argparse
+import math
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from datadetectives.adaptive import AdaptiveModel, next_exam_problem
+from datadetectives.engine import SessionRandom
+from datadetectives.eventlog import RECORD, read_log, replay, start_log, verify
+from datadetectives.session import check_answer, new_session_state
+
+TARGET = 1_000_000
+HINT_RATE = 0.3
+ACCURACY = 0.8
+VERIFY_EVENTS = 50_000
+# Shorter logs are dominated by replay's fixed cost, so their rate is reported but not held to the target
+TARGET_MIN_EVENTS = 50_000
+
+
+def play(seed, events):
+    """Run a session until about ``events`` events are logged; returns the live state"""
+    sim = random.Random(seed)
+    state = new_session_state("bench-detective")
+    state['rng'] = SessionRandom(seed)
+    log = start_log(state, log_dir=None)
+    problem = None
+    while len(log) < events:
+        if problem is None:
+            problem = next_exam_problem(state['current_level'], state['rng'].next_problem(), state['seen_expressions'])
+            state['current_problem'] = problem
+            state['show_hint'] = False
+            log.shown(problem)
+        if sim.random() < HINT_RATE:
+            state['show_hint'] = True
+            log.hint()
+        seconds = sim.uniform(2, 40)
+        guess = problem['answer'] if sim.random() < ACCURACY else -1
+        result = check_answer(state, problem, guess, seconds)
+        log.answer(state['problem_history'])
+        if result.correct:
+            problem = None
+            state['show_hint'] = False
+        else:
+            state['show_hint'] = True
+    return state
+
+
+def close(live, rebuilt):
+    """Equal, up to float rounding: the rebuilt model uses closed forms rather than step-by-step updates"""
+    if isinstance(live, dict):
+        return live.keys() == rebuilt.keys() and all(close(live[key], rebuilt[key]) for key in live)
+    if isinstance(live, (list, tuple)):
+        return len(live) == len(rebuilt) and all(map(close, live, rebuilt))
+    if isinstance(live, float) and isinstance(rebuilt, float):
+        return math.isclose(live, rebuilt, rel_tol=1e-9, abs_tol=1e-9)
+    return live == rebuilt
+
+
+def mismatches(live, rebuilt):
+    """Names of the pieces of state that differ"""
+    differ = [field for field in ('points', 'current_level', 'problems_solved', 'correct_streak', 'show_hint')
+              if live[field] != rebuilt[field]]
+    if live['problem_history'].rows() != rebuilt['problem_history'].rows():
+        differ.append('problem_history')
+    if not all(close(getattr(live['adaptive'], slot), getattr(rebuilt['adaptive'], slot))
+               for slot in AdaptiveModel.__slots__):
+        differ.append('adaptive')
+    if live['dashboard_stats'].level_stats() != rebuilt['dashboard_stats'].level_stats():
+        differ.append('dashboard_stats')
+    if set(live['achievements'].unlocked) != set(rebuilt['achievements'].unlocked):
+        differ.append('achievements')
+    if not rebuilt['seen_expressions'] <= live['seen_expressions']:
+        differ.append('seen_expressions')
+    # Multi-step problems log only their answer, so only single-step reviews are rebuilt
+    schedules = [{expression: (item.due_ms, item.repetitions, item.lapses) for expression, item in queue.items().items()
+                  if 'kind' not in item.problem} for queue in (live['review_queue'], rebuilt['review_queue'])]
+    if schedules[0] != schedules[1]:
+        differ.append('review_queue')
+    if live['rng'].problems != rebuilt['rng'].problems:
+        differ.append('rng')
+    current = live['current_problem']
+    if current is not None and 'kind' not in current and current != rebuilt['current_problem']:
+        differ.append('current_problem')
+    return differ
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=2024)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    live = play(args.seed, args.events)
+    log = live['event_log']
+    data = log.getvalue()
+    print(f"played {len(log):,} events ({len(live['problem_history']):,} answers) in "
+          f"{time.perf_counter() - start:.1f}s; log is {len(data) / 1e6:.1f} MB ({RECORD.size} bytes/event)")
+
+    replay(data[:4096])  # warm up
+    samples = []
+    for _ in range(3):
+        start = time.perf_counter()
+        rebuilt = replay(data)
+        samples.append(time.perf_counter() - start)
+    seconds = statistics.median(samples)
+    rate = len(log) / seconds
+    target = f"target {TARGET:,}" if len(log) >= TARGET_MIN_EVENTS else f"target applies from {TARGET_MIN_EVENTS:,} events"
+    print(f"replay: {seconds * 1000:.0f} ms, {rate:,.0f} events/s ({target})")
+
+    differ = mismatches(live, rebuilt)
+    print(f"rebuilt state matches live session: {'yes' if not differ else 'NO: ' + ', '.join(differ)}")
+
+    prefix = data[:log.header_size + VERIFY_EVENTS * RECORD.size]
+    start = time.perf_counter()
+    checked = verify(prefix)
+    print(f"verify: regenerated {checked:,} problems from the seed in {time.perf_counter() - start:.1f}s")
+
+    _, first = read_log(play(args.seed, 5_000)['event_log'].getvalue())
+    _, second = read_log(play(args.seed, 5_000)['event_log'].getvalue())
+    fields = [name for name in first.dtype.names if name != 'timestamp_ms']
+    same = all(np.array_equal(first[name], second[name]) for name in fields)
+    print(f"same seed, same events: {'yes' if same else 'NO'}")
+
+    if differ or not same:
+        sys.exit("replay does not reproduce the session")
+    if rate < TARGET and len(log) >= TARGET_MIN_EVENTS:
+        sys.exit("replay is below target")
+
+
+if __name__ == "__main__":
+    main()
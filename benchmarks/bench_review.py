@@ -0,0 +1,86 @@
+"""Latency of the review queue as it grows to 100k missed problems.
+
+At each queue size, times the three operations a mission makes: queueing a
+new miss (a push), serving the most overdue review, and answering it, which
+reschedules it (a pop and a push in one ``heapreplace``). Operations are
+timed in batches, and the median batch at the largest size must stay within
+``FLAT_FACTOR`` of the smallest size, where O(log n) heap operations should
+be nearly flat. Also times rebuilding the queue from a history of misses. Run from the repository root:
+
+    python -m benchmarks.bench_review
+"""
+import statistics
+import sys
+import time
+
+from datadetectives.engine import OPERATIONS, make_problem
+from datadetectives.history import ProblemHistory
+from datadetectives.review import DAY_MS, RELEARN_MS, ReviewQueue
+
+SIZES = [1_000, 10_000, 100_000]
+OPS = 20_000
+BATCH = 500
+FLAT_FACTOR = 2.0
+START_MS = 1_700_000_000_000
+
+
+def missed_problem(i):
+    """A distinct single-step problem per ``i``"""
+    return make_problem(OPERATIONS[i % 4], 1000 + i // 4, 7, 5)
+
+
+def batch_ns(fn, n):
+    """Median and worst per-operation ns over batches of ``BATCH`` calls to ``fn(i)``"""
+    samples = []
+    for start in range(0, n, BATCH):
+        begin = time.perf_counter_ns()
+        for i in range(start, start + BATCH):
+            fn(i)
+        samples.append((time.perf_counter_ns() - begin) / BATCH)
+    return statistics.median(samples), max(samples)
+
+
+def measure(size):
+    queue = ReviewQueue()
+    for i in range(size):
+        queue.record(missed_problem(i), False, 4000, START_MS + i)
+    # A day later every miss is overdue
+    now = START_MS + DAY_MS
+    problems = [missed_problem(size + i) for i in range(OPS)]
+
+    push = batch_ns(lambda i: queue.record(problems[i], False, 4000, now), OPS)
+    # Once the new misses are due too, there are enough overdue problems for every review
+    now += RELEARN_MS
+    pop = batch_ns(lambda i: queue.due(now), OPS)
+
+    def review(i):
+        # Serve the most overdue problem and answer it, moving it out of the heap's top
+        queue.record(queue.due(now), True, 3000, now)
+    reschedule = batch_ns(review, OPS)
+    return push, pop, reschedule
+
+
+def main():
+    results = {}
+    print(f"{'queued':>8} {'push ns':>12} {'serve ns':>12} {'review ns':>12}   (median / worst batch)")
+    for size in SIZES:
+        push, pop, reschedule = measure(size)
+        results[size] = (push, pop, reschedule)
+        print(f"{size:>8,} " + " ".join(f"{median:>5.0f} /{worst:>5.0f}" for median, worst in (push, pop, reschedule)))
+
+    history = ProblemHistory()
+    for i in range(SIZES[-1]):
+        history.append(missed_problem(i), False, 0, START_MS + i, 4000)
+    start = time.perf_counter()
+    rebuilt = ReviewQueue.from_history(history)
+    print(f"from_history: {len(rebuilt):,} misses in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    small, large = results[SIZES[0]], results[SIZES[-1]]
+    growth = max(big[0] / little[0] for little, big in zip(small, large))
+    print(f"worst median growth from {SIZES[0]:,} to {SIZES[-1]:,} queued: {growth:.2f}x (budget {FLAT_FACTOR}x)")
+    if growth > FLAT_FACTOR:
+        sys.exit("review queue latency grows with its size")
+
+
+if __name__ == "__main__":
+    main()
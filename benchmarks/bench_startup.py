@@ -0,0 +1,122 @@
+"""Import time and time to first render of a cold app process.
+
+Runs ``python -X importtime -c "import <module>"`` in a fresh interpreter
+for the engine, scoring, store and UI modules. It reports each module's
+cumulative import time and the packages that take longest to import, and fails if
+the engine side pulls in Streamlit, pandas or plotly. Then, in fresh
+processes, it starts the app with Streamlit's ``AppTest`` and times
+interpreter start to first render, the first ``run`` itself and a warm
+rerun. The first render (Detective HQ) must not import pandas or
+plotly.express. Use --json to write the numbers for tracking. Run from the
+repository root:
+
+    python -m benchmarks.bench_startup
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+MODULES = ['datadetectives', 'datadetectives.engine', 'datadetectives.session', 'datadetectives.store',
+           'datadetectives.ui']
+# Modules that must import without any of these
+HEADLESS = {'datadetectives', 'datadetectives.engine', 'datadetectives.session', 'datadetectives.store'}
+HEAVY = ('streamlit', 'pandas', 'plotly', 'pyarrow')
+LAZY = ('pandas', 'plotly.express')
+RUNS = 3
+TOP = 5
+
+FIRST_RENDER = """
+import json, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file("data.detectives.py", default_timeout=120)
+run_started = time.perf_counter()
+app.run()
+first = time.perf_counter()
+app.run()
+warm = time.perf_counter() - first
+print(json.dumps({'first_run_s': first - run_started, 'to_first_render_s': first - started, 'warm_rerun_s': warm,
+                  'errors': len(app.exception), 'lazy_loaded': [m for m in %r if m in sys.modules]}))
+""" % (LAZY,)
+
+
+def import_lines(code):
+    """``(name, self seconds, cumulative seconds, nested)`` for each import ``-X importtime`` reports"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=True)
+    for line in result.stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) != 3 or not fields[0].split()[-1].isdigit():
+            continue
+        own, cumulative, name = fields
+        yield name.strip(), int(own.split()[-1]) / 1e6, int(cumulative) / 1e6, name[1:2] == " "
+
+
+def import_times(module, startup):
+    """``(cumulative seconds, {root package: self seconds})``, leaving out what interpreter startup imports"""
+    total = 0.0
+    packages = {}
+    for name, own, cumulative, nested in import_lines(f"import {module}"):
+        if name == module and not nested:
+            total = cumulative
+        root = name.split(".")[0]
+        if root not in startup:
+            packages[root] = packages.get(root, 0.0) + own
+    return total, packages
+
+
+def first_render():
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", FIRST_RENDER], capture_output=True, text=True, check=True)
+    numbers = json.loads(result.stdout.strip().splitlines()[-1])
+    numbers['process_s'] = time.perf_counter() - started
+    return numbers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=RUNS, help="fresh processes per measurement; medians are reported")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    startup = {name.split(".")[0] for name, *_ in import_lines("pass")}
+    summary = {'imports_ms': {}, 'heavy': {}}
+    failures = []
+    print(f"{'module':<26} {'import ms':>9}   heaviest packages (ms)")
+    for module in MODULES:
+        runs = [import_times(module, startup) for _ in range(args.runs)]
+        total = statistics.median(total for total, _ in runs)
+        packages = runs[len(runs) // 2][1]
+        heavy = sorted(name for name in packages if name in HEAVY)
+        heaviest = sorted(((seconds, name) for name, seconds in packages.items()), reverse=True)[:TOP]
+        summary['imports_ms'][module] = total * 1000
+        summary['heavy'][module] = heavy
+        print(f"{module:<26} {total * 1000:>9.1f}   " + ", ".join(f"{name} {seconds * 1000:.0f}" for seconds, name in heaviest))
+        if module in HEADLESS and heavy:
+            failures.append(f"{module} imports {', '.join(heavy)}")
+
+    renders = [first_render() for _ in range(args.runs)]
+    for key in ('process_s', 'to_first_render_s', 'first_run_s', 'warm_rerun_s'):
+        summary[key] = statistics.median(render[key] for render in renders)
+    lazy_loaded = sorted({name for render in renders for name in render['lazy_loaded']})
+    summary['lazy_loaded_at_first_render'] = lazy_loaded
+    print(f"cold start: {summary['process_s']:.2f}s process to first render "
+          f"({summary['to_first_render_s']:.2f}s after interpreter start, first run {summary['first_run_s']:.2f}s); "
+          f"warm rerun {summary['warm_rerun_s'] * 1000:.0f} ms")
+    print(f"loaded by the first render: {', '.join(lazy_loaded) if lazy_loaded else 'none of ' + ', '.join(LAZY)}")
+    if lazy_loaded:
+        failures.append(f"first render imports {', '.join(lazy_loaded)}")
+    if any(render['errors'] for render in renders):
+        failures.append("the app raised during the first render")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+    if failures:
+        sys.exit("; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
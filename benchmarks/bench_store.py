@@ -0,0 +1,85 @@
+"""Load test for DetectiveStore: persist and restore many detectives.
+
+Defaults to 10k students x 1k attempts (10M rows). Use --students and
+--attempts for a quicker run. Run from the repository root:
+
+    python -m benchmarks.bench_store --students 1000 --attempts 100
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from datadetectives.engine import generate_problems
+from datadetectives.store import DetectiveStore
+
+
+class LastRow:
+    """Stands in for a ProblemHistory whose newest row is ``value``"""
+
+    __slots__ = ('value',)
+
+    def row(self, i):
+        return self.value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=10_000)
+    parser.add_argument("--attempts", type=int, default=1_000)
+    parser.add_argument("--batch-size", type=int, default=1_024)
+    parser.add_argument("--sample", type=int, default=200, help="students restored for timing")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="detectives-bench-")
+    path = os.path.join(workdir, "detectives.db")
+    store = DetectiveStore(path, batch_size=args.batch_size, flush_interval=0.5)
+
+    batch = generate_problems(3, args.attempts, seed=0)
+    rows = [(int(op), int(a), int(b), 3, 1, 30, 0, 4_000, 0) for op, a, b in zip(batch.operations, batch.a, batch.b)]
+    last = LastRow()
+    profile = {'points': 0, 'current_level': 3, 'problems_solved': 0, 'correct_streak': 0}
+
+    enqueue_ns = np.empty(args.students * args.attempts, dtype=np.int64)
+    k = 0
+    start = time.perf_counter()
+    for student in range(args.students):
+        name = f"detective-{student}"
+        for i, row in enumerate(rows):
+            last.value = row
+            profile['points'] = profile['problems_solved'] = i
+            t0 = time.perf_counter_ns()
+            store.record_attempt(name, profile, last)
+            enqueue_ns[k] = time.perf_counter_ns() - t0
+            k += 1
+    enqueued = time.perf_counter() - start
+    store.flush()
+    persisted = time.perf_counter() - start
+    store.close()
+
+    total = args.students * args.attempts
+    size_mb = os.path.getsize(path) / 1e6
+    print(f"persisted {total:,} attempts for {args.students:,} students in {persisted:.1f}s "
+          f"({total / persisted:,.0f} attempts/s, {size_mb:,.0f} MB)")
+    print(f"  enqueue: total {enqueued:.1f}s, p50 {np.percentile(enqueue_ns, 50) / 1e3:.1f}us, "
+          f"p99 {np.percentile(enqueue_ns, 99) / 1e3:.1f}us")
+
+    reader = DetectiveStore(path)
+    names = [f"detective-{i}" for i in random.sample(range(args.students), min(args.sample, args.students))]
+    start = time.perf_counter()
+    for name in names:
+        reader.load_profile(name)
+        history = reader.load_history(name)
+        assert len(history) == args.attempts
+    restored = (time.perf_counter() - start) / len(names)
+    reader.close()
+    print(f"restore: {restored * 1000:.2f} ms per student (profile + {args.attempts:,} attempts), "
+          f"~{restored * args.students:.1f}s for every student")
+    print(f"database left at {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Request throughput with 1..N worker processes sharing a SQLiteBackend.
+
+Students are spread across workers as a load balancer would, and a share of
+requests (--overlap) come from a second tab on another worker, so the same
+detective answers from two processes at once. A request is a rerun sync,
+an answer check and the commit. After each run the shared profiles are
+checked against the committed attempts to show no update was lost. Run from the repository root:
+
+    python -m benchmarks.bench_workers --workers 4 --requests 20000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from multiprocessing import Pool
+
+from datadetectives.backends import SQLiteBackend, commit_attempt, join_session, sync_session
+from datadetectives.engine import generate_problem
+from datadetectives.session import check_answer, new_session_state
+
+ACCURACY = 0.8
+
+
+def run_worker(args):
+    """Serve ``requests`` answers, mostly for this worker's own students; returns (seconds, conflicts)"""
+    path, worker, workers, students, requests, overlap = args
+    rng = random.Random(worker)
+    random.seed(worker)
+    backend = SQLiteBackend(path)
+    tabs = []
+    for i in range(students):
+        state = new_session_state()
+        join_session(state, backend, f"detective-{i}")
+        tabs.append(state)
+    own = tabs[worker::workers]
+
+    conflicts = 0
+    start = time.perf_counter()
+    for k in range(requests):
+        state = rng.choice(tabs) if rng.random() < overlap else own[k % len(own)]
+        conflicts += sync_session(state, backend)
+        problem = generate_problem(state['current_level'])
+        guess = problem['answer'] if rng.random() < ACCURACY else problem['answer'] + 1
+        version = state['session_version']
+        commit_attempt(state, backend, check_answer(state, problem, guess))
+        conflicts += state['session_version'] != version + 1
+    elapsed = time.perf_counter() - start
+    backend.close()
+    return elapsed, conflicts
+
+
+def check_consistency(path, students):
+    """Every profile must match the attempts committed for it"""
+    backend = SQLiteBackend(path)
+    for i in range(students):
+        name = f"detective-{i}"
+        profile, _ = backend.load(name)
+        history = backend.load_history(name)
+        assert profile['problems_solved'] == history.correct_count, name
+        assert profile['points'] == history.total_points, name
+    backend.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="largest worker count")
+    parser.add_argument("--requests", type=int, default=20_000, help="total requests per run")
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--overlap", type=float, default=0.05, help="share of requests from a second tab")
+    args = parser.parse_args()
+
+    print(f"{'workers':>7} {'requests/s':>11} {'speedup':>8} {'conflicts':>10}")
+    baseline = None
+    for workers in range(1, args.workers + 1):
+        path = os.path.join(tempfile.mkdtemp(prefix="detectives-workers-"), "sessions.db")
+        SQLiteBackend(path).close()
+        per_worker = args.requests // workers
+        with Pool(workers) as pool:
+            jobs = [(path, w, workers, args.students, per_worker, args.overlap) for w in range(workers)]
+            results = pool.map(run_worker, jobs)
+        check_consistency(path, args.students)
+
+        throughput = per_worker * workers / max(seconds for seconds, _ in results)
+        baseline = baseline or throughput
+        conflicts = sum(c for _, c in results)
+        print(f"{workers:>7} {throughput:>11,.0f} {throughput / baseline:>7.2f}x {conflicts:>10,}")
+    print("profiles match committed attempts after every run")
+    if (os.cpu_count() or 1) < args.workers:
+        print(f"note: only {os.cpu_count()} CPU(s) available, so runs beyond that cannot scale")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Time to render 1,000 printable case packets.
+
+Writes 250 students x 4 levels x 40 problems with ``make_packets`` through
+the process pool, then again in a single process, into temporary
+directories. Both runs must produce the same answer-key digest, so the
+output does not depend on scheduling. A sample of packets is checked: the
+checksum printed in the file must match the manifest. The pooled run must
+finish within ``BUDGET_SECONDS``. Run from the repository root:
+
+    python -m benchmarks.bench_worksheets --workers 4
+"""
+import argparse
+import csv
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+from datadetectives.worksheets import MANIFEST, make_packets
+
+STUDENTS = 250
+LEVELS = (2, 4, 6, 8)
+PROBLEMS = 40
+SAMPLE = 25
+BUDGET_SECONDS = 20
+
+
+def timed_run(workers, seed):
+    out_dir = tempfile.mkdtemp(prefix="packets-")
+    students = [f"Detective {i + 1}" for i in range(STUDENTS)]
+    start = time.perf_counter()
+    digest = make_packets(out_dir, students, LEVELS, PROBLEMS, seed, workers)
+    return out_dir, digest, time.perf_counter() - start
+
+
+def sample_mismatches(out_dir):
+    """``(checked, mismatched)``: sampled packets whose printed checksum differs from the manifest"""
+    with open(os.path.join(out_dir, MANIFEST), newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    sample = rows[::max(1, len(rows) // SAMPLE)]
+    bad = 0
+    for row in sample:
+        with open(os.path.join(out_dir, row['file']), encoding="utf-8") as f:
+            printed = re.search(r"SHA-256 ([0-9a-f]{64})", f.read()).group(1)
+        bad += printed != row['answer_key_sha256']
+    return len(sample), bad
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=max(os.cpu_count() or 1, 2))
+    parser.add_argument("--seed", type=int, default=2024)
+    args = parser.parse_args()
+    packets = STUDENTS * len(LEVELS)
+
+    pooled_dir, pooled_digest, pooled = timed_run(args.workers, args.seed)
+    size = sum(entry.stat().st_size for entry in os.scandir(pooled_dir))
+    print(f"{packets:,} packets ({packets * PROBLEMS:,} problems, {size / 1e6:.1f} MB) with {args.workers} workers: "
+          f"{pooled:.1f}s ({packets / pooled:,.0f} packets/s)")
+    inline_dir, inline_digest, inline = timed_run(1, args.seed)
+    print(f"single process: {inline:.1f}s ({packets / inline:,.0f} packets/s)")
+
+    same = pooled_digest == inline_digest
+    print(f"same answer keys with and without the pool: {'yes' if same else 'NO'} ({pooled_digest[:12]})")
+    checked, bad = sample_mismatches(pooled_dir)
+    print(f"printed checksums matching the manifest: {checked - bad}/{checked} sampled")
+    for out_dir in (pooled_dir, inline_dir):
+        shutil.rmtree(out_dir)
+    if not same or bad:
+        sys.exit("packets are not reproducible")
+    if pooled > BUDGET_SECONDS:
+        sys.exit(f"rendering {packets:,} packets took over {BUDGET_SECONDS}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Offline simulation of synthetic students under fixed and adaptive difficulty.
+
+Each synthetic student has a skill per operation and answers correctly with
+probability sigmoid(skill - problem difficulty), where difficulty grows with
+operand size. Both policies level up every 5 correct answers, as the app
+does. Reports how quickly each student's rolling accuracy settles near the
+80% target, plus the cost of a model update.
+
+Run from the repository root:
+
+    python -m benchmarks.sim_adaptive
+"""
+import math
+import random
+import statistics
+import time
+
+from datadetectives.adaptive import TARGET_ACCURACY, AdaptiveModel
+from datadetectives.engine import OPERATIONS, generate_problem
+
+STUDENTS = 300
+ATTEMPTS = 400
+WINDOW = 50
+BAND = 0.1
+OPERATION_COST = {"+": 0.0, "-": 0.5, "×": 1.5, "÷": 2.0}
+
+
+def difficulty(problem):
+    """Log size of the largest number the student works with, plus an operation cost.
+
+    Division is a recalled multiplication fact, so its size is the divisor or
+    quotient rather than the dividend.
+    """
+    a, _, b = problem['expression'].split(" ")
+    if problem['operation'] == "÷":
+        largest = max(int(b), problem['answer'])
+    else:
+        largest = max(int(a), int(b), problem['answer'])
+    return math.log2(largest + 1) + OPERATION_COST[problem['operation']]
+
+
+def make_student(rng):
+    base = rng.uniform(4.5, 7.5)
+    skills = {op: base + rng.uniform(-0.5, 1.5) for op in OPERATIONS}
+    skills[rng.choice(OPERATIONS)] -= rng.uniform(0.5, 1.5)  # one weak operation
+    return skills
+
+
+def run(student, policy, rng):
+    model = AdaptiveModel()
+    level, solved = 1, 0
+    results = []
+    for _ in range(ATTEMPTS):
+        if policy == "adaptive":
+            operation, scale = model.choose(level, rng)
+            problem = generate_problem(level, operation, scale)
+        else:
+            problem = generate_problem(level)
+        p_correct = 1 / (1 + math.exp(-1.5 * (student[problem['operation']] - difficulty(problem))))
+        correct = rng.random() < p_correct
+        model.update(problem['operation'], level, correct)
+        results.append(correct)
+        if correct:
+            solved += 1
+            if solved % 5 == 0:
+                level += 1
+    return results
+
+
+def converged_at(results):
+    """First attempt after which rolling accuracy stays within the target band for a full window"""
+    rolling = [sum(results[i - WINDOW:i]) / WINDOW for i in range(WINDOW, len(results) + 1)]
+    inside = [abs(acc - TARGET_ACCURACY) <= BAND + 1e-9 for acc in rolling]
+    run_length = 0
+    for i, ok in enumerate(inside):
+        run_length = run_length + 1 if ok else 0
+        if run_length == WINDOW:
+            return i - run_length + 1 + WINDOW
+    return None
+
+
+def main():
+    rng = random.Random(0)
+    students = [make_student(rng) for _ in range(STUDENTS)]
+    print(f"{'policy':>9} {'converged':>10} {'median attempts':>16} {'late accuracy':>14} {'|err| late':>11}")
+    for policy in ("fixed", "adaptive"):
+        converged, late_acc = [], []
+        for student in students:
+            results = run(student, policy, random.Random(rng.random()))
+            at = converged_at(results)
+            if at is not None:
+                converged.append(at)
+            late_acc.append(sum(results[-100:]) / 100)
+        median = statistics.median(converged) if converged else float('nan')
+        error = statistics.mean(abs(acc - TARGET_ACCURACY) for acc in late_acc)
+        print(f"{policy:>9} {len(converged) / STUDENTS:>10.0%} {median:>16.0f} "
+              f"{statistics.mean(late_acc):>14.1%} {error:>11.3f}")
+
+    model = AdaptiveModel()
+    start = time.perf_counter()
+    for i in range(200_000):
+        model.update(OPERATIONS[i % 4], 1 + i % 12, i % 3 != 0, 12.0)
+    update_us = (time.perf_counter() - start) / 200_000 * 1e6
+    print(f"model update: {update_us:.2f} us per attempt, independent of history length")
+
+
+if __name__ == "__main__":
+    main()
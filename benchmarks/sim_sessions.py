@@ -0,0 +1,102 @@
+"""Headless load test of the answer-checking flow.
+
+Runs many virtual students through next-problem + check_answer in a process
+pool and reports throughput, per-attempt latency percentiles and memory
+growth. Use --json to write the numbers for CI and --max-p99-us to fail the
+run when latency regresses.
+
+Run from the repository root:
+
+    python -m benchmarks.sim_sessions --attempts 1000000 --workers 4
+"""
+import argparse
+import json
+import random
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from datadetectives.engine import generate_problem
+from datadetectives.session import check_answer, new_session_state
+
+ACCURACY = 0.8
+
+
+def rss_mb():
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+def run_worker(seed, students, attempts_per_student):
+    """Simulate ``students`` sessions in this process; returns latencies and memory use"""
+    rng = random.Random(seed)
+    random.seed(seed)
+    start_rss = rss_mb()
+    sessions = [new_session_state(f"sim-{seed}-{i}") for i in range(students)]
+    latencies = np.empty(students * attempts_per_student, dtype=np.int64)
+    k = 0
+    clock = time.perf_counter_ns
+    for _ in range(attempts_per_student):
+        for state in sessions:
+            t0 = clock()
+            operation, scale = state['adaptive'].choose(state['current_level'], rng)
+            problem = generate_problem(state['current_level'], operation, scale)
+            guess = problem['answer'] if rng.random() < ACCURACY else problem['answer'] + 1
+            check_answer(state, problem, guess, rng.uniform(2, 40))
+            latencies[k] = clock() - t0
+            k += 1
+    return latencies, start_rss, rss_mb()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--attempts", type=int, default=1_000_000, help="total attempts across all workers")
+    parser.add_argument("--students", type=int, default=1_000, help="virtual students across all workers")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--max-p99-us", type=float, help="exit non-zero if p99 latency exceeds this")
+    args = parser.parse_args()
+
+    per_worker_students = max(args.students // args.workers, 1)
+    per_student_attempts = max(args.attempts // (per_worker_students * args.workers), 1)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(run_worker, args.seed + w, per_worker_students, per_student_attempts)
+                   for w in range(args.workers)]
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+
+    latencies = np.concatenate([r[0] for r in results])
+    growth = [end - begin for _, begin, end in results]
+    summary = {
+        'attempts': int(latencies.size),
+        'students': per_worker_students * args.workers,
+        'workers': args.workers,
+        'seconds': elapsed,
+        'attempts_per_second': latencies.size / elapsed,
+        'p50_us': float(np.percentile(latencies, 50) / 1e3),
+        'p99_us': float(np.percentile(latencies, 99) / 1e3),
+        'max_rss_growth_mb': max(growth),
+        'rss_growth_bytes_per_attempt': max(growth) * 1e6 / (latencies.size / args.workers),
+    }
+    print(f"{summary['attempts']:,} attempts, {summary['students']:,} students, {args.workers} workers "
+          f"in {elapsed:.1f}s: {summary['attempts_per_second']:,.0f} attempts/s")
+    print(f"latency p50 {summary['p50_us']:.1f} us, p99 {summary['p99_us']:.1f} us; "
+          f"RSS growth {summary['max_rss_growth_mb']:.1f} MB per worker "
+          f"({summary['rss_growth_bytes_per_attempt']:.1f} B/attempt)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+    if args.max_p99_us is not None and summary['p99_us'] > args.max_p99_us:
+        sys.exit(f"p99 latency {summary['p99_us']:.1f} us exceeds {args.max_p99_us} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Core logic for the MathCraft Detective Academy Streamlit app.
+
+Submodules are imported on first use of a name exported here, so importing
+``datadetectives.engine`` or ``datadetectives.session`` does not load the
+store, exports or UI as well.
+"""
+import importlib
+
+_EXPORTS = {
+    'achievements': ('ACHIEVEMENTS', 'Achievement', 'AchievementTracker'),
+    'adaptive': ('AdaptiveModel', 'next_adaptive_problem', 'next_exam_problem'),
+    'aggregates': ('DashboardAggregates',),
+    'backends': ('LocalBackend', 'SessionBackend', 'SQLiteBackend', 'StaleSessionError', 'make_backend'),
+    'classroom': ('ClassAnalytics',),
+    'engine': ('ProblemBatch', 'SessionRandom', 'generate_problem', 'generate_problems'),
+    'eventlog': ('EventLog', 'ReplayError', 'read_log', 'replay', 'verify'),
+    'export': ('AttemptArchive', 'export_attempts', 'open_attempts'),
+    'expressions': ('ExpressionBatch', 'answers_match', 'generate_expression_problem', 'generate_expression_problems',
+                    'parse_answer'),
+    'history': ('ProblemHistory',),
+    'leaderboard': ('Leaderboard', 'MonthlyLeaderboard'),
+    'metrics': ('REGISTRY', 'Histogram', 'Registry'),
+    'pool': ('ProblemPool',),
+    'review': ('ReviewItem', 'ReviewQueue'),
+    'routing': ('TAB_LABELS', 'TabTimings'),
+    'session': ('AttemptResult', 'check_answer', 'init_session_state', 'new_session_state', 'restore_profile'),
+    'store': ('DetectiveStore',),
+    'worksheets': ('answer_key_checksum', 'make_packets'),
+}
+_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = ['ACHIEVEMENTS', 'Achievement', 'AchievementTracker', 'AdaptiveModel', 'AttemptArchive', 'AttemptResult', 'ClassAnalytics', 'DashboardAggregates', 'DetectiveStore', 'EventLog', 'ExpressionBatch', 'Histogram', 'Leaderboard', 'LocalBackend', 'MonthlyLeaderboard', 'ProblemBatch', 'ProblemHistory', 'ProblemPool', 'REGISTRY', 'Registry', 'ReplayError', 'ReviewItem', 'ReviewQueue', 'SQLiteBackend', 'SessionBackend', 'SessionRandom', 'StaleSessionError', 'TAB_LABELS', 'TabTimings', 'answer_key_checksum', 'answers_match', 'check_answer', 'export_attempts', 'generate_expression_problem', 'generate_expression_problems', 'generate_problem', 'generate_problems', 'init_session_state', 'make_backend', 'make_packets', 'new_session_state', 'next_adaptive_problem', 'next_exam_problem', 'open_attempts', 'parse_answer', 'read_log', 'replay', 'restore_profile', 'verify']
+
+
+def __getattr__(name):
+    module = _MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
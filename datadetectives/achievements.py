@@ -0,0 +1,118 @@
+"""Declarative achievement registry and incremental unlock tracking.
+
+Every badge is a metric plus a threshold. ``AchievementTracker`` keeps the
+thresholds for each metric sorted, so a metric change is one bisect and only
+rules on metrics that actually changed are looked at. The same index
+produces the "next goals" list.
+"""
+from bisect import bisect_right
+from collections import namedtuple
+
+from .history import now_ms
+
+Achievement = namedtuple('Achievement', 'key emoji name description metric threshold goal')
+Achievement.__doc__ = """A badge earned once ``metric`` reaches ``threshold``.
+
+``goal`` is the "Next Detective Goals" text, formatted with ``remaining``,
+or ``None`` if the badge is not listed as a goal.
+"""
+
+ACHIEVEMENTS = [
+    Achievement('first_case', "🥉", "First Case Solved", "Completed your first mathematical mystery",
+                'problems_solved', 1, None),
+    Achievement('junior_detective', "🥈", "Junior Detective", "Reached Level 2 - You're getting good at this!",
+                'problems_solved', 5, "🥈 Solve {remaining} more cases to become a Junior Detective"),
+    Achievement('senior_detective', "🥇", "Senior Detective", "Solved 10 cases - You're a real pro!",
+                'problems_solved', 10, "🥇 Solve {remaining} more cases to become a Senior Detective"),
+    Achievement('master_detective', "🏆", "Master Detective", "Solved 25 cases - Elite status!",
+                'problems_solved', 25, "🏆 Solve {remaining} more cases to become a Master Detective"),
+    Achievement('high_level_agent', "⭐", "High Level Agent", "Reached Level 5 - Advanced detective!",
+                'current_level', 5, "⭐ Reach Level 5 ({remaining} levels to go)"),
+    Achievement('hot_streak', "🔥", "Hot Streak", "3+ correct answers in a row!",
+                'correct_streak', 3, None),
+    Achievement('super_streak', "🌟", "Super Streak", "5+ correct answers in a row!",
+                'correct_streak', 5, None),
+    Achievement('point_collector', "💎", "Point Collector", "Earned 100+ points",
+                'points', 100, "💎 Earn {remaining} more points to become a Point Collector"),
+    Achievement('point_master', "💰", "Point Master", "Earned 500+ points",
+                'points', 500, None),
+    Achievement('academy_legend', "👑", "Academy Legend", "Reached Level 10 - Legendary!",
+                'current_level', 10, None),
+]
+
+METRICS = ('problems_solved', 'current_level', 'correct_streak', 'points')
+
+
+class AchievementTracker:
+    """Unlocks badges as metrics change and remembers when each was earned."""
+
+    def __init__(self, rules=ACHIEVEMENTS):
+        self.rules = list(rules)
+        self._order = {rule.key: i for i, rule in enumerate(self.rules)}
+        by_metric = {}
+        for rule in self.rules:
+            by_metric.setdefault(rule.metric, []).append(rule)
+        self._rules = {metric: sorted(group, key=lambda rule: rule.threshold) for metric, group in by_metric.items()}
+        self._thresholds = {metric: [rule.threshold for rule in group] for metric, group in self._rules.items()}
+        self._next = dict.fromkeys(self._rules, 0)
+        self._values = {}
+        self.unlocked = {}
+
+    def update(self, metric, value, timestamp_ms=None):
+        """Record a new value for ``metric`` and return any badges it unlocked"""
+        if self._values.get(metric) == value:
+            return []
+        self._values[metric] = value
+        thresholds = self._thresholds.get(metric)
+        if thresholds is None:
+            return []
+        start = self._next[metric]
+        reached = bisect_right(thresholds, value)
+        if reached <= start:
+            return []
+        when = now_ms() if timestamp_ms is None else timestamp_ms
+        newly = self._rules[metric][start:reached]
+        for rule in newly:
+            self.unlocked[rule.key] = when
+        self._next[metric] = reached
+        return newly
+
+    def restore(self, unlocked):
+        """Mark saved badges, ``key -> unlocked_ms``, as earned so they are not unlocked again"""
+        for key, when in unlocked.items():
+            if key not in self._order:
+                continue
+            self.unlocked[key] = min(when, self.unlocked.get(key, when))
+            rule = self.rules[self._order[key]]
+            reached = self._rules[rule.metric].index(rule) + 1
+            self._next[rule.metric] = max(self._next[rule.metric], reached)
+
+    def update_many(self, metrics, timestamp_ms=None):
+        """Record several metrics at once; ``metrics`` may be any mapping, e.g. session state"""
+        newly = []
+        for metric in METRICS:
+            if metric in metrics:
+                newly.extend(self.update(metric, metrics[metric], timestamp_ms))
+        return newly
+
+    def earned(self):
+        """Return ``(achievement, unlocked_ms)`` pairs in registry order"""
+        pairs = [(self.rules[self._order[key]], when) for key, when in self.unlocked.items()]
+        pairs.sort(key=lambda pair: self._order[pair[0].key])
+        return pairs
+
+    def next_goals(self, limit=4):
+        """Return up to ``limit`` goal strings for badges not yet earned, in registry order"""
+        candidates = []
+        for metric, group in self._rules.items():
+            value = self._values.get(metric, 0)
+            found = 0
+            for rule in group[self._next[metric]:]:
+                if rule.goal is None:
+                    continue
+                candidates.append((self._order[rule.key], rule.goal.format(remaining=rule.threshold - value)))
+                found += 1
+                if found == limit:
+                    break
+        candidates.sort()
+        return [goal for _, goal in candidates[:limit]]
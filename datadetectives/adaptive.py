@@ -0,0 +1,262 @@
+"""Adaptive difficulty driven by exponentially decayed accuracy.
+
+``AdaptiveModel`` keeps a decayed accuracy and response-time estimate per
+operation, both overall and per level, and updates them in O(1) per
+attempt. Operations a student is weaker at are chosen more often. Each
+operation's operand range is scaled by a staircase: a quick correct answer
+stretches it by ``STEP_UP`` and a miss shrinks it by ``STEP_DOWN``, with the
+steps sized so the range settles where accuracy is ``TARGET_ACCURACY``.
+"""
+import math
+import random
+
+import numpy as np
+
+from .engine import OPERATION_CODES, OPERATIONS
+from .expressions import MULTISTEP_MIN_LEVEL, MULTISTEP_SHARE, fresh_expression_problem
+from .pool import fresh_problem
+
+TARGET_ACCURACY = 0.8
+DECAY = 0.2  # weight of the newest attempt in each estimate
+TARGET_SECONDS = 20.0  # answers slower than this count against mastery
+
+MIN_EVIDENCE = 3  # attempts at a level before its own estimate is trusted
+WEAKNESS_BIAS = 2.0  # an operation at 0% accuracy is picked (1 + 0.8 * 2) times as often
+
+STEP_UP = 1.12
+STEP_DOWN = STEP_UP ** (-TARGET_ACCURACY / (1 - TARGET_ACCURACY))
+MIN_SCALE = 0.05
+MAX_SCALE = 2.0
+
+
+class AdaptiveModel:
+    """Per-student decayed accuracy and response-time estimates."""
+
+    __slots__ = ('decay', '_accuracy', '_seconds', '_scale', '_level_accuracy', '_level_count')
+
+    def __init__(self, decay=DECAY):
+        self.decay = decay
+        self._accuracy = [TARGET_ACCURACY] * len(OPERATIONS)
+        self._seconds = [None] * len(OPERATIONS)
+        self._scale = [1.0] * len(OPERATIONS)
+        self._level_accuracy = {}
+        self._level_count = {}
+
+    @classmethod
+    def from_history(cls, history, decay=DECAY):
+        """Rebuild the model from a ``ProblemHistory``, e.g. after restoring a saved profile"""
+        cols = history.arrays()
+        return cls.from_arrays(cols['operation'], cols['level'], cols['correct'], cols['solve_ms'], decay)
+
+    @classmethod
+    def from_arrays(cls, operation, level, correct, solve_ms, decay=DECAY):
+        """Build the model that ``update`` reaches over these attempts, with array arithmetic.
+
+        Decayed estimates use their closed form, per-level estimates start
+        from the overall estimate at each level's first attempt, and each
+        staircase is a composition of clamped steps. The result matches
+        replaying the attempts one by one to within float rounding.
+        """
+        model = cls(decay)
+        operation = np.asarray(operation, dtype=np.int64)
+        level = np.asarray(level, dtype=np.int64)
+        outcome = np.asarray(correct, dtype=np.float64)
+        solve_ms = np.asarray(solve_ms, dtype=np.int64)
+        if not len(operation):
+            return model
+
+        levels, first, inverse = np.unique(level, return_index=True, return_inverse=True)
+        starts = np.full((len(levels), len(OPERATIONS)), TARGET_ACCURACY)
+        quick = (solve_ms < 0) | (solve_ms <= TARGET_SECONDS * 1000)
+        log_steps = np.where(outcome == 0, math.log(STEP_DOWN), np.where(quick, math.log(STEP_UP), 0.0))
+        for op in range(len(OPERATIONS)):
+            rows = np.flatnonzero(operation == op)
+            if not len(rows):
+                continue
+            path = _decayed_path(outcome[rows], TARGET_ACCURACY, decay)
+            model._accuracy[op] = float(path[-1])
+            # Each level's estimates start from the overall ones just after its first attempt
+            seen = np.searchsorted(rows, first, side='right')
+            starts[:, op] = np.where(seen > 0, path[np.maximum(seen - 1, 0)], TARGET_ACCURACY)
+
+            timed = solve_ms[rows][solve_ms[rows] >= 0] / 1000
+            if len(timed):
+                model._seconds[op] = float(_decayed_path(timed[1:], timed[0], decay)[-1]) if len(timed) > 1 else float(timed[0])
+            model._scale[op] = _clamped_walk(log_steps[rows], MIN_SCALE, MAX_SCALE)
+
+        # Per (level, operation): decay the starting estimate by every attempt in the group
+        group = inverse * len(OPERATIONS) + operation
+        size = len(levels) * len(OPERATIONS)
+        counts = np.bincount(group, minlength=size)
+        order = np.argsort(group, kind='stable')
+        offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        rank = np.arange(len(group)) - offsets[group[order]]
+        keep = 1 - decay
+        weights = decay * keep ** (counts[group[order]] - 1 - rank)
+        estimates = keep ** counts * starts.ravel() + np.bincount(group[order], weights * outcome[order], minlength=size)
+        levels = levels.tolist()
+        model._level_accuracy = dict(zip(levels, estimates.reshape(starts.shape).tolist()))
+        model._level_count = dict(zip(levels, counts.reshape(starts.shape).tolist()))
+        return model
+
+    def replay(self, operations, levels, corrects, solve_ms):
+        """Fold columns of attempts in order; the same arithmetic as ``update`` with every lookup hoisted"""
+        decay = self.decay
+        accuracy, seconds, scale = self._accuracy, self._seconds, self._scale
+        level_accuracy, level_count = self._level_accuracy, self._level_count
+        step_up, step_down, min_scale, max_scale = STEP_UP, STEP_DOWN, MIN_SCALE, MAX_SCALE
+        target_ms = TARGET_SECONDS * 1000
+        n_ops = len(OPERATIONS)
+        for op, level, correct, ms in zip(operations, levels, corrects, solve_ms):
+            outcome = 1.0 if correct else 0.0
+            accuracy[op] += decay * (outcome - accuracy[op])
+            if ms >= 0:
+                previous = seconds[op]
+                seconds[op] = ms / 1000 if previous is None else previous + decay * (ms / 1000 - previous)
+
+            if not correct:
+                stepped = scale[op] * step_down
+                scale[op] = stepped if stepped > min_scale else min_scale
+            elif ms < 0 or ms <= target_ms:
+                stepped = scale[op] * step_up
+                scale[op] = stepped if stepped < max_scale else max_scale
+
+            estimates = level_accuracy.get(level)
+            if estimates is None:
+                estimates = level_accuracy[level] = list(accuracy)
+                level_count[level] = [0] * n_ops
+            estimates[op] += decay * (outcome - estimates[op])
+            level_count[level][op] += 1
+
+    def update(self, operation, level, correct, seconds=None):
+        """Fold one attempt into the estimates"""
+        op = OPERATION_CODES[operation]
+        decay = self.decay
+        outcome = 1.0 if correct else 0.0
+        self._accuracy[op] += decay * (outcome - self._accuracy[op])
+        if seconds is not None:
+            previous = self._seconds[op]
+            self._seconds[op] = seconds if previous is None else previous + decay * (seconds - previous)
+
+        if not correct:
+            self._scale[op] = max(self._scale[op] * STEP_DOWN, MIN_SCALE)
+        elif seconds is None or seconds <= TARGET_SECONDS:
+            self._scale[op] = min(self._scale[op] * STEP_UP, MAX_SCALE)
+
+        estimates = self._level_accuracy.get(level)
+        if estimates is None:
+            estimates = self._level_accuracy[level] = list(self._accuracy)
+            self._level_count[level] = [0] * len(OPERATIONS)
+        estimates[op] += decay * (outcome - estimates[op])
+        self._level_count[level][op] += 1
+
+    def accuracy(self, operation, level=None):
+        op = OPERATION_CODES[operation]
+        counts = self._level_count.get(level)
+        if counts is not None and counts[op] >= MIN_EVIDENCE:
+            return self._level_accuracy[level][op]
+        return self._accuracy[op]
+
+    def seconds(self, operation):
+        return self._seconds[OPERATION_CODES[operation]]
+
+    def mastery(self, operation, level=None):
+        """Accuracy, discounted when answers are slower than ``TARGET_SECONDS``"""
+        mastery = self.accuracy(operation, level)
+        seconds = self.seconds(operation)
+        if seconds is not None and seconds > TARGET_SECONDS:
+            mastery -= 0.1 * min(seconds / TARGET_SECONDS - 1, 1)
+        return mastery
+
+    def operation_weights(self, level):
+        """Selection weight per operation; operations below target accuracy weigh more"""
+        return [1 + WEAKNESS_BIAS * max(0.0, TARGET_ACCURACY - self.mastery(op, level)) for op in OPERATIONS]
+
+    def range_scale(self, operation):
+        """Current operand range multiplier for ``operation``"""
+        return self._scale[OPERATION_CODES[operation]]
+
+    def choose(self, level, rng=random):
+        """Return ``(operation, scale)`` for the next problem"""
+        operation = rng.choices(OPERATIONS, weights=self.operation_weights(level))[0]
+        return operation, self.range_scale(operation)
+
+
+def _decayed_path(values, initial, decay):
+    """Every value ``x += decay * (v - x)`` takes over ``values``, starting from ``initial``.
+
+    Uses ``x_j = keep**j * (x_0 + decay * sum(v_i / keep**i))`` in chunks
+    short enough that ``keep ** -j`` stays finite.
+    """
+    keep = 1 - decay
+    chunk = max(1, int(200 / -math.log10(keep)))
+    powers = keep ** np.arange(1, min(chunk, len(values)) + 1)
+    path = np.empty(len(values))
+    for start in range(0, len(values), chunk):
+        part = values[start:start + chunk]
+        scale = powers[:len(part)]
+        path[start:start + len(part)] = scale * (initial + decay * np.cumsum(part / scale))
+        initial = path[start + len(part) - 1]
+    return path
+
+
+def _clamped_walk(log_steps, low, high):
+    """Final value of ``x = min(max(x * step, low), high)`` from 1, given ``log(step)`` per attempt.
+
+    Each step is ``clamp(y + s, lo, hi)`` in log space, and composing two
+    such functions gives another, so the steps are folded pairwise.
+    """
+    # Padded to a power of two with identity steps, so every pass pairs evenly
+    size = 1 << max(len(log_steps) - 1, 0).bit_length()
+    shift = np.zeros(size)
+    shift[:len(log_steps)] = log_steps
+    lo = np.full(size, -np.inf)
+    hi = np.full(size, np.inf)
+    lo[:len(log_steps)] = math.log(low)
+    hi[:len(log_steps)] = math.log(high)
+    while len(shift) > 1:
+        lo, hi = (np.minimum(np.maximum(lo[0::2] + shift[1::2], lo[1::2]), hi[1::2]),
+                  np.minimum(np.maximum(hi[0::2] + shift[1::2], lo[1::2]), hi[1::2]))
+        shift = shift[0::2] + shift[1::2]
+    y = min(max(float(shift[0]), float(lo[0])), float(hi[0]))
+    if y <= math.log(low):
+        return low
+    if y >= math.log(high):
+        return high
+    return math.exp(y)
+
+
+def pool_scale(scale):
+    """The staircase step nearest ``scale``, so students share a few pooled ranges.
+
+    The staircase moves by whole powers of ``STEP_UP`` from 1, so only
+    scales clamped at ``MIN_SCALE`` or ``MAX_SCALE`` actually move.
+    """
+    return STEP_UP ** round(math.log(scale) / math.log(STEP_UP))
+
+
+def next_adaptive_problem(model, pool, level, seen=None, rng=random):
+    """Pick the next problem for a student from the pool, at the nearest pooled range scale.
+
+    From ``MULTISTEP_MIN_LEVEL`` some problems are multi-step, ending with
+    the chosen operation.
+    """
+    operation, scale = model.choose(level, rng)
+    if level >= MULTISTEP_MIN_LEVEL and rng.random() < MULTISTEP_SHARE:
+        if pool is not None:
+            return pool.pop_multistep(level, seen, operation)
+        return fresh_expression_problem(level, seen, operation, rng)
+    if pool is not None:
+        return pool.pop(level, seen, operation, pool_scale(scale))
+    return fresh_problem(level, seen, operation, scale, rng)
+
+
+def next_exam_problem(level, rng, seen=None):
+    """Pick the next problem from the session's stream alone, ignoring the student's record.
+
+    Two sessions with the same seed get the same problem at the same
+    position and level, and a logged session can be regenerated exactly.
+    """
+    if level >= MULTISTEP_MIN_LEVEL and rng.random() < MULTISTEP_SHARE:
+        return fresh_expression_problem(level, seen, None, rng)
+    return fresh_problem(level, seen, None, 1.0, rng)
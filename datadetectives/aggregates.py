@@ -0,0 +1,103 @@
+"""Incremental aggregates behind the Progress Dashboard.
+
+``DashboardAggregates`` is updated once per checked answer, so the dashboard
+never rebuilds a DataFrame or runs a groupby over the whole history.
+"""
+import numpy as np
+
+RECENT_WINDOW = 10
+
+
+class DashboardAggregates:
+    """Running per-level totals plus a ring buffer of the most recent attempts."""
+
+    __slots__ = ('window', 'total', 'correct', 'cumulative_points', 'version',
+                 '_levels', '_ring_correct', '_ring_points', '_ring_level', '_head', '_filled')
+
+    def __init__(self, window=RECENT_WINDOW):
+        self.window = window
+        self.total = 0
+        self.correct = 0
+        self.cumulative_points = 0
+        self.version = 0
+        self._levels = {}
+        self._ring_correct = np.zeros(window, dtype=np.bool_)
+        self._ring_points = np.zeros(window, dtype=np.int32)
+        self._ring_level = np.zeros(window, dtype=np.int16)
+        self._head = 0
+        self._filled = 0
+
+    @classmethod
+    def from_history(cls, history, window=RECENT_WINDOW):
+        """Rebuild aggregates from a ``ProblemHistory``"""
+        aggregates = cls(window)
+        cols = history.arrays()
+        n = len(history)
+        if not n:
+            return aggregates
+        correct = cols['correct']
+        points = cols['points'].astype(np.int64)
+        aggregates.total = n
+        aggregates.correct = int(correct.sum())
+        aggregates.cumulative_points = int(points.sum())
+        levels, inverse = np.unique(cols['level'], return_inverse=True)
+        per_level = zip(levels.tolist(), np.bincount(inverse).tolist(),
+                        np.bincount(inverse, correct).astype(np.int64).tolist(),
+                        np.bincount(inverse, points).astype(np.int64).tolist())
+        aggregates._levels = {level: [total, solved, earned] for level, total, solved, earned in per_level}
+
+        # The ring holds the last ``window`` attempts at the slots ``record`` would have used
+        last = np.arange(max(n - window, 0), n)
+        aggregates._ring_correct[last % window] = correct[last]
+        aggregates._ring_points[last % window] = points[last]
+        aggregates._ring_level[last % window] = cols['level'][last]
+        aggregates._head = n % window
+        aggregates._filled = len(last)
+        aggregates.version = n
+        return aggregates
+
+    def record(self, level, correct, points):
+        """Fold one checked answer into the aggregates"""
+        self.total += 1
+        self.cumulative_points += points
+        stats = self._levels.get(level)
+        if stats is None:
+            stats = self._levels[level] = [0, 0, 0]
+        stats[0] += 1
+        stats[2] += points
+        if correct:
+            self.correct += 1
+            stats[1] += 1
+
+        i = self._head
+        self._ring_correct[i] = correct
+        self._ring_points[i] = points
+        self._ring_level[i] = level
+        self._head = (i + 1) % self.window
+        self._filled = min(self._filled + 1, self.window)
+        self.version += 1
+
+    @property
+    def accuracy(self):
+        return (self.correct / self.total * 100) if self.total else 0.0
+
+    def success_rate(self, level):
+        stats = self._levels.get(level)
+        return stats[1] / stats[0] if stats else 0.0
+
+    def recent(self):
+        """Return the last ``window`` attempts, oldest first, as NumPy arrays"""
+        if self._filled < self.window:
+            order = np.arange(self._filled)
+        else:
+            order = (np.arange(self.window) + self._head) % self.window
+        return {
+            'correct': self._ring_correct[order],
+            'points': self._ring_points[order],
+            'level': self._ring_level[order],
+        }
+
+    def level_stats(self):
+        """Return ``(level, total, solved, success_rate)`` tuples sorted by level"""
+        return [(level, total, solved, round(solved / total, 2))
+                for level, (total, solved, _) in sorted(self._levels.items())]
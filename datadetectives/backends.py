@@ -0,0 +1,325 @@
+"""Pluggable session-state backends for running several app workers.
+
+A backend holds each detective's profile counters and attempt history under
+a version number. Every worker keeps ``st.session_state`` as a local cache
+and calls ``sync_session`` on each rerun to pick up changes made by another
+tab or worker. Answers are committed with compare-and-set on the version;
+when someone else got there first the answer is re-scored against the fresh
+profile and retried, so concurrent submissions never lose points or solved
+problems.
+
+``LocalBackend`` keeps everything in process memory (a single worker).
+``SQLiteBackend`` shares a SQLite file between worker processes.
+"""
+import abc
+import os
+import threading
+import time
+
+from .history import COLUMNS, ProblemHistory
+from .session import AttemptResult, merge_attempts, restore_profile, score_answer
+from .store import PROFILE_FIELDS, add_missing_columns, connect
+
+DEFAULT_BACKEND = os.environ.get("DETECTIVES_SESSION_BACKEND", "local")
+DEFAULT_SESSION_PATH = os.environ.get("DETECTIVES_SESSION_DB", "detectives-sessions.db")
+
+# Conflicting commits to retry before giving up on an answer
+MAX_RETRIES = 32
+# LocalBackend drops detectives it has not heard from in this long; their next answer seeds them again
+IDLE_SECONDS = int(os.environ.get("DETECTIVES_SESSION_IDLE_SECONDS", 3600))
+
+_CORRECT = list(COLUMNS).index('correct')
+_POINTS = list(COLUMNS).index('points')
+
+
+class StaleSessionError(RuntimeError):
+    """An answer could not be committed after ``MAX_RETRIES`` conflicting updates"""
+
+
+class SessionBackend(abc.ABC):
+    """Versioned profile and history storage shared by app workers.
+
+    Subclasses implement ``version``, ``load``, ``load_history``, ``create``
+    and ``compare_and_set``.
+    """
+
+    @abc.abstractmethod
+    def version(self, name):
+        """Current version for ``name``, or ``None`` if the backend has never seen them"""
+
+    @abc.abstractmethod
+    def load(self, name):
+        """Return ``(profile, version)`` for ``name``, or ``None``"""
+
+    @abc.abstractmethod
+    def load_history(self, name, start=0):
+        """Return attempts ``start`` onwards for ``name`` as a ``ProblemHistory``"""
+
+    @abc.abstractmethod
+    def create(self, name, profile, history=None):
+        """Add ``name`` at version 1 unless they already exist; returns the current version"""
+
+    @abc.abstractmethod
+    def compare_and_set(self, name, version, profile, attempt):
+        """Store ``profile`` and append ``attempt`` if ``name`` is still at ``version``.
+
+        Returns the new version, or ``None`` when the version has moved on.
+        """
+
+    def close(self):
+        pass
+
+    def submit(self, name, version, profile, attempt):
+        """Commit an attempt scored against ``version``, re-scoring it on conflict.
+
+        ``profile`` holds the counters after scoring and ``attempt`` is the
+        history row. Returns ``(profile, version, score, conflicts)`` as
+        committed, where ``score`` is the ``(points, streak_bonus,
+        leveled_up)`` of the final re-scoring, or ``None`` when the attempt
+        went in as scored.
+        """
+        committed = self.compare_and_set(name, version, profile, attempt)
+        if committed is not None:
+            return profile, committed, None, 0
+
+        correct = bool(attempt[_CORRECT])
+        for conflicts in range(1, MAX_RETRIES + 1):
+            profile, version = self.load(name)
+            score = score_answer(profile, correct)
+            row = attempt[:_POINTS] + (score[0],) + attempt[_POINTS + 1:]
+            committed = self.compare_and_set(name, version, profile, row)
+            if committed is not None:
+                return profile, committed, score, conflicts
+        raise StaleSessionError(f"gave up committing an answer for {name!r} after {MAX_RETRIES} conflicts")
+
+
+class LocalBackend(SessionBackend):
+    """In-process backend; shared by every session of one server process.
+
+    Each detective's attempts are kept as one ``ProblemHistory``. Detectives
+    idle for ``idle_seconds`` are dropped, swept at most once a minute.
+    """
+
+    def __init__(self, idle_seconds=IDLE_SECONDS):
+        self._lock = threading.Lock()
+        self._profiles = {}
+        self._histories = {}
+        self._last_used = {}
+        self.idle_seconds = idle_seconds
+        self._swept = time.monotonic()
+
+    def _touch(self, name):
+        now = time.monotonic()
+        if name in self._profiles:
+            self._last_used[name] = now
+        if now - self._swept >= min(self.idle_seconds, 60):
+            self._swept = now
+            for idle in [key for key, used in self._last_used.items() if now - used > self.idle_seconds]:
+                del self._profiles[idle], self._histories[idle], self._last_used[idle]
+
+    def version(self, name):
+        with self._lock:
+            self._touch(name)
+            entry = self._profiles.get(name)
+        return None if entry is None else entry[1]
+
+    def load(self, name):
+        with self._lock:
+            self._touch(name)
+            entry = self._profiles.get(name)
+        return None if entry is None else (dict(entry[0]), entry[1])
+
+    def load_history(self, name, start=0):
+        with self._lock:
+            self._touch(name)
+            history = self._histories.get(name)
+            if history is None:
+                return ProblemHistory()
+            # A copy, so later appends do not show through
+            return ProblemHistory.from_arrays({key: column[start:] for key, column in history.arrays().items()})
+
+    def create(self, name, profile, history=None):
+        with self._lock:
+            if name not in self._profiles:
+                self._profiles[name] = ({field: int(profile[field]) for field in PROFILE_FIELDS}, 1)
+                self._histories[name] = ProblemHistory()
+                if history is not None:
+                    self._histories[name].extend(history)
+            self._touch(name)
+            return self._profiles[name][1]
+
+    def compare_and_set(self, name, version, profile, attempt):
+        with self._lock:
+            self._touch(name)
+            if self._profiles[name][1] != version:
+                return None
+            self._profiles[name] = ({field: int(profile[field]) for field in PROFILE_FIELDS}, version + 1)
+            self._histories[name].append_row(attempt)
+            return version + 1
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    name TEXT PRIMARY KEY,
+    points INTEGER NOT NULL,
+    current_level INTEGER NOT NULL,
+    problems_solved INTEGER NOT NULL,
+    correct_streak INTEGER NOT NULL,
+    version INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS session_attempts (
+    student TEXT NOT NULL,
+    operation INTEGER NOT NULL,
+    a INTEGER NOT NULL,
+    b INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    points INTEGER NOT NULL,
+    timestamp_ms INTEGER NOT NULL,
+    solve_ms INTEGER NOT NULL DEFAULT -1,
+    kind INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS session_attempts_student ON session_attempts (student);
+"""
+
+INSERT_SESSION = f"""
+INSERT OR IGNORE INTO sessions (name, {', '.join(PROFILE_FIELDS)}, version)
+VALUES (?, {', '.join('?' for _ in PROFILE_FIELDS)}, 1)
+"""
+
+UPDATE_SESSION = f"""
+UPDATE sessions SET {', '.join(f'{field} = ?' for field in PROFILE_FIELDS)}, version = version + 1
+WHERE name = ? AND version = ?
+"""
+
+INSERT_SESSION_ATTEMPT = "INSERT INTO session_attempts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+
+class SQLiteBackend(SessionBackend):
+    """Backend shared between worker processes through one SQLite file.
+
+    Each thread gets its own connection. The version check and the writes
+    happen in a single transaction, which SQLite serialises across processes.
+    """
+
+    def __init__(self, path=DEFAULT_SESSION_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._conn().executescript(SCHEMA)
+        add_missing_columns(self._conn(), "session_attempts")
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = connect(self.path)
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def version(self, name):
+        row = self._conn().execute("SELECT version FROM sessions WHERE name = ?", (name,)).fetchone()
+        return None if row is None else row[0]
+
+    def load(self, name):
+        row = self._conn().execute(
+            f"SELECT {', '.join(PROFILE_FIELDS)}, version FROM sessions WHERE name = ?", (name,)
+        ).fetchone()
+        return None if row is None else (dict(zip(PROFILE_FIELDS, row)), row[-1])
+
+    def load_history(self, name, start=0):
+        rows = self._conn().execute(
+            f"SELECT {', '.join(COLUMNS)} FROM session_attempts WHERE student = ? "
+            "ORDER BY rowid LIMIT -1 OFFSET ?", (name, start)
+        ).fetchall()
+        return ProblemHistory.from_rows(rows)
+
+    def create(self, name, profile, history=None):
+        conn = self._conn()
+        with conn:
+            created = conn.execute(
+                INSERT_SESSION, (name,) + tuple(int(profile[field]) for field in PROFILE_FIELDS)
+            ).rowcount
+            if created and history is not None:
+                conn.executemany(INSERT_SESSION_ATTEMPT, ((name,) + row for row in history.rows()))
+        return self.version(name)
+
+    def compare_and_set(self, name, version, profile, attempt):
+        conn = self._conn()
+        with conn:
+            updated = conn.execute(
+                UPDATE_SESSION, tuple(int(profile[field]) for field in PROFILE_FIELDS) + (name, version)
+            ).rowcount
+            if not updated:
+                return None
+            conn.execute(INSERT_SESSION_ATTEMPT, (name,) + tuple(attempt))
+        return version + 1
+
+    def close(self):
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+
+def make_backend(kind=DEFAULT_BACKEND, path=DEFAULT_SESSION_PATH):
+    """Build the backend named by ``DETECTIVES_SESSION_BACKEND`` (``local`` or ``sqlite``)"""
+    if kind == "local":
+        return LocalBackend()
+    if kind == "sqlite":
+        return SQLiteBackend(path)
+    raise ValueError(f"unknown session backend {kind!r}")
+
+
+def join_session(state, backend, name, profile=None, history=None, unlocked=None):
+    """Sign ``name`` in, seeding the backend from a saved ``profile`` and ``history`` if they are new to it.
+
+    ``unlocked`` is the saved ``key -> unlocked_ms`` of badges already earned.
+    """
+    state['student_name'] = name
+    backend.create(name, state if profile is None else profile, history)
+    profile, version = backend.load(name)
+    restore_profile(state, profile, backend.load_history(name), unlocked)
+    state['session_version'] = version
+
+
+def sync_session(state, backend):
+    """Reload profile and history if another tab or worker has changed them; returns True if it did"""
+    name = state['student_name']
+    version = backend.version(name)
+    if version is None or version == state.get('session_version'):
+        return False
+    profile, version = backend.load(name)
+    merge_attempts(state, profile, backend.load_history(name, start=len(state['problem_history'])))
+    state['session_version'] = version
+    return True
+
+
+def commit_attempt(state, backend, result):
+    """Commit the attempt ``check_answer`` just recorded and returned as ``result``.
+
+    Returns the ``AttemptResult`` as committed, re-scored if another tab
+    answered first. If the attempt cannot be committed, ``state`` is reloaded
+    from the backend without it and ``StaleSessionError`` is raised.
+    """
+    name = state['student_name']
+    if backend.version(name) is None:
+        # Dropped by the backend while idle: seed it again from this session, the new attempt included
+        state['session_version'] = backend.create(name, state, state['problem_history'])
+        return result
+    profile = {field: state[field] for field in PROFILE_FIELDS}
+    try:
+        profile, version, score, conflicts = backend.submit(
+            name, state['session_version'], profile, state['problem_history'].row(-1)
+        )
+    except StaleSessionError:
+        profile, version = backend.load(name)
+        restore_profile(state, profile, backend.load_history(name))
+        state['session_version'] = version
+        raise
+    if conflicts:
+        restore_profile(state, profile, backend.load_history(name))
+        result = AttemptResult(result.correct, *score, result.badges)
+    state['session_version'] = version
+    return result
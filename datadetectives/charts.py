@@ -0,0 +1,100 @@
+"""Plotly figures for the Progress Dashboard.
+
+pandas and plotly are imported inside the builders so the rest of the
+package can be used without them.
+"""
+
+
+def dashboard_figures(aggregates):
+    """Build the recent-success, points-per-case and per-level figures.
+
+    The per-level figure is ``None`` until attempts span more than one level.
+    """
+    import pandas as pd
+    import plotly.express as px
+
+    recent = aggregates.recent()
+    df = pd.DataFrame(recent)
+    df['Case_Number'] = range(1, len(df) + 1)
+    df['Success'] = df['correct'].astype(int)
+
+    fig = px.line(df, x='Case_Number', y='Success',
+                  title="Recent Case Success Rate (Last 10 Cases)",
+                  labels={'Case_Number': 'Case Number', 'Success': 'Solved (1) or Not (0)'})
+    fig.update_traces(mode='markers+lines', marker_size=8)
+    fig.update_layout(yaxis_range=[-0.1, 1.1])
+
+    fig2 = px.bar(df, x='Case_Number', y='points',
+                  title="Points Earned per Case",
+                  labels={'Case_Number': 'Case Number', 'points': 'Points Earned'},
+                  color='points',
+                  color_continuous_scale='viridis')
+
+    fig3 = None
+    level_stats = pd.DataFrame(aggregates.level_stats(),
+                               columns=['level', 'Total_Cases', 'Solved_Cases', 'Success_Rate'])
+    if len(level_stats) > 1:
+        fig3 = px.bar(level_stats, x='level', y='Success_Rate',
+                      title="Success Rate by Detective Level",
+                      labels={'level': 'Detective Level', 'Success_Rate': 'Success Rate'},
+                      color='Success_Rate',
+                      color_continuous_scale='RdYlGn')
+
+    return fig, fig2, fig3
+
+
+def cached_dashboard_figures(aggregates, cache):
+    """Return dashboard figures, rebuilding only when ``aggregates.version`` changed.
+
+    ``cache`` is any mutable mapping, typically ``st.session_state``.
+    """
+    cached = cache.get('dashboard_figures')
+    if cached is None or cached[0] != aggregates.version:
+        cached = (aggregates.version, dashboard_figures(aggregates))
+        cache['dashboard_figures'] = cached
+    return cached[1]
+
+
+def class_figures(analytics):
+    """Build the error heatmap, accuracy-over-time and level distribution figures for a class.
+
+    Every figure is built from ``ClassAnalytics`` tables, and the time series
+    is LTTB-downsampled, so the payload stays small however many attempts
+    the class has made.
+    """
+    import pandas as pd
+    import plotly.express as px
+
+    from .engine import OPERATIONS
+
+    levels, rates = analytics.error_rates()
+    heatmap = px.imshow(rates * 100, x=[str(level) for level in levels], y=OPERATIONS,
+                        title="Error Rate by Operation and Level (%)",
+                        labels={'x': 'Detective Level', 'y': 'Operation', 'color': 'Error %'},
+                        color_continuous_scale='RdYlGn_r', zmin=0, zmax=100, aspect='auto')
+
+    times, accuracy = analytics.accuracy_over_time()
+    timeline = px.line(x=pd.to_datetime(times, unit='ms'), y=accuracy * 100,
+                       title="Class Accuracy Over Time",
+                       labels={'x': 'Time', 'y': 'Accuracy (%)'})
+    timeline.update_layout(yaxis_range=[0, 105])
+
+    levels, counts = analytics.level_counts()
+    distribution = px.bar(x=levels, y=counts,
+                          title="Cases Attempted per Detective Level",
+                          labels={'x': 'Detective Level', 'y': 'Cases'})
+
+    return heatmap, timeline, distribution
+
+
+def cached_class_figures(analytics, cache):
+    """Return class figures, rebuilding only when new attempts reached ``analytics``"""
+    key = ('class_figures', analytics.students)
+    # The high-water mark pins what was read from the database, so a class
+    # rebuilt after eviction (its version back at 0) cannot match old figures
+    stamp = (analytics.high_water, analytics.version)
+    cached = cache.get(key)
+    if cached is None or cached[0] != stamp:
+        cached = (stamp, class_figures(analytics))
+        cache[key] = cached
+    return cached[1]
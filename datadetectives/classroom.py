@@ -0,0 +1,176 @@
+"""Class-wide analytics behind the Teacher View.
+
+``ClassAnalytics`` folds attempt columns into a few small NumPy tables with
+vectorised group-bys (``bincount`` over combined keys): attempts and misses
+per operation and level, and attempts and correct answers per time bin. It
+remembers the highest attempt ``rowid`` it has read, so refreshing from the
+store only reads rows above that high-water mark. ``lttb`` downsamples long
+series before they are plotted.
+"""
+import threading
+
+import numpy as np
+
+from .engine import OPERATIONS
+from .store import connect
+
+TIME_BIN_MS = 3_600_000
+MAX_PLOT_POINTS = 1_000
+FETCH_ROWS = 65_536
+# Classes whose analytics are kept between views, least recently viewed dropped first
+MAX_CACHED_CLASSES = 8
+
+_cache_lock = threading.Lock()
+
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets downsampling; returns indices of the points to keep.
+
+    Keeps the first and last points and, from each bucket in between, the
+    point forming the largest triangle with the point kept before it and the
+    average of the next bucket, which preserves peaks and troughs.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[stop:next_stop].mean()
+        avg_y = y[stop:next_stop].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        keep[i + 1] = a
+    return keep
+
+
+class ClassAnalytics:
+    """Incrementally maintained aggregates for one class (or the whole academy)."""
+
+    def __init__(self, students=None, bin_ms=TIME_BIN_MS):
+        self.students = None if students is None else frozenset(students)
+        self.bin_ms = bin_ms
+        self.high_water = 0
+        self.version = 0
+        self.total = 0
+        self.correct = 0
+        self._attempts = np.zeros((len(OPERATIONS), 1), dtype=np.int64)
+        self._misses = np.zeros((len(OPERATIONS), 1), dtype=np.int64)
+        self._bins = np.empty(0, dtype=np.int64)
+        self._bin_attempts = np.empty(0, dtype=np.int64)
+        self._bin_correct = np.empty(0, dtype=np.int64)
+        self._lock = threading.Lock()
+
+    def update(self, operation, level, correct, timestamp_ms):
+        """Fold arrays of attempts into the aggregates"""
+        with self._lock:
+            self._update(operation, level, correct, timestamp_ms)
+
+    def _update(self, operation, level, correct, timestamp_ms):
+        # New arrays are swapped in rather than added to in place, so a
+        # figure being drawn from the old ones never sees a half-applied batch
+        operation = np.asarray(operation, dtype=np.int64)
+        level = np.asarray(level, dtype=np.int64)
+        correct = np.asarray(correct, dtype=np.bool_)
+        if not len(level):
+            return
+
+        levels = max(self._attempts.shape[1], int(level.max()) + 1)
+        pad = ((0, 0), (0, levels - self._attempts.shape[1]))
+        key = operation * levels + level
+        size = len(OPERATIONS) * levels
+        shape = (len(OPERATIONS), levels)
+        self._attempts = np.pad(self._attempts, pad) + np.bincount(key, minlength=size).reshape(shape)
+        self._misses = np.pad(self._misses, pad) + np.bincount(key[~correct], minlength=size).reshape(shape)
+
+        bins, inverse = np.unique(np.asarray(timestamp_ms, dtype=np.int64) // self.bin_ms, return_inverse=True)
+        attempts = np.bincount(inverse, minlength=len(bins))
+        solved = np.bincount(inverse[correct], minlength=len(bins))
+        merged, inverse = np.unique(np.concatenate([self._bins, bins]), return_inverse=True)
+        self._bin_attempts = np.bincount(inverse, np.concatenate([self._bin_attempts, attempts]),
+                                         minlength=len(merged)).astype(np.int64)
+        self._bin_correct = np.bincount(inverse, np.concatenate([self._bin_correct, solved]),
+                                        minlength=len(merged)).astype(np.int64)
+        self._bins = merged
+
+        self.total += len(level)
+        self.correct += int(correct.sum())
+        self.version += 1
+
+    def refresh(self, db_path):
+        """Read attempts saved since the last refresh; returns True if there were any"""
+        with self._lock:
+            conn = connect(db_path)
+            try:
+                high_water = conn.execute("SELECT MAX(rowid) FROM attempts").fetchone()[0] or 0
+                if high_water <= self.high_water:
+                    return False
+                sql = ("SELECT operation, level, correct, timestamp_ms FROM attempts "
+                       "WHERE rowid > ? AND rowid <= ?")
+                params = [self.high_water, high_water]
+                if self.students is not None:
+                    sql += f" AND student IN ({', '.join('?' for _ in self.students)})"
+                    params += sorted(self.students)
+                cursor = conn.execute(sql, params)
+                while True:
+                    rows = cursor.fetchmany(FETCH_ROWS)
+                    if not rows:
+                        break
+                    data = np.array(rows, dtype=np.int64)
+                    self._update(data[:, 0], data[:, 1], data[:, 2].astype(np.bool_), data[:, 3])
+            finally:
+                conn.close()
+            self.high_water = high_water
+            return True
+
+    @property
+    def accuracy(self):
+        return (self.correct / self.total * 100) if self.total else 0.0
+
+    def error_rates(self):
+        """Return ``(levels, rates)``: miss rate per operation (rows) and attempted level (columns)"""
+        levels = np.flatnonzero(self._attempts.sum(axis=0))
+        attempts = self._attempts[:, levels]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rates = np.where(attempts > 0, self._misses[:, levels] / attempts, np.nan)
+        return levels, rates
+
+    def level_counts(self):
+        """Return ``(levels, attempts)`` for every level attempted"""
+        per_level = self._attempts.sum(axis=0)
+        levels = np.flatnonzero(per_level)
+        return levels, per_level[levels]
+
+    def accuracy_over_time(self, max_points=MAX_PLOT_POINTS):
+        """Return ``(timestamp_ms, accuracy)`` per time bin, downsampled with LTTB to ``max_points``"""
+        times = self._bins * self.bin_ms
+        accuracy = self._bin_correct / np.maximum(self._bin_attempts, 1)
+        keep = lttb(times, accuracy, max_points)
+        return times[keep], accuracy[keep]
+
+
+def cached_class_analytics(cache, db_path, students=None, limit=MAX_CACHED_CLASSES):
+    """Return up-to-date analytics for a class, reusing the copy in ``cache``.
+
+    ``cache`` is a dict shared across sessions; each class is refreshed
+    incrementally from its high-water mark rather than recomputed. Only the
+    ``limit`` most recently viewed classes are kept.
+    """
+    key = ('class_analytics', None if not students else frozenset(students))
+    with _cache_lock:
+        # Re-inserted so the dict stays in least to most recently viewed order
+        analytics = cache.pop(key, None)
+        if analytics is None:
+            analytics = ClassAnalytics(key[1])
+        cache[key] = analytics
+        while len(cache) > limit:
+            del cache[next(iter(cache))]
+    analytics.refresh(db_path)
+    return analytics
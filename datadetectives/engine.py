@@ -0,0 +1,223 @@
+"""Problem engine for the MathCraft Detective Academy.
+
+Holds the story templates, the scalar ``generate_problem`` used by the app
+and the vectorized ``generate_problems`` used to pre-generate worksheets and
+mission pools. ``SessionRandom`` gives each session its own seeded stream.
+"""
+import random
+
+import numpy as np
+
+from .metrics import REGISTRY
+
+OPERATIONS = ["+", "-", "×", "÷"]
+OPERATION_CODES = {op: code for code, op in enumerate(OPERATIONS)}
+
+# Operand ranges stop growing after this level
+MAX_DIFFICULTY = 10
+
+# Draws reserved for each problem in a session's random stream
+PROBLEM_STRIDE = 1 << 32
+
+QUESTION_TEMPLATES = {
+    "+": "Detective Amirah collected {a} pieces of evidence on Monday and {b} pieces on Tuesday. How many pieces did she collect in total?",
+    "-": "Detective Amari had {a} case files. She solved {b} cases and filed them away. How many case files are still on her desk?",
+    "×": "Detective Amirah organized evidence into {a} boxes with {b} items in each box. How many items are there in total?",
+    "÷": "Detective Amari needs to distribute {a} clues equally among {b} investigation teams. How many clues will each team get?",
+}
+
+HINTS = {
+    "+": "💡 **Amirah's Tip:** Add the numbers together to find the total! Think of it as combining all the evidence.",
+    "-": "💡 **Amari's Tip:** Start with the first number and count backwards by the second number!",
+    "×": "💡 **Amirah's Tip:** Think of it as adding the same number multiple times! You can also skip count.",
+    "÷": "💡 **Amari's Tip:** How many groups of the smaller number fit into the larger number? Think about sharing equally!",
+}
+
+
+def level_range(level, scale=1.0):
+    """Return the (base_min, base_max) operand range for a difficulty level.
+
+    ``scale`` shrinks or stretches the range; the adaptive engine uses it to
+    ease off or push harder within a level.
+    """
+    difficulty_multiplier = min(level, MAX_DIFFICULTY)
+    base_min = 1 + (difficulty_multiplier - 1) * 3
+    base_max = 8 + (difficulty_multiplier - 1) * 8
+    if scale != 1.0:
+        base_min = max(1, round(base_min * scale))
+        base_max = max(base_min + 1, round(base_max * scale))
+    return base_min, base_max
+
+
+def make_problem(operation, a, b, level):
+    """Build the problem dict shown in a mission card"""
+    if operation == "+":
+        answer = a + b
+    elif operation == "-":
+        answer = a - b
+    elif operation == "×":
+        answer = a * b
+    else:
+        answer = a // b
+    return {
+        'question': QUESTION_TEMPLATES[operation].format(a=a, b=b),
+        'expression': f"{a} {operation} {b}",
+        'answer': answer,
+        'hint': HINTS[operation],
+        'operation': operation,
+        'level': level
+    }
+
+
+@REGISTRY.timed('generate_problem_seconds', "Time to generate one problem")
+def generate_problem(level, operation=None, scale=1.0, rng=random):
+    """Generate a math problem based on difficulty level"""
+    base_min, base_max = level_range(level, scale)
+    if operation is None:
+        operation = rng.choice(OPERATIONS)
+
+    if operation == "+":
+        a = rng.randint(base_min, base_max)
+        b = rng.randint(base_min, base_max)
+    elif operation == "-":
+        a = rng.randint(base_max, base_max * 2)
+        b = rng.randint(base_min, a - 1)
+    elif operation == "×":
+        a = rng.randint(2, base_min + 4)
+        b = rng.randint(2, base_min + 3)
+    else:  # division
+        b = rng.randint(2, base_min + 3)
+        a = b * rng.randint(2, base_min + 4)
+
+    return make_problem(operation, a, b, level)
+
+
+# Seeds fit the signed 64-bit field of the event log header
+SEED_LIMIT = 1 << 63
+
+
+class SessionRandom:
+    """A session's own NumPy PCG64 stream, with the ``random`` methods the generators call.
+
+    Problem ``i`` draws from the stream advanced by ``i * PROBLEM_STRIDE``,
+    so any problem can be regenerated from the seed alone. ``deterministic``
+    is set when the seed was chosen rather than drawn from the OS.
+    """
+
+    __slots__ = ('seed', 'deterministic', 'problems', 'generator', '_start')
+
+    def __init__(self, seed=None):
+        self.deterministic = seed is not None
+        if seed is None:
+            seed = np.random.SeedSequence().entropy
+        self.seed = int(seed) % SEED_LIMIT
+        self.generator = np.random.Generator(np.random.PCG64(self.seed))
+        self._start = self.generator.bit_generator.state
+        self.problems = 0
+
+    def seek(self, problem):
+        """Position the stream at the start of problem ``problem``'s draws"""
+        bit_generator = self.generator.bit_generator
+        bit_generator.state = self._start
+        bit_generator.advance(problem * PROBLEM_STRIDE)
+        return self
+
+    def next_problem(self):
+        """Position the stream for the next problem and count it"""
+        self.seek(self.problems)
+        self.problems += 1
+        return self
+
+    def random(self):
+        return self.generator.random()
+
+    def randint(self, a, b):
+        return int(self.generator.integers(a, b, endpoint=True))
+
+    def choice(self, seq):
+        return seq[int(self.generator.integers(len(seq)))]
+
+    def choices(self, population, weights=None, k=1):
+        if weights is None:
+            picks = self.generator.integers(len(population), size=k)
+        else:
+            p = np.asarray(weights, dtype=np.float64)
+            picks = self.generator.choice(len(population), size=k, p=p / p.sum())
+        return [population[i] for i in picks.tolist()]
+
+
+class ProblemBatch:
+    """A batch of problems stored as parallel NumPy arrays.
+
+    Operands and answers are drawn up front; question and hint text is only
+    formatted when a problem is read, so a million-problem pool costs a few
+    arrays rather than a million dicts.
+    """
+
+    __slots__ = ('level', 'operations', 'a', 'b', 'answers')
+
+    def __init__(self, level, operations, a, b, answers):
+        self.level = level
+        self.operations = operations
+        self.a = a
+        self.b = b
+        self.answers = answers
+
+    def __len__(self):
+        return len(self.operations)
+
+    def __getitem__(self, i):
+        return make_problem(OPERATIONS[self.operations[i]], int(self.a[i]), int(self.b[i]), self.level)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def expression(self, i):
+        return f"{self.a[i]} {OPERATIONS[self.operations[i]]} {self.b[i]}"
+
+    def question(self, i):
+        return QUESTION_TEMPLATES[OPERATIONS[self.operations[i]]].format(a=self.a[i], b=self.b[i])
+
+    def hint(self, i):
+        return HINTS[OPERATIONS[self.operations[i]]]
+
+
+def generate_problems(level, n, seed=None, scale=1.0):
+    """Generate ``n`` problems for a level in one vectorized pass.
+
+    Uses the same operand ranges as ``generate_problem``, including its
+    ``scale``. Passing a ``seed`` makes the batch reproducible.
+    """
+    rng = np.random.default_rng(seed)
+    base_min, base_max = level_range(level, scale)
+
+    ops = rng.integers(0, len(OPERATIONS), size=n, dtype=np.int8)
+    a = np.empty(n, dtype=np.int64)
+    b = np.empty(n, dtype=np.int64)
+
+    add = ops == 0
+    k = int(add.sum())
+    a[add] = rng.integers(base_min, base_max, size=k, endpoint=True)
+    b[add] = rng.integers(base_min, base_max, size=k, endpoint=True)
+
+    sub = ops == 1
+    k = int(sub.sum())
+    a_sub = rng.integers(base_max, base_max * 2, size=k, endpoint=True)
+    a[sub] = a_sub
+    b[sub] = rng.integers(base_min, a_sub)
+
+    mul = ops == 2
+    k = int(mul.sum())
+    a[mul] = rng.integers(2, base_min + 4, size=k, endpoint=True)
+    b[mul] = rng.integers(2, base_min + 3, size=k, endpoint=True)
+
+    div = ops == 3
+    k = int(div.sum())
+    b_div = rng.integers(2, base_min + 3, size=k, endpoint=True)
+    b[div] = b_div
+    a[div] = b_div * rng.integers(2, base_min + 4, size=k, endpoint=True)
+
+    answers = np.select([add, sub, mul, div], [a + b, a - b, a * b, a // b])
+
+    return ProblemBatch(level, ops, a, b, answers)
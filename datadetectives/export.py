@@ -0,0 +1,245 @@
+"""Bulk classroom export and memory-mapped import of attempt history.
+
+``export_attempts`` streams every saved attempt out of the SQLite store in
+chunks, so memory stays bounded however long the term was. The format
+follows the file suffix: ``.parquet``, ``.arrow`` (Arrow IPC) or ``.csv``.
+Parquet and Arrow need ``pyarrow``; CSV always works.
+
+Rows are written grouped by student. ``open_attempts`` memory-maps an Arrow
+IPC file and indexes each student's rows, so the dashboard can pull one
+detective's history without reading the whole file. A Parquet or CSV export
+is converted to an ``.arrow`` file next to it ahead of time with
+``--convert``, never during a rerun. Run from the repository root:
+
+    python -m datadetectives.export detectives.db term.parquet
+    python -m datadetectives.export --convert term.parquet
+"""
+import argparse
+import csv
+import os
+import time
+
+import numpy as np
+
+from .history import COLUMN_DEFAULTS, COLUMNS, ProblemHistory
+from .store import DEFAULT_PATH, connect
+
+EXPORT_COLUMNS = ('student',) + tuple(COLUMNS)
+ARCHIVE_PATH = os.environ.get("DETECTIVES_ARCHIVE")
+CHUNK_ROWS = 65_536
+FORMATS = {'.parquet': 'parquet', '.arrow': 'arrow', '.feather': 'arrow', '.csv': 'csv'}
+
+SELECT_ATTEMPTS = f"SELECT {', '.join(EXPORT_COLUMNS)} FROM attempts WHERE timestamp_ms >= ? ORDER BY student, rowid"
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Parquet and Arrow files need pyarrow; install it or export to .csv") from None
+    return pyarrow
+
+
+def file_format(path):
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix not in FORMATS:
+        raise ValueError(f"unsupported export format {suffix!r}; use one of {', '.join(FORMATS)}")
+    return FORMATS[suffix]
+
+
+def arrow_schema():
+    pa = _pyarrow()
+    return pa.schema([('student', pa.string())] + [(name, pa.from_numpy_dtype(dtype)) for name, dtype in COLUMNS.items()])
+
+
+def iter_attempt_chunks(db_path=DEFAULT_PATH, chunk_rows=CHUNK_ROWS, since_ms=0):
+    """Yield lists of ``EXPORT_COLUMNS`` tuples, at most ``chunk_rows`` at a time"""
+    conn = connect(db_path)
+    try:
+        cursor = conn.execute(SELECT_ATTEMPTS, (since_ms,))
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
+
+
+def _record_batch(rows, schema):
+    pa = _pyarrow()
+    student, *columns = zip(*rows)
+    arrays = [pa.array(student, type=pa.string())]
+    arrays += [pa.array(np.array(values, dtype=dtype)) for values, dtype in zip(columns, COLUMNS.values())]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def export_attempts(out_path, db_path=DEFAULT_PATH, chunk_rows=CHUNK_ROWS, since_ms=0):
+    """Stream saved attempts to ``out_path``; returns the number of rows written"""
+    fmt = file_format(out_path)
+    chunks = iter_attempt_chunks(db_path, chunk_rows, since_ms)
+    total = 0
+
+    if fmt == 'csv':
+        with open(out_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(EXPORT_COLUMNS)
+            for rows in chunks:
+                writer.writerows(rows)
+                total += len(rows)
+        return total
+
+    pa = _pyarrow()
+    schema = arrow_schema()
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+
+        writer = pq.ParquetWriter(out_path, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_file(out_path, schema)
+    try:
+        for rows in chunks:
+            writer.write_batch(_record_batch(rows, schema))
+            total += len(rows)
+    finally:
+        writer.close()
+    return total
+
+
+def convert_to_arrow(src_path, out_path, chunk_rows=CHUNK_ROWS):
+    """Stream a Parquet or CSV export into an Arrow IPC file that can be memory-mapped"""
+    pa = _pyarrow()
+    schema = arrow_schema()
+    fmt = file_format(src_path)
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+
+        batches = pq.ParquetFile(src_path).iter_batches(batch_size=chunk_rows)
+    elif fmt == 'csv':
+        import pyarrow.csv as pcsv
+
+        batches = pcsv.open_csv(src_path, convert_options=pcsv.ConvertOptions(
+            column_types={field.name: field.type for field in schema}))
+    else:
+        raise ValueError(f"{src_path} is already an Arrow file")
+
+    with pa.ipc.new_file(out_path, schema) as writer:
+        for batch in batches:
+            writer.write_batch(_conform(batch, schema))
+
+
+def _conform(batch, schema):
+    """Cast ``batch`` to ``schema``, filling columns missing from older exports with their defaults"""
+    pa = _pyarrow()
+    if batch.schema == schema:
+        return batch
+    arrays = [batch.column(field.name).cast(field.type) if field.name in batch.schema.names
+              else pa.array(np.full(batch.num_rows, COLUMN_DEFAULTS[field.name], dtype=field.type.to_pandas_dtype()))
+              for field in schema]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class AttemptArchive:
+    """Read-only, memory-mapped view of an exported attempt file.
+
+    Column data stays in the page cache rather than the Python heap; only
+    the per-student row index is built in memory.
+    """
+
+    def __init__(self, path):
+        pa = _pyarrow()
+        self.path = path
+        self._source = pa.memory_map(path, "r")
+        self.table = pa.ipc.open_file(self._source).read_all()
+        self._index = self._build_index()
+
+    def _build_index(self):
+        import pyarrow.compute as pc
+
+        index = {}
+        offset = 0
+        for chunk in self.table.column('student').chunks:
+            runs = pc.run_end_encode(chunk)
+            start = offset
+            for name, end in zip(runs.values.to_pylist(), runs.run_ends.to_pylist()):
+                index.setdefault(name, []).append((start, offset + end))
+                start = offset + end
+            offset += len(chunk)
+        return index
+
+    def __len__(self):
+        return self.table.num_rows
+
+    def students(self):
+        return sorted(self._index)
+
+    def history(self, student):
+        """Return one student's archived attempts as a ``ProblemHistory``"""
+        spans = self._index.get(student, [])
+        columns = {}
+        rows = sum(stop - start for start, stop in spans)
+        for name, dtype in COLUMNS.items():
+            if name not in self.table.schema.names:
+                # Column added after this file was exported
+                columns[name] = np.full(rows, COLUMN_DEFAULTS[name], dtype=dtype)
+                continue
+            column = self.table.column(name)
+            parts = [column.slice(start, stop - start).combine_chunks().to_numpy(zero_copy_only=False)
+                     for start, stop in spans]
+            columns[name] = np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+        return ProblemHistory.from_arrays(columns)
+
+    def close(self):
+        self.table = None
+        self._source.close()
+
+
+def arrow_path(path):
+    """The Arrow IPC file that is memory-mapped for the export at ``path``"""
+    return path if file_format(path) == 'arrow' else os.path.splitext(path)[0] + ".arrow"
+
+
+def convert_export(path, chunk_rows=CHUNK_ROWS):
+    """Convert a Parquet or CSV export to its Arrow IPC file unless that is up to date; returns its path"""
+    out_path = arrow_path(path)
+    if out_path != path and (not os.path.exists(out_path) or os.path.getmtime(out_path) < os.path.getmtime(path)):
+        convert_to_arrow(path, out_path, chunk_rows)
+    return out_path
+
+
+def open_attempts(path):
+    """Memory-map an export; a Parquet or CSV one must have been converted with ``convert_export``"""
+    mapped = arrow_path(path)
+    if mapped != path and (not os.path.exists(mapped) or os.path.getmtime(mapped) < os.path.getmtime(path)):
+        raise FileNotFoundError(f"{path} has no up-to-date {os.path.basename(mapped)}; "
+                                f"run python -m datadetectives.export --convert {path}")
+    return AttemptArchive(mapped)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export every saved attempt to Parquet, Arrow or CSV")
+    parser.add_argument("db", nargs="?", help=f"detective database (default {DEFAULT_PATH})")
+    parser.add_argument("out", nargs="?", help="output file; the suffix picks the format")
+    parser.add_argument("--since-ms", type=int, default=0, help="only attempts at or after this epoch-ms time")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--convert", metavar="EXPORT",
+                        help="instead, convert a Parquet or CSV export to the .arrow file the dashboard maps")
+    args = parser.parse_args()
+    if args.convert:
+        if args.db or args.out:
+            parser.error("--convert takes no other files")
+        start = time.perf_counter()
+        print(f"converted {args.convert} to {convert_export(args.convert, args.chunk_rows)} "
+              f"in {time.perf_counter() - start:.1f}s")
+        return
+    if args.out is None:
+        if args.db is None:
+            parser.error("the output file is required")
+        # One file given: it is the output
+        args.db, args.out = None, args.db
+    total = export_attempts(args.out, args.db or DEFAULT_PATH, args.chunk_rows, args.since_ms)
+    print(f"exported {total:,} attempts to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,415 @@
+"""Multi-step problems: expression trees over integers, decimals and fractions.
+
+A tree is built from ``Leaf`` and ``Node`` tuples whose values are exact
+``Fraction``s. ``evaluate`` walks a tree once and memoises every subtree, and
+a problem dict carries its answer so it is never evaluated again. Answers
+that do not terminate within two decimal places are checked with a
+tolerance, so 1/3 can be entered as 0.33.
+
+``generate_expression_problem`` builds one problem directly;
+``generate_expression_problems`` draws a whole batch with NumPy, doing the
+rational arithmetic on numerator and denominator arrays, to fill the
+problem pool's multi-step deques. A batch problem packs into one int64
+(``ExpressionBatch.keys``), which ``expression_tree`` turns back into a tree.
+"""
+import random
+import re
+from collections import namedtuple
+from fractions import Fraction
+from functools import lru_cache
+
+import numpy as np
+
+from .engine import HINTS, OPERATIONS, QUESTION_TEMPLATES, level_range
+
+KINDS = ("single", "multi-step", "decimal", "fraction")
+KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+
+# Multi-step problems start at this level, decimals and fractions later
+MULTISTEP_MIN_LEVEL = 4
+DECIMAL_MIN_LEVEL = 6
+FRACTION_MIN_LEVEL = 8
+MULTISTEP_SHARE = 0.3  # share of problems that are multi-step once unlocked
+
+MAX_ANSWER = 10_000
+MAX_DENOMINATOR = 60
+MAX_LEAF_DENOMINATOR = 12
+DECIMAL_PLACES = 2
+TOLERANCE = Fraction(1, 2 * 10 ** DECIMAL_PLACES)
+MAX_TRIES = 200
+MAX_STALLS = 3  # batch passes in a row without a new problem before a level counts as exhausted
+# Typed answers: an optional sign, then a whole number, a decimal, "a/b" or "w a/b". No exponents,
+# since Fraction("1e10000000") takes seconds and holds the GIL
+MAX_ANSWER_LENGTH = 32
+ANSWER_PATTERN = re.compile(r"([+-]?)(?:(\d+) +(\d+)/(\d+)|(\d+)/(\d+)|(\d+\.?\d*|\.\d+))")
+
+PRECEDENCE = {"+": 1, "-": 1, "×": 2, "÷": 2}
+
+ORDER_HINT = "💡 **Detective Rule:** Solve what is inside the parentheses first, then × and ÷, then + and -."
+KIND_HINTS = {
+    "decimal": "💡 **Amirah's Tip:** Line up the decimal points, or turn tenths into whole numbers and back!",
+    "fraction": "💡 **Amari's Tip:** To add or subtract fractions, give them the same denominator first!",
+}
+
+Leaf = namedtuple('Leaf', 'value')
+Node = namedtuple('Node', 'op left right')
+
+
+@lru_cache(maxsize=65_536)
+def evaluate(node):
+    """Exact value of an expression tree as a ``Fraction``"""
+    if type(node) is Leaf:
+        return node.value
+    left = evaluate(node.left)
+    right = evaluate(node.right)
+    if node.op == "+":
+        return left + right
+    if node.op == "-":
+        return left - right
+    if node.op == "×":
+        return left * right
+    return left / right
+
+
+def subtrees(node):
+    """Every internal node of a tree, children first"""
+    if type(node) is Leaf:
+        return []
+    return subtrees(node.left) + subtrees(node.right) + [node]
+
+
+def leaves(node):
+    if type(node) is Leaf:
+        return [node]
+    return leaves(node.left) + leaves(node.right)
+
+
+def tree_kind(node, level):
+    """``"multi-step"`` when every leaf is whole, otherwise the level's leaf style"""
+    if all(leaf.value.denominator == 1 for leaf in leaves(node)):
+        return "multi-step"
+    return leaf_style(level) or "fraction"
+
+
+def format_value(value, kind="fraction"):
+    """Integers as ``7``; terminating decimals as ``2.75`` in decimal problems, otherwise ``11/4``"""
+    if value.denominator == 1:
+        return str(value.numerator)
+    scale = 10 ** DECIMAL_PLACES
+    if kind == "decimal" and scale % value.denominator == 0:
+        scaled = abs(value.numerator) * (scale // value.denominator)
+        sign = "-" if value < 0 else ""
+        return f"{sign}{scaled // scale}.{scaled % scale:0{DECIMAL_PLACES}d}".rstrip("0")
+    return f"{value.numerator}/{value.denominator}"
+
+
+def to_text(node, kind="fraction"):
+    """Infix text with the parentheses the tree needs.
+
+    A right operand of equal precedence keeps its parentheses, so
+    ``a + (b + c)`` and ``(a + b) + c`` read differently.
+    """
+    if type(node) is Leaf:
+        return format_value(node.value, kind)
+    left = to_text(node.left, kind)
+    right = to_text(node.right, kind)
+    if type(node.left) is Node and PRECEDENCE[node.left.op] < PRECEDENCE[node.op]:
+        left = f"({left})"
+    if type(node.right) is Node and PRECEDENCE[node.right.op] <= PRECEDENCE[node.op]:
+        right = f"({right})"
+    return f"{left} {node.op} {right}"
+
+
+def tolerance_for(answer):
+    """Zero when the answer can be typed exactly in ``DECIMAL_PLACES`` places, else half a unit of the last place"""
+    return 0 if (10 ** DECIMAL_PLACES) % Fraction(answer).denominator == 0 else TOLERANCE
+
+
+def make_expression_problem(tree, level, answer=None):
+    """Build the problem dict for a tree; pass ``answer`` when it is already known"""
+    if answer is None:
+        answer = evaluate(tree)
+    kind = tree_kind(tree, level)
+    sides = []
+    for side in (tree.left, tree.right):
+        text = to_text(side, kind)
+        sides.append(text if type(side) is Leaf else f"({text})")
+    hint = f"{ORDER_HINT} {KIND_HINTS.get(kind, HINTS[tree.op])}"
+    return {
+        'question': QUESTION_TEMPLATES[tree.op].format(a=sides[0], b=sides[1]),
+        'expression': to_text(tree, kind),
+        'answer': answer.numerator if answer.denominator == 1 else answer,
+        'answer_text': format_value(answer, leaf_style(level) or kind),
+        'tolerance': tolerance_for(answer),
+        'hint': hint,
+        'operation': tree.op,
+        'level': level,
+        'kind': kind,
+    }
+
+
+def leaf_style(level):
+    """Which non-integer leaves a level uses: ``None``, ``"decimal"`` or ``"fraction"``"""
+    if level >= FRACTION_MIN_LEVEL:
+        return "fraction"
+    if level >= DECIMAL_MIN_LEVEL:
+        return "decimal"
+    return None
+
+
+def leaf_max(level):
+    """Largest whole-number leaf for a level"""
+    return max(12, level_range(level)[1] // 2)
+
+
+def is_valid(tree, level):
+    """Every step positive, the answer in range, and denominators a student can work with"""
+    style = leaf_style(level)
+    if any(leaf.value == 1 for leaf in leaves(tree)):
+        return False
+    for node in subtrees(tree):
+        value = evaluate(node)
+        if value <= 0 or value > MAX_ANSWER:
+            return False
+        if style is None and value.denominator != 1:
+            return False
+        if style == "decimal" and (10 ** DECIMAL_PLACES) % value.denominator:
+            return False
+        if value.denominator > MAX_DENOMINATOR:
+            return False
+    return True
+
+
+def random_leaf(level, rng=random):
+    style = leaf_style(level)
+    top = leaf_max(level)
+    if style == "decimal" and rng.random() < 0.5:
+        return Leaf(Fraction(rng.randint(1, 10 * top), 10))
+    if style == "fraction" and rng.random() < 0.5:
+        den = rng.randint(2, MAX_LEAF_DENOMINATOR)
+        return Leaf(Fraction(rng.randint(1, 2 * den - 1), den))
+    return Leaf(Fraction(rng.randint(2, top)))
+
+
+def generate_expression_problem(level, operation=None, rng=random):
+    """Generate one two-step problem whose last step is ``operation``"""
+    for _ in range(MAX_TRIES):
+        op = operation or rng.choice(OPERATIONS)
+        inner = Node(rng.choice(OPERATIONS), random_leaf(level, rng), random_leaf(level, rng))
+        leaf = random_leaf(level, rng)
+        tree = Node(op, inner, leaf) if rng.random() < 0.5 else Node(op, leaf, inner)
+        if is_valid(tree, level):
+            return make_expression_problem(tree, level)
+    raise RuntimeError(f"no valid {operation or ''} expression found for level {level}")
+
+
+def fresh_expression_problem(level, seen=None, operation=None, rng=random, skips=5):
+    """Generate a multi-step problem, retrying a few times to avoid expressions in ``seen``"""
+    problem = generate_expression_problem(level, operation, rng)
+    for _ in range(skips):
+        if seen is None or problem['expression'] not in seen:
+            break
+        problem = generate_expression_problem(level, operation, rng)
+    if seen is not None:
+        seen.add(problem['expression'])
+    return problem
+
+
+def parse_answer(text):
+    """Parse ``"7"``, ``"2.75"``, ``"11/4"`` or ``"2 3/4"`` into a ``Fraction``; ``None`` if it is not one of those.
+
+    Only a leading sign is allowed, so ``"2 -3/4"`` is rejected, as are
+    exponents and anything longer than ``MAX_ANSWER_LENGTH`` characters.
+    """
+    if isinstance(text, Fraction):
+        return text
+    if isinstance(text, int):
+        return Fraction(text)
+    if isinstance(text, float):
+        return Fraction(repr(text))
+    text = str(text).strip().replace(",", "")
+    match = ANSWER_PATTERN.fullmatch(text) if len(text) <= MAX_ANSWER_LENGTH else None
+    if match is None:
+        return None
+    sign, whole, numerator, denominator, top, bottom, decimal = match.groups()
+    try:
+        if whole is not None:
+            value = int(whole) + Fraction(int(numerator), int(denominator))
+        elif top is not None:
+            value = Fraction(int(top), int(bottom))
+        else:
+            value = Fraction(decimal)
+    except ZeroDivisionError:
+        return None
+    return -value if sign == "-" else value
+
+
+def answers_match(guess, problem):
+    """Whether ``guess`` (a number or typed text) answers ``problem``, within its tolerance"""
+    answer = problem['answer']
+    if type(guess) is int and type(answer) is int:
+        return guess == answer
+    value = parse_answer(guess)
+    if value is None:
+        return False
+    return abs(value - answer) <= problem.get('tolerance', 0)
+
+
+class ExpressionBatch:
+    """Two-step problems stored as NumPy arrays of shapes, operators and reduced leaf fractions.
+
+    ``shapes`` is 0 for ``(x op y) op z`` and 1 for ``x op (y op z)``;
+    ``ops[:, 0]`` is the inner operator and ``ops[:, 1]`` the last step.
+    Trees and text are only built when a problem is read.
+    """
+
+    __slots__ = ('level', 'shapes', 'ops', 'num', 'den', 'answer_num', 'answer_den')
+
+    def __init__(self, level, shapes, ops, num, den, answer_num, answer_den):
+        self.level = level
+        self.shapes = shapes
+        self.ops = ops
+        self.num = num
+        self.den = den
+        self.answer_num = answer_num
+        self.answer_den = answer_den
+
+    def __len__(self):
+        return len(self.shapes)
+
+    def tree(self, i):
+        x, y, z = (Leaf(Fraction(int(n), int(d))) for n, d in zip(self.num[i], self.den[i]))
+        inner, last = OPERATIONS[self.ops[i, 0]], OPERATIONS[self.ops[i, 1]]
+        if self.shapes[i] == 0:
+            return Node(last, Node(inner, x, y), z)
+        return Node(last, x, Node(inner, y, z))
+
+    def answer(self, i):
+        return Fraction(int(self.answer_num[i]), int(self.answer_den[i]))
+
+    def __getitem__(self, i):
+        return make_expression_problem(self.tree(i), self.level, self.answer(i))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def expression(self, i):
+        tree = self.tree(i)
+        return to_text(tree, tree_kind(tree, self.level))
+
+    def keys(self):
+        """Each problem packed into one int64, as ``expression_tree`` reads it"""
+        return _keys(self.shapes, self.ops, self.num, self.den)
+
+
+def _reduce(num, den):
+    g = np.maximum(np.gcd(num, den), 1)
+    sign = np.where(den < 0, -1, 1)
+    return sign * num // g, sign * den // g
+
+
+def _apply(op, n1, d1, n2, d2):
+    """Vectorised ``n1/d1 op n2/d2`` on reduced fractions"""
+    num = np.select([op == 0, op == 1, op == 2], [n1 * d2 + n2 * d1, n1 * d2 - n2 * d1, n1 * n2], n1 * d2)
+    den = np.where(op == 3, d1 * n2, d1 * d2)
+    return _reduce(num, den)
+
+
+def _valid(num, den, style):
+    ok = (num > 0) & (den > 0) & (num <= MAX_ANSWER * den) & (den <= MAX_DENOMINATOR)
+    if style is None:
+        ok &= den == 1
+    elif style == "decimal":
+        ok &= (10 ** DECIMAL_PLACES) % np.maximum(den, 1) == 0
+    return ok
+
+
+def _draw_leaves(rng, level, m):
+    style = leaf_style(level)
+    top = leaf_max(level)
+    num = rng.integers(2, top, size=(m, 3), endpoint=True)
+    den = np.ones((m, 3), dtype=np.int64)
+    if style is not None:
+        special = rng.random((m, 3)) < 0.5
+        k = int(special.sum())
+        if style == "decimal":
+            num[special] = rng.integers(1, 10 * top, size=k, endpoint=True)
+            den[special] = 10
+        else:
+            d = rng.integers(2, MAX_LEAF_DENOMINATOR, size=k, endpoint=True)
+            num[special] = rng.integers(1, 2 * d)
+            den[special] = d
+        num, den = _reduce(num, den)
+    return num, den
+
+
+def _keys(shapes, ops, num, den):
+    """Pack a problem into one int64: 1 bit of shape, 2 bits per operator, 9 + 7 bits per leaf"""
+    key = shapes.astype(np.int64) << 4 | ops[:, 0].astype(np.int64) << 2 | ops[:, 1]
+    for j in range(3):
+        key = key << 16 | num[:, j] << 7 | den[:, j]
+    return key
+
+
+def expression_tree(key):
+    """The tree of a problem packed by ``ExpressionBatch.keys``"""
+    values = []
+    for _ in range(3):
+        values.append(Leaf(Fraction(key >> 7 & 0x1FF, key & 0x7F)))
+        key >>= 16
+    z, y, x = values
+    inner, last = OPERATIONS[key >> 2 & 3], OPERATIONS[key & 3]
+    if key >> 4 == 0:
+        return Node(last, Node(inner, x, y), z)
+    return Node(last, x, Node(inner, y, z))
+
+
+def generate_expression_problems(level, n, seed=None, oversample=2.0):
+    """Generate ``n`` distinct valid two-step problems for a level in a few vectorised passes.
+
+    Low levels have only tens of thousands of distinct problems; when a
+    level runs out the batch holds every problem found, fewer than ``n``.
+    """
+    if level < MULTISTEP_MIN_LEVEL:
+        raise ValueError(f"multi-step problems start at level {MULTISTEP_MIN_LEVEL}")
+    if 10 * leaf_max(level) >= 1 << 9:
+        raise ValueError(f"leaves for level {level} do not fit the problem key")
+    rng = np.random.default_rng(seed)
+    style = leaf_style(level)
+    parts = []
+    seen = np.empty(0, dtype=np.int64)
+    found = stalls = 0
+    while found < n:
+        m = int((n - found) * oversample) + 4096
+        shapes = rng.integers(0, 2, size=m, dtype=np.int8)
+        ops = rng.integers(0, len(OPERATIONS), size=(m, 2), dtype=np.int8)
+        num, den = _draw_leaves(rng, level, m)
+
+        # shape 0 combines leaves 0 and 1 first, shape 1 leaves 1 and 2
+        first = shapes == 0
+        inner_n, inner_d = _apply(ops[:, 0], np.where(first, num[:, 0], num[:, 1]),
+                                  np.where(first, den[:, 0], den[:, 1]),
+                                  np.where(first, num[:, 1], num[:, 2]), np.where(first, den[:, 1], den[:, 2]))
+        left_n = np.where(first, inner_n, num[:, 0])
+        left_d = np.where(first, inner_d, den[:, 0])
+        right_n = np.where(first, num[:, 2], inner_n)
+        right_d = np.where(first, den[:, 2], inner_d)
+        ok = _valid(inner_n, inner_d, style)
+        answer_n, answer_d = _apply(ops[:, 1], left_n, left_d, right_n, right_d)
+        ok &= _valid(answer_n, answer_d, style)
+
+        # multiplying or dividing by a leaf of 1 is not a step
+        ok &= (num != den).all(axis=1)
+        keys = _keys(shapes, ops, num, den)[ok]
+        # keys already in ``seen`` come first, so only first occurrences past them are new
+        _, first = np.unique(np.concatenate([seen, keys]), return_index=True)
+        keep = (np.sort(first[first >= len(seen)]) - len(seen))[:n - found]
+        rows = np.flatnonzero(ok)[keep]
+        seen = np.concatenate([seen, keys[keep]])
+        parts.append((shapes[rows], ops[rows], num[rows], den[rows], answer_n[rows], answer_d[rows]))
+        found += len(rows)
+        stalls = 0 if len(rows) else stalls + 1
+        if stalls == MAX_STALLS:
+            break
+    return ExpressionBatch(level, *(np.concatenate(column) for column in zip(*parts)))
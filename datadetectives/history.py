@@ -0,0 +1,209 @@
+"""Columnar store for a detective's attempt history.
+
+Replaces the list of dicts kept in ``st.session_state.problem_history``.
+Each column is a typed NumPy array that grows by doubling, and running
+totals make counts and accuracy O(1).
+"""
+import time
+
+import numpy as np
+
+from .engine import OPERATION_CODES, OPERATIONS
+from .expressions import KIND_CODES, KINDS
+
+COLUMNS = {
+    'operation': np.int8,
+    'a': np.int32,
+    'b': np.int32,
+    'level': np.int16,
+    'correct': np.bool_,
+    'points': np.int32,
+    'timestamp_ms': np.int64,
+    'solve_ms': np.int32,  # time from the problem being shown to the answer; -1 if not measured
+    'kind': np.int8,  # index into KINDS; for multi-step problems a and b hold the answer as a fraction
+}
+
+# Values for columns missing from attempts saved by older releases
+COLUMN_DEFAULTS = {'solve_ms': -1, 'kind': 0}
+
+_CORRECT = list(COLUMNS).index('correct')
+_POINTS = list(COLUMNS).index('points')
+
+
+def now_ms():
+    """Current wall-clock time as epoch milliseconds"""
+    return time.time_ns() // 1_000_000
+
+
+def describe(operation, a, b, kind=0):
+    """Text for one stored attempt; multi-step problems only keep their answer"""
+    if not kind:
+        return f"{a} {OPERATIONS[operation]} {b}"
+    answer = a if b == 1 else f"{a}/{b}"
+    return f"{KINDS[kind]} ({OPERATIONS[operation]} last) = {answer}"
+
+
+class ProblemHistory:
+    """Append-only attempt history backed by typed arrays."""
+
+    __slots__ = ('_columns', '_size', 'correct_count', 'total_points')
+
+    def __init__(self, capacity=64):
+        self._columns = {name: np.empty(capacity, dtype=dtype) for name, dtype in COLUMNS.items()}
+        self._size = 0
+        self.correct_count = 0
+        self.total_points = 0
+
+    @classmethod
+    def from_arrays(cls, columns):
+        """Build a history from a mapping of column name to array-like"""
+        size = len(columns['operation'])
+        history = cls(capacity=max(size, 1))
+        for name, dtype in COLUMNS.items():
+            history._columns[name][:size] = np.asarray(columns[name], dtype=dtype)
+        history._size = size
+        history.correct_count = int(history._columns['correct'][:size].sum())
+        history.total_points = int(history._columns['points'][:size].sum())
+        return history
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build a history from a sequence of tuples in ``COLUMNS`` order"""
+        data = np.array(rows, dtype=np.int64).reshape(len(rows), len(COLUMNS))
+        return cls.from_arrays({name: data[:, i] for i, name in enumerate(COLUMNS)})
+
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self._size > 0
+
+    @property
+    def capacity(self):
+        return len(self._columns['operation'])
+
+    def _grow(self):
+        new_capacity = max(self.capacity * 2, 1)
+        for name, column in self._columns.items():
+            grown = np.empty(new_capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+
+    def append(self, problem, correct, points, timestamp_ms=None, solve_ms=-1):
+        """Record one attempt at ``problem`` (a dict from ``generate_problem``)"""
+        if self._size == self.capacity:
+            self._grow()
+        kind = KIND_CODES[problem.get('kind', "single")]
+        if kind:
+            answer = problem['answer']
+            a, b = answer.numerator, answer.denominator
+        else:
+            a, _, b = problem['expression'].split(" ")
+        i = self._size
+        cols = self._columns
+        cols['operation'][i] = OPERATION_CODES[problem['operation']]
+        cols['a'][i] = int(a)
+        cols['b'][i] = int(b)
+        cols['level'][i] = problem['level']
+        cols['correct'][i] = correct
+        cols['points'][i] = points
+        cols['timestamp_ms'][i] = now_ms() if timestamp_ms is None else timestamp_ms
+        cols['solve_ms'][i] = solve_ms
+        cols['kind'][i] = kind
+        self._size = i + 1
+        if correct:
+            self.correct_count += 1
+        self.total_points += points
+
+    def append_row(self, row):
+        """Record one attempt given as a tuple in ``COLUMNS`` order, as ``row`` returns it"""
+        if self._size == self.capacity:
+            self._grow()
+        i = self._size
+        for column, value in zip(self._columns.values(), row):
+            column[i] = value
+        self._size = i + 1
+        if row[_CORRECT]:
+            self.correct_count += 1
+        self.total_points += row[_POINTS]
+
+    def extend(self, other):
+        """Append every attempt in another ``ProblemHistory``"""
+        size = self._size + len(other)
+        while self.capacity < size:
+            self._grow()
+        for name, column in self._columns.items():
+            column[self._size:size] = other.column(name)
+        self._size = size
+        self.correct_count += other.correct_count
+        self.total_points += other.total_points
+
+    @property
+    def accuracy(self):
+        """Percentage of attempts answered correctly"""
+        return (self.correct_count / self._size * 100) if self._size else 0.0
+
+    def column(self, name, last=None):
+        """Return a read-only view of one column, optionally only the last ``last`` rows"""
+        start = 0 if last is None else max(self._size - last, 0)
+        view = self._columns[name][start:self._size]
+        view.flags.writeable = False
+        return view
+
+    def arrays(self, last=None):
+        """Return read-only views of every column"""
+        return {name: self.column(name, last) for name in COLUMNS}
+
+    def expressions(self, last=None):
+        ops = self.column('operation', last)
+        a = self.column('a', last)
+        b = self.column('b', last)
+        kinds = self.column('kind', last)
+        return [describe(op, x, y, kind) for op, x, y, kind in zip(ops, a, b, kinds)]
+
+    def to_frame(self, last=None):
+        """Return the history as a DataFrame shaped like the old list of dicts"""
+        import pandas as pd
+
+        cols = self.arrays(last)
+        return pd.DataFrame({
+            'problem': self.expressions(last),
+            'correct': cols['correct'],
+            'level': cols['level'],
+            'points': cols['points'],
+            'timestamp': pd.to_datetime(cols['timestamp_ms'], unit='ms'),
+        }, copy=False)
+
+    def row(self, i):
+        """Return attempt ``i`` as a tuple of ints in ``COLUMNS`` order"""
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError("history index out of range")
+        return tuple(int(self._columns[name][i]) for name in COLUMNS)
+
+    def rows(self):
+        """Return every attempt as a list of tuples in ``COLUMNS`` order"""
+        return list(zip(*(self.column(name).tolist() for name in COLUMNS)))
+
+    def record(self, i):
+        """Return attempt ``i`` as a dict in the old list-of-dicts format"""
+        from datetime import datetime
+
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError("history index out of range")
+        cols = self._columns
+        return {
+            'problem': describe(cols['operation'][i], cols['a'][i], cols['b'][i], cols['kind'][i]),
+            'correct': bool(cols['correct'][i]),
+            'level': int(cols['level'][i]),
+            'points': int(cols['points'][i]),
+            'timestamp': datetime.fromtimestamp(cols['timestamp_ms'][i] / 1000),
+        }
+
+    @property
+    def nbytes(self):
+        """Bytes held by the column buffers, including unused capacity"""
+        return sum(column.nbytes for column in self._columns.values())
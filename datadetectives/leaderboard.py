@@ -0,0 +1,196 @@
+"""Academy leaderboard ranking engine.
+
+``Leaderboard`` counts detectives per point value in a Fenwick tree, so a
+score update, "what is my rank" and locating each step of a top-K query are
+all O(log P) where P is the highest score. ``MonthlyLeaderboard`` keeps one
+board per calendar month to back the "(This Month)" view.
+"""
+import threading
+from datetime import datetime, timezone
+
+from .history import now_ms
+
+
+class Leaderboard:
+    """Order-statistic index over integer point totals."""
+
+    __slots__ = ('_tree', '_buckets', '_points', '_levels')
+
+    def __init__(self, capacity=1024):
+        self._tree = [0] * (capacity + 1)
+        self._buckets = {}
+        self._points = {}
+        self._levels = {}
+
+    def __len__(self):
+        return len(self._points)
+
+    def __contains__(self, name):
+        return name in self._points
+
+    def points(self, name):
+        return self._points.get(name, 0)
+
+    def level(self, name):
+        return self._levels.get(name)
+
+    # --- Fenwick tree over point buckets (bucket i holds score i - 1) ---
+    def _resize(self, points):
+        size = len(self._tree) - 1
+        while size <= points:
+            size *= 2
+        tree = [0] * (size + 1)
+        for score, names in self._buckets.items():
+            i = score + 1
+            while i <= size:
+                tree[i] += len(names)
+                i += i & -i
+        self._tree = tree
+
+    def _add(self, points, delta):
+        tree = self._tree
+        i = points + 1
+        n = len(tree)
+        while i < n:
+            tree[i] += delta
+            i += i & -i
+
+    def _count_at_most(self, points):
+        """Number of detectives with a score of ``points`` or less"""
+        tree = self._tree
+        i = min(points + 1, len(tree) - 1)
+        total = 0
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def _kth_lowest_score(self, k):
+        """Score of the ``k``-th lowest detective (1-based)"""
+        tree = self._tree
+        n = len(tree) - 1
+        pos = 0
+        step = 1 << n.bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= n and tree[nxt] < k:
+                pos = nxt
+                k -= tree[nxt]
+            step >>= 1
+        return pos
+
+    # --- Public API ---
+    def update(self, name, points, level=None):
+        """Set ``name``'s score to ``points``"""
+        old = self._points.get(name)
+        if old is not None:
+            if old == points:
+                if level is not None:
+                    self._levels[name] = level
+                return
+            bucket = self._buckets[old]
+            del bucket[name]
+            if not bucket:
+                del self._buckets[old]
+            self._add(old, -1)
+        if points >= len(self._tree) - 1:
+            self._resize(points)
+        self._points[name] = points
+        self._buckets.setdefault(points, {})[name] = None
+        self._add(points, 1)
+        if level is not None:
+            self._levels[name] = level
+
+    def add(self, name, delta, level=None):
+        """Add ``delta`` points to ``name``'s score"""
+        self.update(name, self._points.get(name, 0) + delta, level)
+
+    def remove(self, name):
+        points = self._points.pop(name)
+        self._levels.pop(name, None)
+        bucket = self._buckets[points]
+        del bucket[name]
+        if not bucket:
+            del self._buckets[points]
+        self._add(points, -1)
+
+    def rank(self, name):
+        """1-based rank of ``name`` (ties share a rank), or ``None`` if unranked"""
+        points = self._points.get(name)
+        if points is None:
+            return None
+        return len(self._points) - self._count_at_most(points) + 1
+
+    def top(self, k):
+        """Return up to ``k`` ``(name, points, level)`` tuples, highest score first"""
+        result = []
+        remaining = len(self._points)
+        while remaining and len(result) < k:
+            score = self._kth_lowest_score(remaining)
+            names = self._buckets[score]
+            for name in names:
+                if len(result) == k:
+                    break
+                result.append((name, score, self._levels.get(name)))
+            remaining -= len(names)
+        return result
+
+
+def month_key(timestamp_ms=None):
+    """Return the ``YYYY-MM`` month containing an epoch-ms timestamp (UTC)"""
+    moment = datetime.fromtimestamp((now_ms() if timestamp_ms is None else timestamp_ms) / 1000, tz=timezone.utc)
+    return f"{moment.year:04d}-{moment.month:02d}"
+
+
+def month_start_ms(timestamp_ms=None):
+    """Epoch ms at the start of the month containing ``timestamp_ms`` (UTC)"""
+    moment = datetime.fromtimestamp((now_ms() if timestamp_ms is None else timestamp_ms) / 1000, tz=timezone.utc)
+    return int(moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0).timestamp() * 1000)
+
+
+class MonthlyLeaderboard:
+    """Thread-safe set of per-month leaderboards, keeping the most recent ``keep`` months."""
+
+    def __init__(self, keep=3):
+        self.keep = keep
+        self._boards = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_store(cls, store, keep=3):
+        """Load this month's totals from a ``DetectiveStore``"""
+        leaderboard = cls(keep)
+        since = month_start_ms()
+        board = leaderboard._board(month_key(since))
+        for name, points, level in store.points_since(since):
+            board.update(name, points, level)
+        return leaderboard
+
+    def _board(self, month):
+        board = self._boards.get(month)
+        if board is None:
+            board = self._boards[month] = Leaderboard()
+            for old in sorted(self._boards)[:-self.keep]:
+                del self._boards[old]
+        return board
+
+    def record(self, name, points, level, timestamp_ms=None):
+        """Credit ``points`` earned at ``timestamp_ms`` to ``name``'s monthly score"""
+        with self._lock:
+            self._board(month_key(timestamp_ms)).add(name, points, level)
+
+    def rank(self, name, month=None):
+        with self._lock:
+            return self._board(month or month_key()).rank(name)
+
+    def top(self, k, month=None):
+        with self._lock:
+            return self._board(month or month_key()).top(k)
+
+    def standing(self, name, month=None):
+        """Return ``(rank, points, level)`` for ``name``, or ``None`` if unranked"""
+        with self._lock:
+            board = self._board(month or month_key())
+            if name not in board:
+                return None
+            return board.rank(name), board.points(name), board.level(name)
@@ -0,0 +1,207 @@
+"""Low-overhead latency histograms with a Prometheus text dump.
+
+Histograms have fixed bucket bounds, so an observation is one bisect and a
+few increments under a lock. ``REGISTRY`` is shared by the whole process:
+the app times each rerun and tab body, ``generate_problem`` is wrapped with
+``REGISTRY.timed`` and ``check_answer`` records how long each problem took
+to solve. Set ``DETECTIVES_METRICS_FILE`` to have the app write the
+Prometheus text format there for a node exporter or scraper to pick up.
+"""
+import bisect
+import logging
+import os
+import threading
+import time
+from functools import wraps
+
+# 1 µs to 10 s in 1-2.5-5 steps
+LATENCY_BUCKETS = tuple(float(f"{m}e{e}") for e in range(-6, 1) for m in (1, 2.5, 5)) + (10.0,)
+SOLVE_BUCKETS = (1, 2, 5, 10, 15, 20, 30, 45, 60, 90, 120, 300)
+
+log = logging.getLogger(__name__)
+
+METRICS_FILE = os.environ.get("DETECTIVES_METRICS_FILE")
+DUMP_INTERVAL = 5.0
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    __slots__ = ('name', 'labels', 'bounds', 'counts', 'sum', 'count', '_lock')
+
+    def __init__(self, name, labels=(), bounds=LATENCY_BUCKETS):
+        self.name = name
+        self.labels = labels
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+    def summary(self):
+        """One-line count, p50 and p95 for the debug panel"""
+        if not self.count:
+            return "no samples"
+        return f"n={self.count:,}, p50 {_duration(self.quantile(0.5))}, p95 {_duration(self.quantile(0.95))}"
+
+    def quantile(self, q):
+        """Estimate a quantile by linear interpolation inside its bucket, as ``histogram_quantile`` does"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                if i == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[i - 1] if i else 0.0
+                return lower + (self.bounds[i] - lower) * (rank - seen) / n
+            seen += n
+        return self.bounds[-1]
+
+
+class Timer:
+    """Context manager that observes its elapsed time into a histogram."""
+
+    __slots__ = ('histogram', 'enabled', '_start')
+
+    def __init__(self, histogram, enabled=True):
+        self.histogram = histogram
+        self.enabled = enabled
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.enabled:
+            self.histogram.observe(time.perf_counter() - self._start)
+
+
+class Registry:
+    """Named histograms, optionally labelled, rendered as Prometheus text."""
+
+    def __init__(self, prefix="detectives_"):
+        self.prefix = prefix
+        self.enabled = True
+        self._histograms = {}
+        self._help = {}
+        self._lock = threading.Lock()
+        self._last_dump = 0.0
+        self._dump_lock = threading.Lock()
+
+    def histogram(self, name, help="", buckets=LATENCY_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram(name, key[1], buckets)
+                    if help:
+                        self._help.setdefault(name, help)
+        return histogram
+
+    def observe(self, name, value, help="", buckets=LATENCY_BUCKETS, **labels):
+        if self.enabled:
+            self.histogram(name, help, buckets, **labels).observe(value)
+
+    def timer(self, name, help="", **labels):
+        """``with REGISTRY.timer("rerun_seconds"):`` times the block"""
+        return Timer(self.histogram(name, help, **labels), self.enabled)
+
+    def timed(self, name, help=""):
+        """Decorator that times every call to the wrapped function"""
+        def decorate(fn):
+            histogram = self.histogram(name, help)
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - start)
+            return wrapper
+        return decorate
+
+    def histograms(self):
+        """Every histogram, sorted by name and labels"""
+        with self._lock:
+            return [self._histograms[key] for key in sorted(self._histograms)]
+
+    def to_prometheus(self):
+        """Render every histogram in the Prometheus text exposition format"""
+        lines = []
+        described = set()
+        for histogram in self.histograms():
+            name = self.prefix + histogram.name
+            if name not in described:
+                described.add(name)
+                if histogram.name in self._help:
+                    lines.append(f"# HELP {name} {self._help[histogram.name]}")
+                lines.append(f"# TYPE {name} histogram")
+            with histogram._lock:
+                counts = list(histogram.counts)
+                total, count = histogram.sum, histogram.count
+            cumulative = 0
+            for bound, n in zip(histogram.bounds + (float('inf'),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float('inf') else repr(float(bound))
+                lines.append(f"{name}_bucket{_labels(histogram.labels, le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(histogram.labels)} {total!r}")
+            lines.append(f"{name}_count{_labels(histogram.labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path=METRICS_FILE, interval=DUMP_INTERVAL):
+        """Atomically write the Prometheus text to ``path`` at most once per ``interval`` seconds.
+
+        Sessions call this on every rerun, so a dump already running in
+        another thread is skipped rather than waited for, and a failed write
+        is logged rather than raised.
+        """
+        if not path or not self._dump_lock.acquire(blocking=False):
+            return False
+        try:
+            now = time.monotonic()
+            if now - self._last_dump < interval:
+                return False
+            self._last_dump = now
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                f.write(self.to_prometheus())
+            os.replace(tmp, path)
+            return True
+        except OSError:
+            log.exception("could not write metrics to %s", path)
+            return False
+        finally:
+            self._dump_lock.release()
+
+
+def _duration(seconds):
+    return f"{seconds:.1f} s" if seconds >= 1 else f"{seconds * 1000:.2f} ms"
+
+
+def _labels(labels, le=None):
+    pairs = list(labels) + ([('le', le)] if le is not None else [])
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+REGISTRY = Registry()
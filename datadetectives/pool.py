@@ -0,0 +1,235 @@
+"""Pre-generated problem pools with a background refill thread.
+
+Levels above ``MAX_DIFFICULTY`` share operand ranges, so the pool keeps one
+bounded deque per difficulty, operation and range scale, letting callers
+ask for a specific operation. Unscaled ranges are filled up front; a deque
+for another scale is created and filled the first time it is asked for, so
+callers should keep to a small set of scales (the adaptive staircase steps).
+Multi-step problems from ``MULTISTEP_MIN_LEVEL`` get their own deques per
+difficulty and last operation, filled with ``generate_expression_problems``.
+Each entry is a compact tuple, ``(operation, a, b)`` or a packed expression
+with its answer; the problem dict is only built when it is handed to a
+student.
+"""
+import os
+import random
+import threading
+import time
+from collections import deque
+from fractions import Fraction
+
+import numpy as np
+
+from .engine import MAX_DIFFICULTY, OPERATION_CODES, OPERATIONS, generate_problem, generate_problems, make_problem
+from .expressions import (MULTISTEP_MIN_LEVEL, expression_tree, fresh_expression_problem,
+                          generate_expression_problems, make_expression_problem)
+
+DEFAULT_SIZE = int(os.environ.get("DETECTIVES_POOL_SIZE", 256))
+DEFAULT_LOW_WATER = DEFAULT_SIZE // 4
+
+# How many pooled problems to skip looking for one the student has not seen
+MAX_SKIPS = 16
+
+# The scale slot of the multi-step deques
+MULTISTEP = None
+
+
+class ProblemPool:
+    """Thread-safe per-difficulty problem pools, refilled below a low-water mark.
+
+    ``size`` and ``low_water`` are per difficulty and scale, and split evenly
+    across the operations.
+    """
+
+    def __init__(self, size=DEFAULT_SIZE, low_water=DEFAULT_LOW_WATER, seed=None):
+        if not 0 <= low_water < size:
+            raise ValueError("low_water must be between 0 and size")
+        self.size = size
+        self.low_water = low_water
+        self._op_size = max(size // len(OPERATIONS), 1)
+        self._op_low_water = low_water // len(OPERATIONS)
+        self._rng = np.random.default_rng(seed)
+        self._pools = {}
+        self._queued = {}
+        self._wanted = {(d, 1.0) for d in range(1, MAX_DIFFICULTY + 1)}
+        self._wanted.update((d, MULTISTEP) for d in range(MULTISTEP_MIN_LEVEL, MAX_DIFFICULTY + 1))
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self.refills = 0
+        self.refill_seconds = 0.0
+        self.last_refill_seconds = 0.0
+        self.max_refill_seconds = 0.0
+
+        self._worker = threading.Thread(target=self._run, name="problem-pool-refill", daemon=True)
+        self._worker.start()
+
+    @staticmethod
+    def difficulty(level):
+        return max(1, min(level, MAX_DIFFICULTY))
+
+    def _slot(self, d, code, scale):
+        """The deque and queued set for one difficulty, operation and scale; call with the lock held.
+
+        ``scale`` is ``MULTISTEP`` for multi-step problems ending with the operation.
+        """
+        key = (d, code, scale)
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = deque()
+            self._queued[key] = set()
+        return pool, self._queued[key]
+
+    def pop(self, level, seen=None, operation=None, scale=1.0):
+        """Return a problem dict for ``level``, avoiding expressions in ``seen`` where possible.
+
+        ``seen`` is the caller's per-session set of expressions and is updated
+        with the returned problem. ``operation`` defaults to a uniform random
+        choice and ``scale`` stretches the operand range as in
+        ``generate_problem``. Falls back to ``generate_problem`` when the pool
+        is empty.
+        """
+        if operation is None:
+            operation = random.choice(OPERATIONS)
+        problem = self._pop(level, seen, operation, scale,
+                            lambda item: make_problem(OPERATIONS[item[0]], item[1], item[2], level))
+        if problem is None:
+            problem = fresh_problem(level, seen, operation, scale)
+        return problem
+
+    def pop_multistep(self, level, seen=None, operation=None):
+        """Return a two-step problem whose last step is ``operation``, like ``pop``.
+
+        ``level`` must be at least ``MULTISTEP_MIN_LEVEL``. Falls back to
+        ``generate_expression_problem`` when the pool is empty.
+        """
+        if operation is None:
+            operation = random.choice(OPERATIONS)
+        problem = self._pop(level, seen, operation, MULTISTEP, lambda item: make_expression_problem(
+            expression_tree(item[0]), level, Fraction(item[1], item[2])))
+        if problem is None:
+            problem = fresh_expression_problem(level, seen, operation)
+        return problem
+
+    def _pop(self, level, seen, operation, scale, build):
+        """A pooled problem built with ``build`` and added to ``seen``, or None on a miss"""
+        d = self.difficulty(level)
+        problem = None
+        with self._cond:
+            pool, queued = self._slot(d, OPERATION_CODES[operation], scale)
+            for _ in range(MAX_SKIPS):
+                if not pool:
+                    break
+                item = pool.popleft()
+                queued.discard(item)
+                candidate = build(item)
+                if seen is None or candidate['expression'] not in seen:
+                    problem = candidate
+                    break
+                self.skipped += 1
+            if problem is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+            if (not pool or len(pool) < self._op_low_water) and (d, scale) not in self._wanted:
+                self._wanted.add((d, scale))
+                self._cond.notify()
+
+        if problem is not None and seen is not None:
+            seen.add(problem['expression'])
+        return problem
+
+    def __len__(self):
+        with self._cond:
+            return sum(len(pool) for pool in self._pools.values())
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        """Snapshot of pool size, hit rate and refill latency"""
+        return {
+            'queued': len(self),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+            'skipped_seen': self.skipped,
+            'refills': self.refills,
+            'mean_refill_ms': self.refill_seconds / self.refills * 1000 if self.refills else 0.0,
+            'last_refill_ms': self.last_refill_seconds * 1000,
+            'max_refill_ms': self.max_refill_seconds * 1000,
+        }
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._worker.join()
+
+    def wait_full(self, timeout=None):
+        """Block until no refill is pending (used by benchmarks)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._cond:
+                if not self._wanted:
+                    return True
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.001)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._wanted and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                # Single-step refills first; MULTISTEP sorts after every scale
+                wanted = sorted(self._wanted, key=lambda key: (key[1] is MULTISTEP, key[0], key[1] or 0.0))
+            for d, scale in wanted:
+                self._refill(d, scale)
+                with self._cond:
+                    self._wanted.discard((d, scale))
+
+    def _refill(self, d, scale):
+        start = time.perf_counter()
+        with self._cond:
+            need = max(self._op_size - len(self._slot(d, op, scale)[0]) for op in range(len(OPERATIONS)))
+        if need <= 0:
+            return
+        seed = int(self._rng.integers(2**63))
+        if scale is MULTISTEP:
+            batch = generate_expression_problems(d, need * len(OPERATIONS) * 2, seed=seed)
+            fresh = zip(batch.ops[:, 1].tolist(),
+                        zip(batch.keys().tolist(), batch.answer_num.tolist(), batch.answer_den.tolist()))
+        else:
+            batch = generate_problems(d, need * len(OPERATIONS) * 2, seed=seed, scale=scale)
+            fresh = zip(batch.operations.tolist(), zip(batch.operations.tolist(), batch.a.tolist(), batch.b.tolist()))
+        with self._cond:
+            for code, item in fresh:
+                pool, queued = self._slot(d, code, scale)
+                if len(pool) < self._op_size and item not in queued:
+                    queued.add(item)
+                    pool.append(item)
+        elapsed = time.perf_counter() - start
+        self.refills += 1
+        self.refill_seconds += elapsed
+        self.last_refill_seconds = elapsed
+        self.max_refill_seconds = max(self.max_refill_seconds, elapsed)
+
+
+def fresh_problem(level, seen=None, operation=None, scale=1.0, rng=random):
+    """Generate a problem directly, retrying a few times to avoid expressions in ``seen``"""
+    problem = generate_problem(level, operation, scale, rng)
+    for _ in range(MAX_SKIPS):
+        if seen is None or problem['expression'] not in seen:
+            break
+        problem = generate_problem(level, operation, scale, rng)
+    if seen is not None:
+        seen.add(problem['expression'])
+    return problem
@@ -0,0 +1,267 @@
+"""Pre-rendered HTML for the Streamlit app.
+
+Streamlit re-executes the app script on every click, but imported modules
+run once per server process. Static blocks are therefore minified here once
+and cached by content hash, and the dynamic cards are compiled into
+``HtmlTemplate`` objects so a rerun only fills their slots.
+"""
+import hashlib
+import re
+from string import Formatter
+
+_WHITESPACE = re.compile(r"\s+")
+_BETWEEN_TAGS = re.compile(r">\s*\n\s*<")
+
+_CACHE = {}
+SOURCES = {}  # minified block -> original source, for size comparisons
+
+
+def minify(html):
+    """Collapse whitespace so the block is sent as a single compact line.
+
+    Line breaks between tags are dropped; spaces inside a line are kept.
+    """
+    return _WHITESPACE.sub(" ", _BETWEEN_TAGS.sub("><", html)).strip()
+
+
+def content_key(html):
+    return hashlib.sha1(html.encode("utf-8")).hexdigest()
+
+
+def cached_html(html):
+    """Return the minified form of ``html``, computed once per distinct content"""
+    key = content_key(html)
+    rendered = _CACHE.get(key)
+    if rendered is None:
+        rendered = _CACHE[key] = minify(html)
+        SOURCES[rendered] = html
+    return rendered
+
+
+class HtmlTemplate:
+    """An HTML fragment split once into literal text and named slots."""
+
+    __slots__ = ('source', '_literals', '_fields')
+
+    def __init__(self, source):
+        self.source = source
+        self._literals = []
+        self._fields = []
+        for literal, field, spec, conversion in Formatter().parse(cached_html(source)):
+            if spec or conversion:
+                raise ValueError(f"template slot {field!r} may not use a format spec or conversion")
+            self._literals.append(literal)
+            self._fields.append(field)
+
+    def render(self, **slots):
+        parts = []
+        for literal, field in zip(self._literals, self._fields):
+            parts.append(literal)
+            if field is not None:
+                parts.append(str(slots[field]))
+        return "".join(parts)
+
+
+# --- Static blocks ---
+STYLE = cached_html("""
+<style>
+    .main-header {
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        color: white;
+        padding: 2rem;
+        border-radius: 15px;
+        text-align: center;
+        margin-bottom: 2rem;
+        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+    }
+    .detective-avatar {
+        width: 100px;
+        height: 100px;
+        border-radius: 50%;
+        margin: 0 auto 1rem;
+        display: flex;
+        align-items: center;
+        justify-content: center;
+        font-size: 3em;
+    }
+    .amirah-avatar {
+        background: linear-gradient(135deg, #ff9a9e, #fecfef);
+    }
+    .amari-avatar {
+        background: linear-gradient(135deg, #a8edea, #fed6e3);
+    }
+    .detective-profile {
+        background: #f8f9fa;
+        padding: 2rem;
+        border-radius: 15px;
+        border-left: 5px solid #667eea;
+        margin: 1rem 0;
+        text-align: center;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+    }
+    .mission-card {
+        background: linear-gradient(135deg, #e3f2fd, #bbdefb);
+        padding: 2rem;
+        border-radius: 15px;
+        border-left: 5px solid #2196f3;
+        margin: 1rem 0;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+    }
+    .achievement-badge {
+        background: linear-gradient(45deg, #4CAF50, #45a049);
+        color: white;
+        padding: 0.8rem 1.2rem;
+        border-radius: 25px;
+        display: inline-block;
+        font-weight: bold;
+        margin: 0.5rem;
+        font-size: 0.9em;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.2);
+    }
+    .hint-box {
+        background: linear-gradient(135deg, #fff3cd, #ffeaa7);
+        border: 2px solid #f39c12;
+        padding: 1.5rem;
+        border-radius: 10px;
+        margin: 1rem 0;
+    }
+    .stats-card {
+        background: #f1f3f4;
+        padding: 1rem;
+        border-radius: 8px;
+        text-align: center;
+        margin: 0.5rem 0;
+    }
+    .success-message {
+        background: linear-gradient(135deg, #d4edda, #c3e6cb);
+        border: 2px solid #28a745;
+        padding: 1.5rem;
+        border-radius: 10px;
+        margin: 1rem 0;
+    }
+    .error-message {
+        background: linear-gradient(135deg, #f8d7da, #f5c6cb);
+        border: 2px solid #dc3545;
+        padding: 1.5rem;
+        border-radius: 10px;
+        margin: 1rem 0;
+    }
+</style>
+""")
+
+HEADER = cached_html("""
+<div class="main-header">
+    <div style="font-size: 4em; margin-bottom: 1rem;">🕵️‍♀️🕵️‍♂️</div>
+    <h1>🕵️ MathCraft Detective Academy</h1>
+    <p style="font-size: 1.2em;"><em>Hands-On Mathematical Thinking</em></p>
+    <p>Join Detectives Amirah and Amari on mathematical adventures!</p>
+    <p>© All Rights Reserved - Xavier Honablue M.Ed</p>
+</div>
+""")
+
+AMIRAH_PROFILE = cached_html("""
+<div class="detective-profile">
+    <div class="detective-avatar amirah-avatar">👧🏾</div>
+    <h2>🕵️‍♀️ Detective Amirah</h2>
+    <p><strong>Age:</strong> 10 years old</p>
+    <p><strong>Specialty:</strong> Addition & Multiplication Mysteries</p>
+    <p><strong>Favorite Quote:</strong> <em>"Every math problem is a puzzle waiting to be solved!"</em></p>
+    <p><strong>Detective Badge:</strong> Pattern Recognition Expert</p>
+    <p><strong>Superpower:</strong> Finding mathematical patterns in everyday situations</p>
+</div>
+""")
+
+AMARI_PROFILE = cached_html("""
+<div class="detective-profile">
+    <div class="detective-avatar amari-avatar">👦🏾</div>
+    <h2>🕵️‍♂️ Detective Amari</h2>
+    <p><strong>Age:</strong> 11 years old</p>
+    <p><strong>Specialty:</strong> Subtraction & Division Cases</p>
+    <p><strong>Favorite Quote:</strong> <em>"Math is everywhere—let's investigate together!"</em></p>
+    <p><strong>Detective Badge:</strong> Logic & Reasoning Master</p>
+    <p><strong>Superpower:</strong> Breaking down complex problems into simple steps</p>
+</div>
+""")
+
+WELCOME_PANEL = cached_html("""
+<div style="text-align: center; padding: 3rem; background: #f8f9fa; border-radius: 15px; margin: 2rem 0;">
+<h2>🕵️ Welcome to the Academy!</h2>
+<p style="font-size: 1.2em;">Join Detective Amirah and Detective Amari by entering your name in the sidebar to start solving mathematical mysteries!</p>
+<p>🎯 <strong>What you'll do:</strong> Solve exciting math problems presented as detective cases</p>
+<p>📈 <strong>How you'll grow:</strong> Earn points, level up, and unlock achievements</p>
+<p>🏆 <strong>Why it's fun:</strong> Every problem is an adventure with your detective mentors!</p>
+</div>
+""")
+
+FOOTER = cached_html("""
+<div style="text-align: center; color: #666; padding: 2rem; background: #f8f9fa; border-radius: 10px;">
+<p style="font-size: 1.2em;">🕵️‍♀️🕵️‍♂️ <strong>MathCraft Detective Academy</strong></p>
+<p><em>Hands-On Mathematical Thinking</em></p>
+<p>Join Detectives Amirah and Amari on mathematical adventures!</p>
+<p>Developed by <strong>Xavier Honablue M.Ed.</strong> | Building mathematical minds through investigation!</p>
+<p style="margin-top: 1rem; font-size: 0.9em;">🌟 Making math fun, engaging, and accessible for all young detectives! 🌟</p>
+</div>
+""")
+
+# --- Dynamic templates ---
+MISSION_CARD = HtmlTemplate("""
+<div class="mission-card">
+<h3>🕵️ Case File #{case_number}</h3>
+<h4>Detective Level: {level} | Difficulty: {stars}</h4>
+<br>
+<h4>📋 Mission Brief:</h4>
+<p style="font-size: 1.1em; line-height: 1.6;">{question}</p>
+</div>
+""")
+
+EXPRESSION_BOX = HtmlTemplate("""
+<div style="background: white; padding: 2rem; border-radius: 10px; text-align: center; border: 3px solid #2196f3; margin: 1rem 0;">
+<h1 style="color: #2196f3; font-size: 3em; margin: 0;">{expression} = ?</h1>
+</div>
+""")
+
+HINT_BOX = HtmlTemplate("""
+<div class="hint-box">
+<h4>🔍 Detective Hint:</h4>
+<p>{hint}</p>
+</div>
+""")
+
+SUCCESS_MESSAGE = HtmlTemplate("""
+<div class="success-message">
+<h3>🎉 Case Solved! Outstanding Detective Work!</h3>
+<p>✅ <strong>Correct Answer:</strong> {answer}</p>
+<p>🏆 <strong>Points Earned:</strong> {points} points</p>
+{streak_line}
+</div>
+""")
+
+STREAK_LINE = HtmlTemplate("""
+<p>🔥 <strong>Streak Bonus:</strong> +{bonus} points for {streak} correct answers in a row!</p>
+""")
+
+ERROR_MESSAGE = HtmlTemplate("""
+<div class="error-message">
+<h4>❌ Not quite right, Detective!</h4>
+<p>🎯 <strong>The correct answer is:</strong> {answer}</p>
+<p>🕵️ <strong>Keep investigating!</strong> Every great detective learns from each case.</p>
+</div>
+""")
+
+ACHIEVEMENT_BADGE = HtmlTemplate("""
+<div class="achievement-badge" title="Earned {earned_on}">
+<div style="font-size: 2em;">{emoji}</div>
+<strong>{name}</strong><br>
+<small>{description}</small>
+</div>
+""")
+
+
+def mission_card(problem, case_number):
+    return MISSION_CARD.render(case_number=case_number, level=problem['level'],
+                               stars='⭐' * min(problem['level'], 5), question=problem['question'])
+
+
+def success_message(answer, points, streak_bonus, streak):
+    streak_line = STREAK_LINE.render(bonus=streak_bonus, streak=streak) if streak_bonus > 0 else ""
+    return SUCCESS_MESSAGE.render(answer=answer, points=points, streak_line=streak_line)
@@ -0,0 +1,241 @@
+"""Spaced-repetition review of missed problems.
+
+A missed problem joins a min-heap keyed by when it is next due and comes
+back a couple of minutes later. Each later review is graded SM-2 style
+from correctness and solve time: a pass pushes the next review out to 1
+day, then 6 days, then the previous interval times the problem's
+easiness, and a miss starts the problem over. Rescheduling the problem
+just served replaces the heap's top in place. Any other change leaves a
+stale entry behind, skipped when it surfaces and swept out in one
+``heapify`` once stale entries outnumber live ones. Every push and pop is
+therefore O(log n).
+"""
+import heapq
+import itertools
+
+import numpy as np
+
+from .adaptive import TARGET_SECONDS
+from .engine import OPERATIONS, make_problem
+from .history import now_ms
+
+MINUTE_MS = 60 * 1000
+DAY_MS = 24 * 60 * MINUTE_MS
+
+# A missed problem comes back this soon, within the same session
+RELEARN_MS = 2 * MINUTE_MS
+FIRST_INTERVAL_MS = DAY_MS
+SECOND_INTERVAL_MS = 6 * DAY_MS
+
+INITIAL_EASINESS = 2.5
+MIN_EASINESS = 1.3
+# SM-2 grades run 0-5; below this a review counts as a miss
+PASSING_GRADE = 3
+
+
+def grade(correct, solve_ms=-1):
+    """SM-2 grade for one attempt: 1 for a miss, 3-5 for a pass depending on speed"""
+    if not correct:
+        return 1
+    if solve_ms < 0 or solve_ms <= TARGET_SECONDS * 1000:
+        return 5
+    return 4 if solve_ms <= 2 * TARGET_SECONDS * 1000 else 3
+
+
+def grades(correct, solve_ms):
+    """``grade`` over arrays of attempts"""
+    fast = (solve_ms < 0) | (solve_ms <= TARGET_SECONDS * 1000)
+    passed = np.where(fast, 5, np.where(solve_ms <= 2 * TARGET_SECONDS * 1000, 4, 3))
+    return np.where(correct, passed, 1)
+
+
+class ReviewItem:
+    """Schedule for one missed problem."""
+
+    __slots__ = ('_problem', 'easiness', 'repetitions', 'interval_ms', 'due_ms', 'lapses', 'entry')
+
+    def __init__(self, problem):
+        # A problem dict, or ``(operation, a, b, level)`` built into one when first served
+        self._problem = problem
+        self.easiness = INITIAL_EASINESS
+        self.repetitions = 0
+        self.interval_ms = 0
+        self.due_ms = 0
+        self.lapses = 0
+        self.entry = None
+
+    @property
+    def problem(self):
+        if isinstance(self._problem, tuple):
+            self._problem = make_problem(*self._problem)
+        return self._problem
+
+    def review(self, quality, now):
+        """Apply one graded review at ``now`` (ms since the epoch)"""
+        if quality < PASSING_GRADE:
+            self.repetitions = 0
+            self.interval_ms = RELEARN_MS
+            self.lapses += 1
+        else:
+            self.repetitions += 1
+            if self.repetitions == 1:
+                self.interval_ms = FIRST_INTERVAL_MS
+            elif self.repetitions == 2:
+                self.interval_ms = SECOND_INTERVAL_MS
+            else:
+                self.interval_ms = round(self.interval_ms * self.easiness)
+            miss = 5 - quality
+            self.easiness = max(self.easiness + 0.1 - miss * (0.08 + miss * 0.02), MIN_EASINESS)
+        self.due_ms = now + self.interval_ms
+
+
+class ReviewQueue:
+    """Missed problems for one student, ordered by when they are next due."""
+
+    __slots__ = ('_heap', '_items', '_stale', '_counter', '_served_review')
+
+    def __init__(self):
+        self._heap = []
+        self._items = {}
+        self._stale = 0
+        self._counter = itertools.count()
+        self._served_review = False
+
+    @classmethod
+    def from_history(cls, history):
+        """Rebuild the queue from a ``ProblemHistory``"""
+        queue = cls()
+        queue.extend(history)
+        return queue
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, expression):
+        return expression in self._items
+
+    def items(self):
+        """``expression -> ReviewItem`` for every queued problem"""
+        return self._items
+
+    def extend(self, history):
+        """Fold a ``ProblemHistory`` of attempts in order.
+
+        Only single-step attempts can be rebuilt, since multi-step ones
+        store their answer rather than their operands.
+        """
+        cols = history.arrays()
+        rows = np.flatnonzero(cols['kind'] == 0)
+        if not self._items:
+            self._rebuild({name: cols[name][rows] for name in cols})
+            return
+        columns = zip(*(cols[name][rows].tolist() for name in ('operation', 'a', 'b', 'level', 'correct',
+                                                               'solve_ms', 'timestamp_ms')))
+        for operation, a, b, level, correct, solve_ms, timestamp_ms in columns:
+            operation = OPERATIONS[operation]
+            self._record(f"{a} {operation} {b}", (operation, a, b, level), correct, solve_ms, timestamp_ms)
+
+    def _rebuild(self, cols):
+        """``extend`` into an empty queue, matching attempts to problems with arrays and building the heap at once"""
+        keys = cols['a'].astype(np.int64) << 33 | cols['b'].astype(np.int64) << 2 | cols['operation']
+        misses = np.flatnonzero(~cols['correct'])
+        missed, first = np.unique(keys[misses], return_index=True)
+        if not len(missed):
+            return
+        starts = misses[first]
+        # Attempts at a problem before its first miss never reach the queue
+        ids = np.searchsorted(missed, keys).clip(max=len(missed) - 1)
+        rows = np.flatnonzero((missed[ids] == keys) & (np.arange(len(keys)) >= starts[ids]))
+
+        items = []
+        for operation, a, b, level in zip(cols['operation'][starts].tolist(), cols['a'][starts].tolist(),
+                                          cols['b'][starts].tolist(), cols['level'][starts].tolist()):
+            operation = OPERATIONS[operation]
+            item = ReviewItem((operation, a, b, level))
+            self._items[f"{a} {operation} {b}"] = item
+            items.append(item)
+
+        quality = grades(cols['correct'][rows], cols['solve_ms'][rows])
+        for key, grade, now in zip(ids[rows].tolist(), quality.tolist(), cols['timestamp_ms'][rows].tolist()):
+            item = items[key]
+            # As in ``_record``: a pass before the review is due does not count
+            if grade < PASSING_GRADE or now >= item.due_ms:
+                item.review(grade, now)
+
+        counter = self._counter
+        for expression, item in self._items.items():
+            item.entry = (item.due_ms, next(counter), expression)
+        self._compact()
+
+    def record(self, problem, correct, solve_ms=-1, now=None):
+        """Fold one checked answer into the queue; a correct answer to an unqueued problem is ignored"""
+        self._record(problem['expression'], problem, correct, solve_ms, now_ms() if now is None else now)
+
+    def _record(self, expression, problem, correct, solve_ms, now):
+        item = self._items.get(expression)
+        if item is None:
+            if correct:
+                return
+            item = self._items[expression] = ReviewItem(problem)
+        elif correct and now < item.due_ms:
+            # Answering before the review is due (e.g. straight after a miss) does not count
+            return
+        item.review(grade(correct, solve_ms), now)
+        self._schedule(expression, item)
+
+    def _schedule(self, expression, item):
+        entry = (item.due_ms, next(self._counter), expression)
+        heap = self._heap
+        if heap and item.entry is heap[0]:
+            heapq.heapreplace(heap, entry)
+        else:
+            heapq.heappush(heap, entry)
+            if item.entry is not None:
+                self._stale += 1
+                if self._stale > len(self._items):
+                    self._compact()
+        item.entry = entry
+
+    def _compact(self):
+        self._heap = [item.entry for item in self._items.values()]
+        heapq.heapify(self._heap)
+        self._stale = 0
+
+    def _top(self):
+        """The live entry with the earliest due time, popping any stale ones above it"""
+        heap = self._heap
+        while heap:
+            entry = heap[0]
+            item = self._items.get(entry[2])
+            if item is not None and item.entry is entry:
+                return entry
+            heapq.heappop(heap)
+            self._stale -= 1
+        return None
+
+    def next_due_ms(self):
+        """When the earliest review is due, or None when nothing is queued"""
+        entry = self._top()
+        return None if entry is None else entry[0]
+
+    def due(self, now=None):
+        """The most overdue problem, or None when nothing is due yet"""
+        entry = self._top()
+        if entry is None or entry[0] > (now_ms() if now is None else now):
+            return None
+        return self._items[entry[2]].problem
+
+    def next_review(self, now=None):
+        """A due problem to serve next, or None for a fresh one.
+
+        Reviews are interleaved: after serving one, the next call returns
+        None so a fresh problem comes between them.
+        """
+        if self._served_review:
+            self._served_review = False
+            return None
+        problem = self.due(now)
+        if problem is None:
+            return None
+        self._served_review = True
+        return dict(problem, review=True)
@@ -0,0 +1,52 @@
+"""Tab routing and per-tab render timing.
+
+``st.tabs`` executes every tab body on every rerun. The app instead keeps
+the active tab in session state and runs only that tab's function;
+``TabTimings`` records what each tab costs so the saving is visible.
+"""
+import time
+
+from .metrics import REGISTRY
+
+TAB_LABELS = ["🏠 Detective HQ", "🧮 Math Missions", "📊 Progress Dashboard", "🏆 Achievements", "🏫 Teacher View"]
+
+
+class TabTimings:
+    """Running count, total and last render time per tab."""
+
+    __slots__ = ('_count', '_total', '_last')
+
+    def __init__(self):
+        self._count = {}
+        self._total = {}
+        self._last = {}
+
+    def record(self, tab, seconds):
+        REGISTRY.observe('tab_render_seconds', seconds, "Server time to run one tab body", tab=tab)
+        self._count[tab] = self._count.get(tab, 0) + 1
+        self._total[tab] = self._total.get(tab, 0.0) + seconds
+        self._last[tab] = seconds
+
+    def run(self, tab, view):
+        """Call ``view()`` and record how long it took"""
+        start = time.perf_counter()
+        try:
+            return view()
+        finally:
+            self.record(tab, time.perf_counter() - start)
+
+    def mean_ms(self, tab):
+        count = self._count.get(tab)
+        return self._total[tab] / count * 1000 if count else None
+
+    def last_ms(self, tab):
+        last = self._last.get(tab)
+        return None if last is None else last * 1000
+
+    def saved_ms(self, active):
+        """Estimated time skipped by not running the other measured tabs"""
+        return sum(self._total[tab] / self._count[tab] for tab in self._count if tab != active) * 1000
+
+    def rows(self):
+        """Return ``(tab, renders, mean_ms, last_ms)`` for every measured tab"""
+        return [(tab, self._count[tab], self.mean_ms(tab), self.last_ms(tab)) for tab in self._count]
@@ -0,0 +1,151 @@
+"""Headless session engine: per-student state and answer scoring.
+
+The scoring rules used to live inline in the Math Missions tab. They work on
+any mutable mapping, so the app passes ``st.session_state`` and simulators
+and tests pass a plain dict.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from .achievements import AchievementTracker
+from .adaptive import AdaptiveModel
+from .aggregates import DashboardAggregates
+from .engine import SessionRandom
+from .expressions import answers_match
+from .history import ProblemHistory, now_ms
+from .metrics import REGISTRY, SOLVE_BUCKETS
+from .review import ReviewQueue
+
+LEVEL_UP_EVERY = 5
+POINTS_PER_LEVEL = 10
+STREAK_BONUS_PER_ANSWER = 2
+MAX_STREAK_BONUS = 20
+
+PROFILE_DEFAULTS = {
+    'student_name': "",
+    'points': 0,
+    'current_level': 1,
+    'problems_solved': 0,
+    'correct_streak': 0,
+    'current_problem': None,
+    'show_hint': False,
+}
+
+AttemptResult = namedtuple('AttemptResult', 'correct points streak_bonus leveled_up badges')
+
+
+def init_session_state(state):
+    """Fill in any missing profile fields and engine objects"""
+    for key, value in PROFILE_DEFAULTS.items():
+        if key not in state:
+            state[key] = value
+    if not isinstance(state.get('problem_history'), ProblemHistory):
+        state['problem_history'] = ProblemHistory()
+    if not isinstance(state.get('dashboard_stats'), DashboardAggregates):
+        state['dashboard_stats'] = DashboardAggregates.from_history(state['problem_history'])
+    if not isinstance(state.get('achievements'), AchievementTracker):
+        state['achievements'] = AchievementTracker()
+        state['achievements'].update_many(state)
+    if not isinstance(state.get('adaptive'), AdaptiveModel):
+        state['adaptive'] = AdaptiveModel.from_history(state['problem_history'])
+    if not isinstance(state.get('review_queue'), ReviewQueue):
+        state['review_queue'] = ReviewQueue.from_history(state['problem_history'])
+    if 'seen_expressions' not in state:
+        state['seen_expressions'] = set()
+    if not isinstance(state.get('rng'), SessionRandom):
+        state['rng'] = SessionRandom()
+    return state
+
+
+def new_session_state(student_name=""):
+    """Return a fresh session as a plain dict"""
+    return init_session_state({'student_name': student_name})
+
+
+def best_streak(history, streak=0):
+    """Longest run of correct answers in ``history``, ending with the current ``streak``"""
+    correct = history.arrays()['correct']
+    misses = np.flatnonzero(~correct)
+    # Runs of correct answers between misses
+    runs = np.diff(np.concatenate([[-1], misses, [len(correct)]])) - 1
+    return max(int(runs.max()), streak)
+
+
+def restore_profile(state, profile, history, unlocked=None):
+    """Load a saved profile and history into ``state`` and rebuild derived objects.
+
+    ``unlocked`` is the saved ``key -> unlocked_ms`` of earned badges. Streak
+    badges are also rebuilt from the best streak in ``history``, since the
+    profile only keeps the current one.
+    """
+    state.update(profile)
+    state['problem_history'] = history
+    state['dashboard_stats'] = DashboardAggregates.from_history(history)
+    if unlocked:
+        state['achievements'].restore(unlocked)
+    state['achievements'].update('correct_streak', best_streak(history, profile['correct_streak']))
+    state['achievements'].update_many(profile)
+    state['adaptive'] = AdaptiveModel.from_history(history)
+    state['review_queue'] = ReviewQueue.from_history(history)
+
+
+def merge_attempts(state, profile, history):
+    """Fold attempts made in another tab or worker into ``state``.
+
+    ``history`` holds only the attempts ``state`` has not seen yet, so this
+    costs O(new attempts) rather than a full ``restore_profile``.
+    """
+    state.update(profile)
+    state['problem_history'].extend(history)
+    cols = history.arrays()
+    for level, correct, points in zip(cols['level'].tolist(), cols['correct'].tolist(), cols['points'].tolist()):
+        state['dashboard_stats'].record(level, correct, points)
+    state['adaptive'].replay(cols['operation'].tolist(), cols['level'].tolist(), cols['correct'].tolist(),
+                             cols['solve_ms'].tolist())
+    state['review_queue'].extend(history)
+    state['achievements'].update_many(state)
+
+
+def score_answer(profile, correct):
+    """Apply one answer to the profile counters; returns ``(points, streak_bonus, leveled_up)``"""
+    if not correct:
+        profile['correct_streak'] = 0
+        return 0, 0, False
+
+    base_points = POINTS_PER_LEVEL * profile['current_level']
+    streak_bonus = min(profile['correct_streak'] * STREAK_BONUS_PER_ANSWER, MAX_STREAK_BONUS)
+    total_points = base_points + streak_bonus
+
+    profile['points'] += total_points
+    profile['problems_solved'] += 1
+    profile['correct_streak'] += 1
+
+    leveled_up = profile['problems_solved'] % LEVEL_UP_EVERY == 0
+    if leveled_up:
+        profile['current_level'] += 1
+    return total_points, streak_bonus, leveled_up
+
+
+def check_answer(state, problem, guess, seconds=None):
+    """Score ``guess`` for ``problem`` and update every piece of session state.
+
+    Returns an ``AttemptResult`` with the points awarded, the streak bonus,
+    whether the student was promoted and any newly unlocked badges.
+    """
+    correct = answers_match(guess, problem)
+    solve_ms = -1
+    if seconds is not None:
+        REGISTRY.observe('solve_seconds', seconds, "Time from a problem being shown to its answer", SOLVE_BUCKETS)
+        # Whole milliseconds, as stored, so replaying the history rebuilds the same model
+        solve_ms = round(seconds * 1000)
+        seconds = solve_ms / 1000
+    state['adaptive'].update(problem['operation'], problem['level'], correct, seconds)
+    total_points, streak_bonus, leveled_up = score_answer(state, correct)
+
+    timestamp_ms = now_ms()
+    state['problem_history'].append(problem, correct, total_points, timestamp_ms, solve_ms)
+    state['review_queue'].record(problem, correct, solve_ms, timestamp_ms)
+    state['dashboard_stats'].record(problem['level'], correct, total_points)
+    badges = state['achievements'].update_many(state)
+    return AttemptResult(correct, total_points, streak_bonus, leveled_up, badges)
@@ -0,0 +1,265 @@
+"""Durable SQLite storage for detective profiles and attempts.
+
+Writes go through an in-memory queue drained by a single writer thread,
+which commits in batches every ``batch_size`` attempts or every
+``flush_interval`` seconds, so answer submission never waits on disk.
+A batch that fails is logged and retried row by row, so one bad row costs
+only itself and the writer keeps running. Whatever is still queued is
+written when the store is closed or the interpreter exits. Reads open
+their own connection and are safe from any thread.
+"""
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from .history import COLUMN_DEFAULTS, COLUMNS, ProblemHistory, now_ms
+
+log = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.environ.get("DETECTIVES_DB", "detectives.db")
+
+PROFILE_FIELDS = ('points', 'current_level', 'problems_solved', 'correct_streak')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    name TEXT PRIMARY KEY,
+    points INTEGER NOT NULL DEFAULT 0,
+    current_level INTEGER NOT NULL DEFAULT 1,
+    problems_solved INTEGER NOT NULL DEFAULT 0,
+    correct_streak INTEGER NOT NULL DEFAULT 0,
+    updated_ms INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS attempts (
+    student TEXT NOT NULL,
+    operation INTEGER NOT NULL,
+    a INTEGER NOT NULL,
+    b INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    points INTEGER NOT NULL,
+    timestamp_ms INTEGER NOT NULL,
+    solve_ms INTEGER NOT NULL DEFAULT -1,
+    kind INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS attempts_student ON attempts (student);
+CREATE TABLE IF NOT EXISTS unlocks (
+    student TEXT NOT NULL,
+    key TEXT NOT NULL,
+    unlocked_ms INTEGER NOT NULL,
+    PRIMARY KEY (student, key)
+);
+"""
+
+UPSERT_PROFILE = """
+INSERT INTO profiles (name, points, current_level, problems_solved, correct_streak, updated_ms)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (name) DO UPDATE SET
+    points = excluded.points,
+    current_level = excluded.current_level,
+    problems_solved = excluded.problems_solved,
+    correct_streak = excluded.correct_streak,
+    updated_ms = excluded.updated_ms
+"""
+
+INSERT_ATTEMPT = "INSERT INTO attempts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+# A badge keeps the time it was first earned
+INSERT_UNLOCK = "INSERT OR IGNORE INTO unlocks VALUES (?, ?, ?)"
+
+# Attempt columns added after the first release, with their definitions
+ADDED_COLUMNS = {name: f"INTEGER NOT NULL DEFAULT {default}" for name, default in COLUMN_DEFAULTS.items()}
+
+_STOP = object()
+
+
+def connect(path):
+    """Open a SQLite connection in WAL mode"""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def add_missing_columns(conn, table):
+    """Bring an attempts table created by an older release up to the current columns"""
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for name, definition in ADDED_COLUMNS.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+    conn.commit()
+
+
+class DetectiveStore:
+    """Profiles and attempt history persisted to SQLite with write-behind batching."""
+
+    def __init__(self, path=DEFAULT_PATH, batch_size=256, flush_interval=1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        conn = connect(path)
+        conn.executescript(SCHEMA)
+        add_missing_columns(conn, "attempts")
+        conn.close()
+        self._queue = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._run, name="detective-store-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    # --- Writes (non-blocking) ---
+    def save_profile(self, name, profile):
+        """Queue a profile upsert; ``profile`` is any mapping with ``PROFILE_FIELDS``"""
+        self._queue.put((None, self._profile_row(name, profile), ()))
+
+    def record_attempt(self, name, profile, history, unlocked=None):
+        """Queue the latest attempt in ``history`` together with the updated profile.
+
+        ``unlocked`` maps the keys of badges this attempt earned to their unlock times.
+        """
+        self._queue.put(((name,) + history.row(-1), self._profile_row(name, profile),
+                         self._unlock_rows(name, unlocked)))
+
+    def save_unlocks(self, name, unlocked):
+        """Queue badge unlocks, ``key -> unlocked_ms``; badges already saved keep their first time"""
+        self._queue.put((None, None, self._unlock_rows(name, unlocked)))
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far is written; False if ``timeout`` seconds pass first"""
+        if not self._writer.is_alive():
+            return False
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        """Write everything still queued and stop the writer thread"""
+        atexit.unregister(self.close)
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+
+    @staticmethod
+    def _profile_row(name, profile):
+        return (name,) + tuple(int(profile[field]) for field in PROFILE_FIELDS) + (now_ms(),)
+
+    @staticmethod
+    def _unlock_rows(name, unlocked):
+        return tuple((name, key, int(when)) for key, when in (unlocked or {}).items())
+
+    def _run(self):
+        conn = connect(self.path)
+        attempts = []
+        profiles = {}
+        unlocks = []
+        deadline = time.monotonic() + self.flush_interval
+
+        def write():
+            if attempts or profiles or unlocks:
+                try:
+                    with conn:
+                        conn.executemany(INSERT_ATTEMPT, attempts)
+                        conn.executemany(UPSERT_PROFILE, profiles.values())
+                        conn.executemany(INSERT_UNLOCK, unlocks)
+                except Exception:
+                    log.exception("writing a batch of %d attempts failed; retrying row by row", len(attempts))
+                else:
+                    attempts.clear()
+                    profiles.clear()
+                    unlocks.clear()
+                    return
+                write_rows(INSERT_ATTEMPT, attempts)
+                write_rows(UPSERT_PROFILE, profiles.values())
+                write_rows(INSERT_UNLOCK, unlocks)
+                attempts.clear()
+                profiles.clear()
+                unlocks.clear()
+
+        def write_rows(statement, rows):
+            for row in rows:
+                try:
+                    with conn:
+                        conn.execute(statement, row)
+                except Exception:
+                    log.exception("dropping a row that could not be written: %r", row)
+
+        while True:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                write()
+                break
+            if isinstance(item, threading.Event):
+                try:
+                    write()
+                finally:
+                    item.set()
+                continue
+            if item is not None:
+                attempt, profile, unlocked = item
+                if attempt is not None:
+                    attempts.append(attempt)
+                if profile is not None:
+                    profiles[profile[0]] = profile
+                unlocks.extend(unlocked)
+
+            if len(attempts) >= self.batch_size or time.monotonic() >= deadline:
+                write()
+                deadline = time.monotonic() + self.flush_interval
+        conn.close()
+
+    # --- Reads ---
+    def load_profile(self, name):
+        """Return the saved profile fields for ``name``, or ``None`` for a new detective"""
+        conn = connect(self.path)
+        try:
+            row = conn.execute(
+                f"SELECT {', '.join(PROFILE_FIELDS)} FROM profiles WHERE name = ?", (name,)
+            ).fetchone()
+        finally:
+            conn.close()
+        return dict(zip(PROFILE_FIELDS, row)) if row else None
+
+    def load_history(self, name):
+        """Return the saved attempts for ``name`` as a ``ProblemHistory``"""
+        conn = connect(self.path)
+        try:
+            rows = conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM attempts WHERE student = ? ORDER BY rowid", (name,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return ProblemHistory.from_rows(rows)
+
+    def load_unlocks(self, name):
+        """Return ``key -> unlocked_ms`` for the badges ``name`` has earned"""
+        conn = connect(self.path)
+        try:
+            return dict(conn.execute("SELECT key, unlocked_ms FROM unlocks WHERE student = ?", (name,)))
+        finally:
+            conn.close()
+
+    def student_names(self):
+        """Return every saved detective's name, sorted"""
+        conn = connect(self.path)
+        try:
+            return [name for (name,) in conn.execute("SELECT name FROM profiles ORDER BY name")]
+        finally:
+            conn.close()
+
+    def points_since(self, since_ms):
+        """Return ``(name, points, current_level)`` for every detective who scored since ``since_ms``"""
+        conn = connect(self.path)
+        try:
+            return conn.execute(
+                "SELECT a.student, SUM(a.points), p.current_level FROM attempts a "
+                "JOIN profiles p ON p.name = a.student "
+                "WHERE a.timestamp_ms >= ? AND a.points > 0 GROUP BY a.student", (since_ms,)
+            ).fetchall()
+        finally:
+            conn.close()
@@ -0,0 +1,510 @@
+"""The Streamlit app: page layout, tab views and the per-rerun flow.
+
+``data.detectives.py`` calls ``main`` on every rerun. Everything at module
+level here (cached resources, tab views) is defined once per server
+process. pandas and plotly are only imported by the views that draw a
+table or chart, so cold starts and the first render skip them.
+"""
+import hmac
+import os
+import time
+from datetime import datetime
+
+import streamlit as st
+
+from . import render
+from .adaptive import next_adaptive_problem, next_exam_problem
+from .backends import StaleSessionError, commit_attempt, join_session, make_backend, sync_session
+from .charts import cached_class_figures, cached_dashboard_figures
+from .classroom import cached_class_analytics
+from .engine import SessionRandom
+from .eventlog import start_log
+from .export import ARCHIVE_PATH, open_attempts
+from .leaderboard import MonthlyLeaderboard
+from .metrics import REGISTRY
+from .pool import ProblemPool
+from .routing import TAB_LABELS, TabTimings
+from .session import check_answer, init_session_state
+from .store import DetectiveStore
+
+PAGE_CONFIG = {
+    'page_title': "MathCraft Detective Academy",
+    'page_icon': "🕵️",
+    'layout': "wide",
+    'initial_sidebar_state': "expanded",
+}
+
+# The Teacher View lists every saved detective, so it stays off until a passcode is set
+TEACHER_PASSCODE = os.environ.get("DETECTIVES_TEACHER_PASSCODE")
+# Longer ?seed= values are ignored rather than parsed; SessionRandom reduces the rest into range
+MAX_SEED_DIGITS = 20
+
+
+@st.cache_resource
+def detective_store():
+    """One SQLite store shared by every session in this server process"""
+    return DetectiveStore()
+
+
+@st.cache_resource
+def academy_leaderboard():
+    """Monthly rankings across every saved detective, updated as cases are solved"""
+    return MonthlyLeaderboard.from_store(detective_store())
+
+
+@st.cache_resource
+def session_backend():
+    """Shared profile and history state; set DETECTIVES_SESSION_BACKEND=sqlite to run several workers"""
+    return make_backend()
+
+
+@st.cache_resource
+def attempt_archive():
+    """Memory-mapped term export named by DETECTIVES_ARCHIVE, if any"""
+    return open_attempts(ARCHIVE_PATH) if ARCHIVE_PATH else None
+
+
+@st.cache_resource
+def class_analytics_cache():
+    """Per-class analytics shared by every teacher, refreshed from the attempt log's high-water mark"""
+    return {}
+
+
+@st.cache_resource
+def problem_pool():
+    """Pre-generated problems per difficulty, refilled by a background thread"""
+    return ProblemPool()
+
+
+def next_problem():
+    """Pick the next case for this detective: a review when one is due, else one biased toward weaker operations"""
+    # Monotonic, so solve times survive wall-clock changes
+    st.session_state.problem_started = time.monotonic()
+    rng = st.session_state.rng.next_problem()
+    # Cases missed earlier come back when due, between fresh ones; exam sets stay as seeded
+    review = None if rng.deterministic else st.session_state.review_queue.next_review()
+    if review is not None:
+        problem = review
+    elif rng.deterministic:
+        # A chosen seed means an exam set: the same cases for everyone with that seed
+        problem = next_exam_problem(st.session_state.current_level, rng, st.session_state.seen_expressions)
+    else:
+        problem = next_adaptive_problem(st.session_state.adaptive, problem_pool(), st.session_state.current_level,
+                                        st.session_state.seen_expressions, rng)
+    if st.session_state.get('event_log') is not None:
+        st.session_state.event_log.shown(problem)
+    return problem
+
+
+def render_detective_hq():
+    """Detective HQ: mentor profiles and the detective method"""
+    st.markdown("## Meet Your MathCraft Detective Mentors")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown(render.AMIRAH_PROFILE, unsafe_allow_html=True)
+
+    with col2:
+        st.markdown(render.AMARI_PROFILE, unsafe_allow_html=True)
+
+    st.markdown("### 🕵️ The MathCraft Detective Method")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("""
+        **🔍 Investigation Steps:**
+        1. 📖 **Read the case carefully** - What's the mystery?
+        2. 🧠 **Identify the clues** - What numbers do we have?
+        3. 🔢 **Choose your tool** - Which operation will solve it?
+        4. ✅ **Verify your solution** - Does the answer make sense?
+        """)
+    with col2:
+        st.markdown("""
+        **🎯 Detective Skills:**
+        - 🕵️ **Attention to Detail** - Every word matters
+        - 🤔 **Logical Thinking** - Step by step reasoning
+        - 📝 **Show Your Work** - Explain your process
+        - 🔄 **Learn & Improve** - Every case makes you stronger
+        """)
+
+    st.markdown("### 🌟 Why Be a Math Detective?")
+    st.markdown("""
+    Math detectives like Amirah and Amari use mathematical thinking to solve real-world mysteries! 
+    When you practice math through detective work, you're building problem-solving superpowers that 
+    help you in school, at home, and everywhere you go. Every problem you solve makes you a better detective!
+    """)
+
+
+def render_math_missions():
+    """Math Missions: generate a case and check the answer"""
+    st.markdown("## 🧮 Math Detective Missions")
+
+    if st.session_state.student_name:
+        # Mission controls
+        col1, col2, col3 = st.columns([3, 1, 1])
+        with col1:
+            if st.button("🆕 New Mission Assignment", type="primary"):
+                st.session_state.current_problem = next_problem()
+                st.session_state.show_hint = False
+        
+        with col2:
+            if st.button("💡 Get Hint"):
+                st.session_state.show_hint = True
+                if st.session_state.get('event_log') is not None:
+                    st.session_state.event_log.hint()
+        
+        with col3:
+            if st.button("🔄 Refresh"):
+                st.rerun()
+        
+        # Generate initial problem if none exists
+        if st.session_state.current_problem is None:
+            st.session_state.current_problem = next_problem()
+
+        problem = st.session_state.current_problem
+        
+        # Display mission
+        st.markdown(render.mission_card(problem, st.session_state.problems_solved + 1), unsafe_allow_html=True)
+        if problem.get('review'):
+            st.caption("🔁 Review: a case you missed earlier. Crack it to push its next review further out!")
+        
+        # Show the mathematical expression
+        st.markdown("### 🔢 Mathematical Expression:")
+        
+        # Create larger, more prominent display for the math problem
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col2:
+            st.markdown(render.EXPRESSION_BOX.render(expression=problem['expression']), unsafe_allow_html=True)
+        
+        # Show hint if requested
+        if st.session_state.show_hint:
+            st.markdown(render.HINT_BOX.render(hint=problem['hint']), unsafe_allow_html=True)
+        
+        # Answer input
+        st.markdown("### 🎯 Your Detective Solution:")
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            if isinstance(problem['answer'], int):
+                guess = st.number_input("Enter your answer:", 
+                                      step=1, 
+                                      format="%i", 
+                                      key="answer_input",
+                                      help="Type the number that solves the mystery!")
+            else:
+                guess = st.text_input("Enter your answer:",
+                                      key="answer_text_input",
+                                      placeholder="e.g. 3/4, 1 1/2 or 0.75",
+                                      help="Type a fraction or a decimal. Round decimals to 2 places.")
+        
+        with col2:
+            st.markdown("<br>", unsafe_allow_html=True)
+            submit_answer = st.button("🔍 Submit Solution", type="primary", use_container_width=True)
+        
+        # Check answer
+        if submit_answer:
+            solve_seconds = time.monotonic() - st.session_state.get('problem_started', time.monotonic())
+            result = check_answer(st.session_state, problem, guess, solve_seconds)
+            try:
+                # Re-scored against the shared profile if another tab answered first
+                result = commit_attempt(st.session_state, session_backend(), result)
+            except StaleSessionError:
+                st.error("🕵️ Your other tabs kept answering at the same time, so this solution wasn't saved. "
+                         "Please submit it again!")
+                return
+            if st.session_state.get('event_log') is not None:
+                st.session_state.event_log.answer(st.session_state.problem_history)
+            
+            # Queue the attempt for the background writer
+            unlocked = {badge.key: st.session_state.achievements.unlocked[badge.key] for badge in result.badges}
+            detective_store().record_attempt(st.session_state.student_name, st.session_state,
+                                             st.session_state.problem_history, unlocked)
+            
+            if result.correct:
+                # Success!
+                st.markdown(render.success_message(problem.get('answer_text', problem['answer']), result.points, result.streak_bonus, st.session_state.correct_streak),
+                            unsafe_allow_html=True)
+                
+                if result.leveled_up:
+                    st.balloons()
+                    st.success(f"🚀 **PROMOTION!** Welcome to Detective Level {st.session_state.current_level}! Harder cases await!")
+                
+                academy_leaderboard().record(st.session_state.student_name, result.points, st.session_state.current_level)
+                
+                # Generate new problem
+                st.session_state.current_problem = next_problem()
+                st.session_state.show_hint = False
+                
+            else:
+                st.markdown(render.ERROR_MESSAGE.render(answer=problem.get('answer_text', problem['answer'])), unsafe_allow_html=True)
+                
+                # Show the hint automatically after wrong answer
+                st.session_state.show_hint = True
+            
+            for badge in result.badges:
+                st.toast(f"{badge.emoji} New badge unlocked: **{badge.name}**")
+    
+    else:
+        st.markdown(render.WELCOME_PANEL, unsafe_allow_html=True)
+
+
+def render_progress_dashboard():
+    """Progress Dashboard: metrics and charts from the running aggregates"""
+    st.markdown("## 📊 Detective Progress Dashboard")
+    
+    if st.session_state.student_name and st.session_state.problem_history:
+        # Performance metrics
+        col1, col2, col3, col4 = st.columns(4)
+        
+        stats = st.session_state.dashboard_stats
+        total_problems = stats.total
+        correct_problems = stats.correct
+        accuracy = stats.accuracy
+        
+        with col1:
+            st.metric("Total Cases", total_problems, help="Number of problems attempted")
+        with col2:
+            st.metric("Solved Cases", correct_problems, help="Number of correct answers")
+        with col3:
+            st.metric("Accuracy Rate", f"{accuracy:.1f}%", help="Percentage of problems solved correctly")
+        with col4:
+            st.metric("Current Streak", st.session_state.correct_streak, help="Consecutive correct answers")
+        
+        # Progress visualization
+        if stats.total >= 3:
+            st.markdown("### 📈 Your Detective Journey")
+            
+            # Figures are rebuilt only when a new answer has been checked
+            fig, fig2, fig3 = cached_dashboard_figures(stats, st.session_state)
+            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(fig2, use_container_width=True)
+            if fig3 is not None:
+                st.plotly_chart(fig3, use_container_width=True)
+    
+    elif st.session_state.student_name:
+        st.info("🕵️ Start solving cases to see your progress statistics! Your first few cases will unlock detailed analytics.")
+    else:
+        st.warning("👮‍♀️ Sign in to view your detective progress dashboard!")
+    
+    # Earlier terms, read straight from the memory-mapped export
+    try:
+        archive = attempt_archive()
+    except (ImportError, OSError) as error:
+        st.info(f"📚 The term archive is unavailable: {error}")
+        archive = None
+    if archive is not None and st.session_state.student_name:
+        archived = archive.history(st.session_state.student_name)
+        if archived:
+            with st.expander(f"📚 Term archive ({len(archived):,} cases)"):
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Archived Cases", len(archived))
+                with col2:
+                    st.metric("Archived Accuracy", f"{archived.accuracy:.1f}%")
+                with col3:
+                    st.metric("Archived Points", archived.total_points)
+
+
+def render_achievements():
+    """Achievements: badges, next goals and the monthly leaderboard"""
+    st.markdown("## 🏆 Detective Academy Hall of Fame")
+    
+    if st.session_state.student_name:
+        # Badges are unlocked on the answer-checking path; here we only read them
+        achievements = st.session_state.achievements.earned()
+        
+        # Display earned achievements
+        st.markdown("### 🎖️ Your Detective Badges")
+        if achievements:
+            # Group achievements in rows of 3
+            for i in range(0, len(achievements), 3):
+                cols = st.columns(3)
+                for j, (badge, unlocked_ms) in enumerate(achievements[i:i+3]):
+                    earned_on = datetime.fromtimestamp(unlocked_ms / 1000).strftime("%b %d, %Y")
+                    with cols[j]:
+                        st.markdown(render.ACHIEVEMENT_BADGE.render(earned_on=earned_on, emoji=badge.emoji, name=badge.name,
+                                                                    description=badge.description),
+                                    unsafe_allow_html=True)
+        else:
+            st.info("🕵️ Start solving cases to earn your first achievement badge!")
+        
+        # Show next achievements to unlock
+        st.markdown("### 🎯 Next Detective Goals")
+        next_goals = st.session_state.achievements.next_goals(4)
+        
+        for goal in next_goals[:4]:  # Show top 4 goals
+            st.write(f"• {goal}")
+            
+        # Leaderboard
+        st.markdown("### 🏅 Academy Leaderboard (This Month)")
+        medals = {1: "🥇 ", 2: "🥈 ", 3: "🥉 "}
+        leaderboard_data = []
+        top = academy_leaderboard().top(5)
+        for rank, (name, month_points, level) in enumerate(top, start=1):
+            badge = "🎯 " if name == st.session_state.student_name else medals.get(rank, "")
+            leaderboard_data.append([f"{badge}Detective {name}", f"Level {level}", f"{month_points} points"])
+        
+        # Ties at the cutoff can leave a rank-5 detective off the list, so go by the list itself
+        standing = academy_leaderboard().standing(st.session_state.student_name)
+        if standing and all(name != st.session_state.student_name for name, _, _ in top):
+            rank, month_points, level = standing
+            leaderboard_data.append([f"🎯 #{rank} Detective {st.session_state.student_name}", f"Level {level}", f"{month_points} points"])
+        
+        if leaderboard_data:
+            # pandas is imported here, when the table is drawn, rather than at startup
+            import pandas as pd
+
+            leaderboard_df = pd.DataFrame(leaderboard_data, columns=["Detective", "Level", "Points"])
+            st.dataframe(leaderboard_df, use_container_width=True, hide_index=True)
+        else:
+            st.info("🕵️ No cases solved this month yet. Solve one to top the leaderboard!")
+    
+    else:
+        st.warning("🕵️ Join the Academy to start earning achievement badges and climb the leaderboard!")
+
+
+def render_teacher_view():
+    """Teacher View: error heatmap, accuracy over time and level spread for a class"""
+    st.markdown("## 🏫 Teacher View")
+    
+    if not TEACHER_PASSCODE:
+        st.info("🔒 The Teacher View is turned off. Set DETECTIVES_TEACHER_PASSCODE on the server to turn it on.")
+        return
+    if not st.session_state.get('teacher'):
+        passcode = st.text_input("Teacher passcode", type="password", key="teacher_passcode")
+        if not passcode:
+            return
+        if not hmac.compare_digest(passcode.encode(), TEACHER_PASSCODE.encode()):
+            st.error("🔒 That passcode is not right.")
+            return
+        st.session_state.teacher = True
+    
+    names = detective_store().student_names()
+    roster = st.multiselect("Class roster (leave empty for the whole academy)", names, key="class_roster")
+    analytics = cached_class_analytics(class_analytics_cache(), detective_store().path, roster)
+    
+    if not analytics.total:
+        st.info("📭 No saved cases for this class yet.")
+        return
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Detectives", len(roster) if roster else len(names))
+    with col2:
+        st.metric("Cases Attempted", analytics.total)
+    with col3:
+        st.metric("Class Accuracy", f"{analytics.accuracy:.1f}%")
+    
+    # Rebuilt only when new attempts reach this class
+    heatmap, timeline, distribution = cached_class_figures(analytics, st.session_state)
+    st.plotly_chart(heatmap, use_container_width=True)
+    st.plotly_chart(timeline, use_container_width=True)
+    st.plotly_chart(distribution, use_container_width=True)
+
+
+TAB_VIEWS = dict(zip(TAB_LABELS, [render_detective_hq, render_math_missions, render_progress_dashboard, render_achievements,
+                                  render_teacher_view]))
+
+
+def main():
+    """Run one rerun of the app"""
+    st.set_page_config(**PAGE_CONFIG)
+    st.markdown(render.STYLE, unsafe_allow_html=True)
+    rerun_started = time.perf_counter()
+
+    if 'rng' not in st.session_state:
+        # ?seed=1234 gives reproducible cases; otherwise each session is seeded from the OS
+        seed = st.query_params.get("seed", "")
+        chosen = seed.isdigit() and len(seed) <= MAX_SEED_DIGITS
+        st.session_state.rng = SessionRandom(int(seed) if chosen else None)
+    init_session_state(st.session_state)
+    if not isinstance(st.session_state.get('tab_timings'), TabTimings):
+        st.session_state.tab_timings = TabTimings()
+    if st.session_state.student_name:
+        # Pick up answers submitted from another tab or worker
+        sync_session(st.session_state, session_backend())
+
+    # --- Header ---
+    st.markdown(render.HEADER, unsafe_allow_html=True)
+
+    # --- Enhanced Sidebar ---
+    st.sidebar.title("🎓 Detective Profile")
+    if not st.session_state.student_name:
+        st.sidebar.markdown("### 👋 Welcome, Future Detective!")
+        name = st.sidebar.text_input("Enter your detective name:")
+        if st.sidebar.button("🚀 Join the Academy", type="primary"):
+            if name:
+                # Restore a returning detective's saved progress
+                profile = detective_store().load_profile(name)
+                history = detective_store().load_history(name) if profile else None
+                unlocked = detective_store().load_unlocks(name) if profile else None
+                join_session(st.session_state, session_backend(), name, profile, history, unlocked)
+                start_log(st.session_state)
+                if not profile:
+                    detective_store().save_profile(name, st.session_state)
+                # Badges rebuilt from the history (e.g. best streaks) are saved with the rest
+                detective_store().save_unlocks(name, st.session_state.achievements.unlocked)
+                st.rerun()
+    else:
+        st.sidebar.markdown(f"### 🕵️ Detective {st.session_state.student_name}")
+
+        # Stats in sidebar, filled in after the active tab has run
+        sidebar_stats = st.sidebar.container()
+
+        # Reset button
+        if st.sidebar.button("🔄 New Detective Profile"):
+            if st.session_state.get('event_log') is not None:
+                st.session_state.event_log.close()
+            for key in list(st.session_state.keys()):
+                del st.session_state[key]
+            st.rerun()
+
+    # Only the selected tab's function runs on a rerun; st.tabs would run all five.
+    active_tab = st.radio("Section", TAB_LABELS, horizontal=True, key="active_tab", label_visibility="collapsed")
+    st.session_state.tab_timings.run(active_tab, TAB_VIEWS[active_tab])
+
+    # --- Sidebar stats ---
+    # Rendered after the active tab so a just-checked answer is already reflected
+    if st.session_state.student_name:
+        col1, col2 = sidebar_stats.columns(2)
+        with col1:
+            st.metric("Level", st.session_state.current_level)
+            st.metric("Cases", st.session_state.problems_solved)
+        with col2:
+            st.metric("Points", st.session_state.points)
+            st.metric("Streak", st.session_state.correct_streak)
+
+        # Progress bar
+        progress_to_next = (st.session_state.problems_solved % 5) / 5
+        sidebar_stats.progress(progress_to_next)
+        sidebar_stats.caption(f"Progress to Level {st.session_state.current_level + 1}")
+
+    with st.sidebar.expander("⏱️ Performance"):
+        pool_stats = problem_pool().stats()
+        st.caption(f"Problem pool: {pool_stats['hit_rate']:.0%} hit rate, {pool_stats['queued']} ready, "
+                   f"last refill {pool_stats['last_refill_ms']:.1f} ms")
+        st.caption(f"Skipped ≈{st.session_state.tab_timings.saved_ms(active_tab):.0f} ms this rerun by not running the other tabs")
+        for tab, renders, mean_ms, last_ms in st.session_state.tab_timings.rows():
+            st.write(f"• {tab}: last {last_ms:.1f} ms, mean {mean_ms:.1f} ms over {renders} renders")
+        # Drawn only while switched on, so an ordinary rerun pays for the timers alone
+        if st.toggle("Latency histograms (all sessions)", key="show_histograms"):
+            if not REGISTRY.enabled:
+                st.caption("Latency instrumentation is switched off.")
+            for histogram in REGISTRY.histograms() if REGISTRY.enabled else ():
+                labels = ", ".join(value for _, value in histogram.labels)
+                st.caption(f"{histogram.name}{f' [{labels}]' if labels else ''}: {histogram.summary()}")
+            # The export is several KB, so it is only built and sent when asked for
+            if REGISTRY.enabled and st.button("📤 Export Prometheus metrics"):
+                st.download_button("📥 Prometheus metrics", REGISTRY.to_prometheus(),
+                                   file_name="detectives-metrics.prom", mime="text/plain")
+        if st.session_state.get('event_log') is not None:
+            log = st.session_state.event_log
+            st.caption(f"Session seed {log.seed}{' (chosen)' if log.deterministic else ''}, {len(log):,} events logged")
+            st.download_button("📥 Session replay log", log.getvalue(), file_name="session.ddlog",
+                               mime="application/octet-stream")
+
+    # --- Footer ---
+    st.markdown("---")
+    st.markdown(render.FOOTER, unsafe_allow_html=True)
+
+    # --- Instrumentation ---
+    REGISTRY.observe('rerun_seconds', time.perf_counter() - rerun_started, "Server time for one Streamlit rerun")
+    REGISTRY.dump()
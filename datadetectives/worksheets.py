@@ -0,0 +1,208 @@
+"""Printable case packets for offline practice.
+
+Each packet is one student's set of problems at one level. Its problems
+come from the same seeded generator as exam sets (``next_exam_problem``
+on a ``SessionRandom``), so a packet is reproducible from its seed and
+mixes in multi-step problems from level 4 like the app does. A packet is
+one self-contained HTML file. The cases come first, then an answer key on
+its own printed page. Print it from a browser to get a PDF.
+
+The answer key is summarised by a SHA-256 checksum. Its first 12 hex
+digits are printed on both the cases and the key, so a loose key page can
+be matched to its packet. Packets are rendered in a process pool, and each
+worker writes its files as it finishes them. ``manifest.csv`` gets one row
+per packet as results arrive. Run from the repository root:
+
+    python -m datadetectives.worksheets packets/ --students 30 --levels 2 4 6 --problems 40
+"""
+import argparse
+import csv
+import hashlib
+import html
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .adaptive import next_exam_problem
+from .engine import SessionRandom
+from .render import HtmlTemplate, cached_html
+
+DEFAULT_LEVELS = (2, 4, 6)
+DEFAULT_PROBLEMS = 40
+MANIFEST = "manifest.csv"
+MANIFEST_COLUMNS = ('file', 'student', 'level', 'seed', 'problems', 'answer_key_sha256')
+
+STYLE = cached_html("""
+body { font-family: Georgia, serif; max-width: 48rem; margin: 2rem auto; color: #222; }
+header { border-bottom: 3px solid #2196f3; margin-bottom: 1rem; }
+.cases li { margin-bottom: 1.2rem; break-inside: avoid; }
+.expression { font-size: 1.3em; font-weight: bold; }
+.answer-key { break-before: page; }
+.answer-key ol { columns: 2; }
+.checksum { font-family: monospace; font-size: 0.8em; }
+footer { font-family: monospace; font-size: 0.8em; color: #777; }
+@page { margin: 1.5cm; }
+""")
+
+PACKET = HtmlTemplate("""
+<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Case packet: {student}, level {level}</title>
+<style>{style}</style>
+</head>
+<body>
+<section class="packet">
+<header>
+<h1>🕵️ Detective Case Packet</h1>
+<p>Detective: <strong>{student}</strong> | Level {level} | {count} cases | Packet {short_checksum}</p>
+</header>
+<ol class="cases">{cases}</ol>
+<footer>Seed {seed}</footer>
+</section>
+<section class="answer-key">
+<h2>🔑 Answer Key: {student}, level {level}</h2>
+<ol>{answers}</ol>
+<p class="checksum">Packet {short_checksum} | SHA-256 {checksum}</p>
+</section>
+</body>
+</html>
+""")
+
+CASE = HtmlTemplate("""
+<li>
+<p>{question}</p>
+<p class="expression">{expression} = ______</p>
+</li>
+""")
+
+ANSWER = HtmlTemplate("""
+<li>{expression} = <strong>{answer}</strong></li>
+""")
+
+
+def packet_seed(seed, student, level):
+    """The generator seed for one student's packet at one level, independent of every other packet"""
+    state = np.random.SeedSequence([seed, student, level]).generate_state(1, np.uint64)[0]
+    return int(state) >> 1
+
+
+def packet_problems(level, count, seed):
+    """The ``count`` distinct problems of a packet"""
+    rng = SessionRandom(seed)
+    seen = set()
+    return [next_exam_problem(level, rng.next_problem(), seen) for _ in range(count)]
+
+
+def answer_text(problem):
+    return problem.get('answer_text', str(problem['answer']))
+
+
+def answer_key_checksum(problems):
+    """SHA-256 of the answer key: one ``number. expression = answer`` line per problem"""
+    digest = hashlib.sha256()
+    for number, problem in enumerate(problems, 1):
+        digest.update(f"{number}. {problem['expression']} = {answer_text(problem)}\n".encode())
+    return digest.hexdigest()
+
+
+def render_packet(student, level, problems, seed):
+    """Return ``(html, checksum)`` for one packet"""
+    checksum = answer_key_checksum(problems)
+    student = html.escape(student)
+    return PACKET.render(
+        student=student, level=level, count=len(problems), seed=seed, style=STYLE,
+        short_checksum=checksum[:12], checksum=checksum,
+        cases="".join(CASE.render(question=problem['question'], expression=problem['expression'])
+                      for problem in problems),
+        answers="".join(ANSWER.render(expression=problem['expression'], answer=answer_text(problem))
+                        for problem in problems),
+    ), checksum
+
+
+def slug(name):
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+
+def write_packet(job):
+    """Generate, render and write one packet; returns its manifest row"""
+    out_dir, index, student, level, count, seed = job
+    problems = packet_problems(level, count, seed)
+    page, checksum = render_packet(student, level, problems, seed)
+    name = f"{index + 1:03d}-{slug(student) or 'detective'}-level{level:02d}.html"
+    with open(os.path.join(out_dir, name), "w", encoding="utf-8") as f:
+        f.write(page)
+    return name, student, level, seed, count, checksum
+
+
+def make_packets(out_dir, students, levels=DEFAULT_LEVELS, problems=DEFAULT_PROBLEMS, seed=0, workers=None):
+    """Write a packet per student and level to ``out_dir``, plus ``manifest.csv``.
+
+    ``students`` is a list of names. The same ``seed`` always gives the
+    same packets, whatever the number of workers. Returns the SHA-256 over
+    every packet's answer-key checksum, in manifest order.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [(out_dir, index, student, level, problems, packet_seed(seed, index, level))
+            for index, student in enumerate(students) for level in levels]
+    workers = workers or os.cpu_count() or 1
+    digest = hashlib.sha256()
+    with open(os.path.join(out_dir, MANIFEST), "w", newline="", encoding="utf-8") as f:
+        manifest = csv.writer(f)
+        manifest.writerow(MANIFEST_COLUMNS)
+        if workers == 1:
+            rows = map(write_packet, jobs)
+            _write_manifest(manifest, rows, digest)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                rows = pool.map(write_packet, jobs, chunksize=max(1, len(jobs) // (workers * 8)))
+                _write_manifest(manifest, rows, digest)
+    return digest.hexdigest()
+
+
+def _write_manifest(manifest, rows, digest):
+    for row in rows:
+        manifest.writerow(row)
+        digest.update(row[-1].encode())
+
+
+def positive_int(text):
+    """argparse type for counts and levels, which start at 1"""
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render printable detective case packets with answer keys")
+    parser.add_argument("out", help="directory for the packets and manifest.csv")
+    parser.add_argument("--students", type=positive_int, default=30, help="number of students, when there is no roster")
+    parser.add_argument("--roster", help="text file with one student name per line")
+    parser.add_argument("--levels", type=positive_int, nargs="+", default=list(DEFAULT_LEVELS))
+    parser.add_argument("--problems", type=positive_int, default=DEFAULT_PROBLEMS, help="problems per packet")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=positive_int, help="processes; defaults to one per CPU")
+    args = parser.parse_args(argv)
+    if args.seed < 0:
+        parser.error(f"argument --seed: must not be negative, got {args.seed}")
+    if args.roster:
+        with open(args.roster, encoding="utf-8") as f:
+            students = [line.strip() for line in f if line.strip()]
+        if not students:
+            parser.error(f"argument --roster: {args.roster} lists no students")
+    else:
+        students = [f"Detective {i + 1}" for i in range(args.students)]
+
+    start = time.perf_counter()
+    digest = make_packets(args.out, students, args.levels, args.problems, args.seed, args.workers)
+    print(f"wrote {len(students) * len(args.levels):,} packets to {args.out} in {time.perf_counter() - start:.1f}s; "
+          f"answer keys sha256 {digest}")
+
+
+if __name__ == "__main__":
+    main()